@@ -9,68 +9,209 @@ Propose: To design user interface and other visual elements
 '''
 
 # import modules
-from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pygame
-import random
 import sys
+import tempfile
+import time
 
+from biomass import BiomassGrid
+from camera import Camera
+from chart_buffer import HistoryBuffer
+from checkpoint import AUTOSAVE_INTERVAL, Autosaver
+from collision import resolve_attacks, resolve_grazing
 from creature_def import Predator, Prey
+from dirty_render import DirtyRenderer
+from genome import HISTORY_LEVEL, HISTORY_RAW, MUTATION, TRAITS, GenomeBank, trait_stats
+from lod_renderer import HEAT_CELL, LAYER_COLORS, MODES, LODRenderer
+from metrics import EVENTS, MetricsRecorder
+from pooling import SpawnQueue
+from profiler import Profiler
+from sim_random import SimRandom
+from soa_engine import ArrayWorld, species_params
+from spatial_index import SpatialGrid
+from sprite_cache import get_atlas
+from telemetry import TelemetryServer
+from timestep import FixedTimestep
+from trajectory import KIND_PLANT, KIND_PREDATOR, KIND_PREY, TrajectoryLog
 from vegetation import Plant
 
-# 初始化Pygame
-pygame.init()
+# 默认窗口尺寸（世界更大时只显示其中一部分，可平移/缩放）
+VIEW_SIZE = (1500, 1000)
+
+# 图表：名称 -> 曲线颜色
+CHART_COLORS = {
+    'total': (104, 140, 200),
+    'predator': (205, 82, 87),
+    'prey': (239, 197, 127),
+    'plant': (147, 205, 147),
+}
+
+# 文字字体：首次绘制文字时才初始化字体子系统，字体文件只查找一次，各字号的 Font 全进程共用
+FONT_NAME = 'Arial'
+_font_path = None
+_fonts = {}
+
+
+def get_font(size):
+    """按字号缓存的字体（无界面运行从不调用，也就不初始化字体子系统）"""
+    global _font_path
+    if not pygame.font.get_init(): # 首次使用，或 pygame.quit 之后缓存的 Font 已失效
+        pygame.font.init()
+        _fonts.clear()
+        _font_path = pygame.font.match_font(FONT_NAME) # 找不到时为 None，即 pygame 默认字体（同 SysFont）
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(_font_path, size)
+    return font
+
+
+def open_display(size, flags=0):
+    """打开显示窗口：只初始化显示子系统（不初始化音频、手柄等用不到的子系统）"""
+    if not pygame.display.get_init():
+        pygame.display.init()
+    return pygame.display.set_mode(size, flags)
+
 
 class GameCanvas:
-    """游戏主画布"""
-    def __init__(self, width=1500, height=1000):
-        # 检测GPU加速支持
+    """游戏主画布
+
+    width/height 为世界尺寸，view_size 为窗口尺寸（默认不超过 VIEW_SIZE），窗口经 Camera 显示世界的一部分。
+    dirty=True 时使用软件显示表面与脏矩形刷新（见 dirty_render）。
+    vegetation='grid' 时植被为能量网格（见 biomass），不生成植物个体。
+    mutation 为子代性状的突变系数（见 genome，0 为不突变）。
+    """
+    def __init__(self, width=1500, height=1000, engine='sprite', headless=False, seed=None, workers=0, view_size=None,
+                 dirty=False, vegetation='sprites', mutation=MUTATION):
+        # 无界面模式：不创建显示窗口、不初始化任何 pygame 子系统，模拟不受帧率限制
+        self.headless = headless
+        view_width, view_height = view_size or (min(width, VIEW_SIZE[0]), min(height, VIEW_SIZE[1]))
         self.gpu_accelerated = False
-        try:
-            # 尝试使用硬件加速模式
-            self.screen = pygame.display.set_mode(
-                (width, height), 
-                pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.SCALED
-            )
-            self.gpu_accelerated = self._check_gpu_support()
-        except pygame.error:
-            # 回退到软件渲染
-            self.screen = pygame.display.set_mode((width, height))
-        # 在初始化日志中显示加速状态
-        print(f"GPU Acceleration: {'Enabled' if self.gpu_accelerated else 'Disabled'}")
-
-        # 初始化Pygame
-        self.screen = pygame.display.set_mode((width, height))
+        self.screen = None
+        if not headless:
+            # 尝试使用硬件加速模式；脏矩形刷新只对软件显示表面有效（SCALED 每帧整屏上传纹理），此时直接用软件模式
+            flags = 0 if dirty else pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.SCALED
+            try:
+                self.screen = open_display((view_width, view_height), flags)
+                self.gpu_accelerated = bool(flags) and self._check_gpu_support()
+            except pygame.error:
+                # 回退到软件渲染
+                self.screen = open_display((view_width, view_height))
+            # 在初始化日志中显示加速状态
+            print(f"GPU Acceleration: {'Enabled' if self.gpu_accelerated else 'Disabled'}")
+            pygame.display.set_caption("Survival & Evolution")
         self.width = width
         self.height = height
-        pygame.display.set_caption("Survival & Evolution")
+        self.world_rect = pygame.Rect(0, 0, width, height) # 世界边界（全体生物共用）
+        self.view_width = view_width
+        self.view_height = view_height
+        self.camera = Camera(view_width, view_height, width, height)
         self.clock = pygame.time.Clock()
+        self.frame_limit = 60 # render 的帧率上限（0 为不限帧；固定步长主循环自行控制节奏，见 timestep）
+        self.loop_status = None # 主循环状态文字（倍速与实际tick速率），显示在右下角
         self.bg_color = (44,64,73)  # 背景颜色
-        self.executor = ThreadPoolExecutor(max_workers=6) # 线程池
-        # 数据记录属性
-        self.predator_counts = []
-        self.prey_counts = []
-        self.plant_history = []  # 植物历史记录
-        self.last_plant_spawn = 0  # 上次生成植物的时间
-        self.plant_spawn_interval = random.choice(range(900,2300))  # 植物生成的时间间隔（毫秒）
+        self.lod = LODRenderer(self.camera, self.bg_color) # 细节层次（缩小视图时改为逐点/热力图）
+        self.dirty = DirtyRenderer(self) if dirty and not headless else None # 脏矩形刷新（None 为每帧整屏重绘）
+        self.rng = SimRandom(seed) # 分子系统随机数流（相同种子得到相同历史）
+        get_atlas() # 启动时一次性构建共享图集
+        # 种群历史（定长多分辨率缓冲，内存与运行时长无关）
+        self.history = {name: HistoryBuffer() for name in ('tick', *CHART_COLORS)}
+        self.last_plant_spawn = 0  # 上次生成植物的tick
+        self.plant_spawn_interval = int(self.rng['spawn'].integers(54, 138))  # 植物生成的间隔（tick，约0.9~2.3秒@60帧）
         self.current_plants = 0  # 植物生成计数器
+        self.plant_clusters = 0 # 已生成的植物簇数（簇ID）
         self.MAX_PLANTS = 200  # 最大植物生成数量
         chart_width = 230
-        chart_start_y = height - 600 # 图表起始Y坐标
+        chart_start_y = view_height - 600 # 图表起始Y坐标
         self.charts = {
             'total': pygame.Rect(20, chart_start_y, chart_width, 130),
             'predator': pygame.Rect(20, chart_start_y + 150, chart_width, 130),
             'prey': pygame.Rect(20, chart_start_y + 300, chart_width, 130),
             'plant': pygame.Rect(20, chart_start_y + 450, chart_width, 130),
         }
-        self.total_counts = []
-        self.chart_update_interval = 500 # 图表更新的时间间隔（毫秒）
-        self.last_chart_update = 0 # 上次图表更新的时间
+        self.chart_surfaces = {} # 图表缓存：名称 -> (绘制时的采样数, Surface, 绘制时的帧序号)，有新采样时才重绘
+        self.chart_refresh = 1 # 图表最多每隔几个绘制帧重绘一次（快进时由主循环调大）
+        self.frames = 0 # 已绘制的帧数
+        self.chart_update_interval = 30 # 图表采样间隔（tick，约0.5秒@60帧）
+        self.last_chart_update = 0 # 上次图表采样的tick
         self.current_tick = 0 # 当前游戏的tick计数
+        self.autosaver = None # 自动存档（见 checkpoint.Autosaver）
+        self.recorder = None # 轨迹记录（见 trajectory.TrajectoryRecorder）
+        self.metrics = None # 指标导出（见 metrics.MetricsRecorder）
+        self.events = dict.fromkeys(EVENTS, 0) # 累计出生/死亡/捕杀数（两种引擎在批量增删时累加）
+        self.profiler = None # 分阶段计时（见 profiler.Profiler）
+        self.perception = None # 感知缓存（见 perception_cache.PerceptionCache）
+        self.telemetry = None # 本地遥测服务（见 telemetry.TelemetryServer）
+        self.timestep = None # 窗口模式的固定步长主循环（见 timestep.FixedTimestep）
+        self.paused = False # 暂停（遥测命令设置：无界面运行时 run 等待恢复，窗口模式只绘制不推进）
         # 生物组（将在后续连接生物模块）
         self.predators = pygame.sprite.Group()
         self.prey = pygame.sprite.Group()
         self.plants = pygame.sprite.Group()
+        # 空间索引（每tick重建，供感知与碰撞查询）
+        self.predator_grid = SpatialGrid(bounds=self.world_rect).attach(self.predators)
+        self.prey_grid = SpatialGrid(bounds=self.world_rect).attach(self.prey)
+        self.plant_grid = SpatialGrid().attach(self.plants)
+        # 出生/死亡队列（每个更新阶段末批量增删）
+        self.spawn_queue = SpawnQueue(self.events)
+        # 模拟引擎：'sprite' 为逐对象精灵，'numpy' 为结构化数组批量引擎
+        self.engine = engine
+        self.world = None
+        if engine == 'numpy':
+            self.world = ArrayWorld(
+                width, height, rng=self.rng['engine'], workers=workers, # workers>1 时感知/接触查询多进程执行
+                genome_rng=self.rng['genome'], mutation=mutation
+            )
+            self.predators, self.prey, self.plants = self.world.views # 仅用于绘制与计数
+            self.world.events = self.events
+        elif engine != 'sprite':
+            raise ValueError(f"Unknown engine: {engine}")
+        # 遗传：精灵引擎每个物种一个基因组库（个体持有行号），数组引擎的基因组是结构化数组中的一列
+        self.mutation = mutation
+        self.genomes = {}
+        if self.world is None:
+            self.genomes = {
+                species: GenomeBank(TRAITS[species], species_params(cls))
+                for species, cls in (('predator', Predator), ('prey', Prey))
+            }
+        self.trait_stats = {} # 最近一次采样的性状统计（均值/方差/直方图，见 genome.trait_stats）
+        # 性状均值历史（定长多分辨率缓冲，与种群历史同步采样）
+        self.trait_history = {
+            species: {t.name: HistoryBuffer(HISTORY_RAW, HISTORY_LEVEL, dtype=float) for t in traits}
+            for species, traits in TRAITS.items()
+        }
+        # 植被：'sprites' 为逐株植物，'grid' 为能量网格（logistic 再生，开销只与地图面积有关）
+        self.vegetation = vegetation
+        self.biomass = None
+        if vegetation == 'grid':
+            self.biomass = BiomassGrid(width, height)
+            if self.world is not None:
+                self.world.biomass = self.biomass
+        elif vegetation != 'sprites':
+            raise ValueError(f"Unknown vegetation: {vegetation}")
+
+    def apply_overrides(self, overrides):
+        """覆盖物种参数，如 {'predator': {'HUNT_COOLDOWN': 2000}, 'prey': {'hearing_radius': 70}}
+
+        精灵引擎写入现有个体（子代随繁殖继承），数组引擎写入物种参数表；属于基因组的性状同时写入全体个体的基因组。
+        """
+        targets = {'predator': self.predators, 'prey': self.prey}
+        for species, values in overrides.items():
+            if self.world is not None:
+                store = getattr(self.world, 'predators' if species == 'predator' else 'prey')
+                for name, value in values.items():
+                    if name in store.trait_index:
+                        store.set_trait(name, value)
+                    else:
+                        store.params[name] = value
+                continue
+            bank = self.genomes[species]
+            creatures = targets[species].sprites()
+            for name, value in values.items():
+                for creature in creatures:
+                    setattr(creature, name, value)
+                if name in bank.index:
+                    bank.set_trait([c.genome for c in creatures], name, value)
 
     def _check_gpu_support(self):
         """检测系统GPU加速支持"""
@@ -78,189 +219,610 @@ class GameCanvas:
         current_driver = pygame.display.get_driver()
         return current_driver in drivers
 
-    def draw_single_chart(self, surface, chart_rect, data, color, title):
-        """绘制单个图表组件"""
+    def font(self, size):
+        """按字号缓存的字体（见 get_font）"""
+        return get_font(size)
+
+    def draw_single_chart(self, chart_rect, history, color, title):
+        """绘制单个图表组件，返回图表大小的 Surface"""
         # 绘制背景
-        bg_surface = pygame.Surface(chart_rect.size, pygame.SRCALPHA)
-        pygame.draw.rect(bg_surface, (30,30,30,25), (0,0,*chart_rect.size), border_radius=10)
-        surface.blit(bg_surface, chart_rect.topleft)
-        # 全时段数据分析
-        all_data = data  # 使用全部历史数据
-        max_value = max(all_data) if all_data else 1
-        min_value = min(all_data) if all_data else 0
+        surface = pygame.Surface(chart_rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(surface, (30,30,30,25), (0,0,*chart_rect.size), border_radius=10)
+        # 全时段数据：最小/最大包络，点数不超过缓冲的块数
+        lo, hi = history.envelope()
+        max_value = history.max if len(history) else 1
+        min_value = history.min if len(history) else 0
         # 动态计算纵坐标范围（添加10%余量）
         value_range = max_value - min_value
         y_max = max_value + value_range * 0.1
         y_min = max(min_value - value_range * 0.1, 0)
         y_scale = chart_rect.height / (y_max - y_min) if (y_max - y_min) > 0 else 1
         # 横坐标缩放
-        x_step = chart_rect.width / max(len(all_data)-1, 1)
-        # 生成全局坐标点
-        if len(all_data) > 1:
-            points = [
-                (chart_rect.left + i * x_step,
-                 chart_rect.bottom - 10 - (d - y_min) * y_scale)
-                for i, d in enumerate(all_data)
-            ]
-            pygame.draw.lines(surface, color, False, points, 2)
+        x_step = chart_rect.width / max(len(lo)-1, 1)
+        if len(lo) > 1:
+            xs = np.arange(len(lo)) * x_step
+            if lo is hi:
+                points = np.column_stack((xs, chart_rect.height - 10 - (lo - y_min) * y_scale))
+            else:
+                # 降采样块：每块依次连到最小值与最大值，保留尖峰
+                points = np.empty((2 * len(lo), 2))
+                points[:, 0] = np.repeat(xs, 2)
+                points[0::2, 1] = chart_rect.height - 10 - (lo - y_min) * y_scale
+                points[1::2, 1] = chart_rect.height - 10 - (hi - y_min) * y_scale
+            pygame.draw.lines(surface, color, False, points.tolist(), 2)
         # 优化标题位置
-        font = pygame.font.SysFont('Arial', 15)
-        current_value = data[-1] if data else 0
-        text = font.render(f'{title}: {current_value}', True, 'white')
-        surface.blit(text, (chart_rect.left + 5, chart_rect.top + 3))
+        text = self.font(15).render(f'{title}: {history.last}', True, 'white')
+        surface.blit(text, (5, 3))
+        return surface
+
+    def chart_overlays(self):
+        """tick 计数与图表：[(内容键, Surface, 左上角), ...]（各图表缓存为 Surface，只在有新采样时且距上次重绘满 chart_refresh 帧时重绘）"""
+        tick = f'Tick: {self.current_tick}'
+        items = [(tick, self.font(16).render(tick, True, (255,255,255)), (10, 5))]
+        for chart_type, color in CHART_COLORS.items():
+            history = self.history[chart_type]
+            cached = self.chart_surfaces.get(chart_type)
+            if cached is None or (cached[0] != len(history) and self.frames - cached[2] >= self.chart_refresh):
+                cached = (len(history), self.draw_single_chart(
+                    self.charts[chart_type], history, color, chart_type.capitalize()), self.frames)
+                self.chart_surfaces[chart_type] = cached
+            items.append((cached[1], cached[1], self.charts[chart_type].topleft)) # 重绘后为新的 Surface
+        return items
+
+    def fps_overlays(self):
+        """帧率与统计浮层：[(内容键, Surface, 左上角), ...]"""
+        fps = f'FPS: {int(self.clock.get_fps())}'
+        items = [(fps, self.font(16).render(fps, True, (255,255,255)), (self.view_width-70, 5))]
+        if self.loop_status is not None:
+            status = self.font(14).render(self.loop_status, True, (255,255,255))
+            items.append((self.loop_status, status, status.get_rect(bottomright=(self.view_width-5, self.view_height-5)).topleft))
+        if self.profiler is not None and self.profiler.overlay:
+            overlay = self.profiler.overlay_surface(self.font(13))
+            items.append((overlay, overlay, overlay.get_rect(topright=(self.view_width-80, 5)).topleft))
+        return items
+
+    def overlays(self):
+        """全部叠加层，按绘制顺序"""
+        return self.fps_overlays() + self.chart_overlays()
 
     def draw_charts(self):
         """绘制图表"""
-        # 使用带透明度的表面
-        chart_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        # 在图表表面添加tick显示
-        font = pygame.font.SysFont('Arial', 16)
-        tick_text = font.render(f'Tick: {self.current_tick}', True, (255,255,255))
-        self.screen.blit(tick_text, (10, 5))
-        # 使用循环绘制图表
-        chart_configs = [
-            ('total', self.total_counts, (104, 140, 200)),
-            ('predator', self.predator_counts, (205, 82, 87)),
-            ('prey', self.prey_counts, (239, 197, 127)),
-            ('plant', self.plant_history, (147, 205, 147))
-        ]
-        for chart_type, data, color in chart_configs:
-            self.draw_single_chart(chart_surface, self.charts[chart_type], 
-                                 data, color, chart_type.capitalize())
-        self.screen.blit(chart_surface, (0,0))
+        self.screen.blits([(surface, pos) for _, surface, pos in self.chart_overlays()], doreturn=False)
 
     def fps_display(self):
         """显示当前帧率"""
-        font = pygame.font.SysFont('Arial', 16)
-        fps_text = font.render(f'FPS: {int(self.clock.get_fps())}', True, (255,255,255))
-        self.screen.blit(fps_text, (self.width-70, 5))
+        self.screen.blits([(surface, pos) for _, surface, pos in self.fps_overlays()], doreturn=False)
 
     def draw_background(self):
         """绘制自然环境背景"""
         self.screen.fill(self.bg_color)
+        if self.biomass is not None:
+            self.biomass.draw(self.screen, self.camera, self.bg_color)
+        # 视口超出世界时标出世界边界
+        world = self.camera.world_on_screen()
+        if not world.contains(self.screen.get_rect()):
+            pygame.draw.rect(self.screen, (70,95,105), world, 1)
         # 这里可以添加地形、植物等静态元素
 
+    def background_key(self):
+        """背景内容的键（摄像机状态与植被层版本），键不变时背景不变"""
+        camera = self.camera
+        layer = self.biomass.layer_version() if self.biomass is not None else None
+        return (camera.x, camera.y, camera.zoom_index, self.screen.get_size(), layer)
+
+    def group_blits(self, group):
+        """视口内个体的 (图像, 屏幕位置) 列表（精灵组经空间网格裁剪，数组视图按坐标向量化裁剪）"""
+        camera = self.camera
+        if self.world is not None:
+            return group.blits(camera)
+        return camera.sprite_blits(group.spatial_grid.query_rect(camera.view_rect()))
+
+    def entity_blits(self):
+        """完整精灵层次下全部个体的 blit 列表，按绘制顺序（被捕食者、捕食者、植物）"""
+        return [item for group in (self.prey, self.predators, self.plants) for item in self.group_blits(group)]
+
+    def draw_group(self, group):
+        """只绘制视口内的个体"""
+        self.screen.blits(self.group_blits(group), doreturn=False)
+
+    def _positions(self, group, view):
+        """个体中心坐标数组（精灵组只取视口附近的个体）"""
+        if self.world is not None:
+            return group.arrays.x, group.arrays.y
+        centers = np.array([s.rect.center for s in group.spatial_grid.query_rect(view)], dtype=float).reshape(-1, 2)
+        return centers[:, 0], centers[:, 1]
+
+    def visible_estimate(self):
+        """视口内个体数的估计：按视口与世界的重叠面积折算，无需先裁剪"""
+        overlap = self.camera.view_rect().clip(self.world_rect)
+        share = overlap.width * overlap.height / max(self.width * self.height, 1)
+        return share * (len(self.prey) + len(self.predators) + len(self.plants))
+
+    def choose_lod(self):
+        """按缩放与视口内个体密度选择细节层次（见 lod_renderer）"""
+        return self.lod.choose(self.visible_estimate())
+
+    def draw_entities(self, mode=None):
+        """按细节层次绘制：完整精灵 / 逐点 / 密度热力图"""
+        camera, lod = self.camera, self.lod
+        layers = (('prey', self.prey), ('predator', self.predators), ('plant', self.plants))
+        view = camera.view_rect()
+        mode = mode or self.choose_lod()
+        if mode == 'sprites':
+            for _, group in layers:
+                self.draw_group(group)
+        elif mode == 'points':
+            for kind, group in layers:
+                lod.draw_points(self.screen, *self._positions(group, view), LAYER_COLORS[kind])
+        else:
+            heat = []
+            for kind, group in layers:
+                grid = getattr(group, 'spatial_grid', None)
+                if grid is not None and HEAT_CELL / camera.zoom >= grid.cell_size:
+                    heat.append((*grid.density(), LAYER_COLORS[kind])) # 网格格子不大于热力图格子时直接用格子计数
+                else:
+                    heat.append((*self._positions(group, view), None, LAYER_COLORS[kind]))
+            lod.draw_heatmap(self.screen, heat)
+
     def _update_predators(self, prey_group):
-        """并行更新捕食者状态"""
+        """更新捕食者状态：全体移动后一次结算全部攻击接触，再各自结算冷却与繁殖"""
+        profiler = self.profiler
+        for predator in self.predators:
+            predator.move(prey_group)
+        if profiler is not None:
+            start = time.perf_counter()
+        contacts = resolve_attacks(self)
+        if profiler is not None:
+            profiler.add('attack', time.perf_counter() - start)
+            profiler.count('collisions', contacts)
         for predator in self.predators:
-            predator.update(prey_group)
+            predator.settle()
     
     def _update_prey(self, predator_group, plant_group):
-        """并行更新被捕食者状态"""
+        """更新被捕食者状态：全体移动后一次结算全部进食接触，再各自结算繁殖"""
+        profiler = self.profiler
         for prey in self.prey:
-            prey.update(predator_group, plant_group)
+            prey.move(predator_group, plant_group)
+        if profiler is not None:
+            start = time.perf_counter()
+        contacts = resolve_grazing(self, plant_group)
+        if profiler is not None:
+            profiler.add('eat', time.perf_counter() - start)
+            profiler.count('collisions', contacts)
+        for prey in self.prey:
+            prey.settle()
 
     def _spawn_plant_cluster(self):
         """生成植物簇"""
         if self.current_plants >= self.MAX_PLANTS:
             return
-        cluster_size = random.randint(3,5)
+        rng = self.rng['spawn']
+        cluster_size = int(rng.integers(3, 6))
         actual_size = min(cluster_size, self.MAX_PLANTS - self.current_plants)
-        center_x = random.randint(50, self.width-50)
-        center_y = random.randint(50, self.height-50)
-        cluster_id = id(self)
+        center_x = int(rng.integers(50, self.width-50+1))
+        center_y = int(rng.integers(50, self.height-50+1))
+        self.plant_clusters += 1
+        cluster_id = self.plant_clusters
+        offsets = rng.integers(-30, 31, (actual_size, 2))
+        if self.biomass is not None:
+            self.biomass.seed(center_x + offsets[:, 0], center_y + offsets[:, 1])
+            self.current_plants += actual_size
+            return
+        if self.world is not None:
+            self.world.add_plants(center_x + offsets[:, 0], center_y + offsets[:, 1], cluster_id)
+            self.current_plants += actual_size
+            return
         # 在一个区域内生成多个植物
-        for _ in range(actual_size):
-            offset_x = random.randint(-30, 30)
-            offset_y = random.randint(-30, 30)
+        for offset_x, offset_y in offsets.tolist():
             self.plants.add(Plant(
                 center_x + offset_x,
                 center_y + offset_y,
-                cluster_id
+                cluster_id,
+                self.rng['plant']
             ))
             self.current_plants += 1
 
-    def update(self):
-        """更新画布内容"""
+    def _seed_plants(self):
+        """初始植物簇：一次生成到植物上限（簇大小、中心、偏移与外观按列向量化抽取，代替逐簇调用 _spawn_plant_cluster）"""
+        remaining = self.MAX_PLANTS - self.current_plants
+        if remaining <= 0:
+            return
+        rng = self.rng['spawn']
+        sizes = rng.integers(3, 6, remaining // 3 + 1) # 每簇至少3株，足以达到上限
+        total = np.cumsum(sizes)
+        count = int(np.searchsorted(total, remaining)) + 1
+        sizes = sizes[:count]
+        sizes[-1] -= total[count - 1] - remaining # 最后一簇截断到上限
+        center_x = rng.integers(50, self.width - 50 + 1, count)
+        center_y = rng.integers(50, self.height - 50 + 1, count)
+        offsets = rng.integers(-30, 31, (remaining, 2))
+        x = np.repeat(center_x, sizes) + offsets[:, 0]
+        y = np.repeat(center_y, sizes) + offsets[:, 1]
+        cluster_id = np.repeat(np.arange(self.plant_clusters + 1, self.plant_clusters + count + 1), sizes)
+        self.plant_clusters += count
+        self.current_plants += remaining
+        if self.biomass is not None:
+            self.biomass.seed(x, y)
+        elif self.world is not None:
+            self.world.add_plants(x, y, cluster_id)
+        else:
+            self.plants.add(*Plant.spawn_many(x, y, cluster_id, self.rng['plant']))
+
+    def _rebuild_grids(self):
+        """按当前位置重建空间索引"""
+        self.predator_grid.rebuild()
+        self.prey_grid.rebuild()
+        self.plant_grid.rebuild()
+
+    def _record_sample(self):
+        """记录一次种群采样"""
+        pred_count = len(self.predators)
+        prey_count = len(self.prey)
+        history = self.history
+        history['tick'].append(self.current_tick)
+        history['total'].append(pred_count + prey_count + self.current_plants)
+        history['predator'].append(pred_count)
+        history['prey'].append(prey_count)
+        history['plant'].append(self.current_plants)
+        # 性状统计：每个物种对全部基因组做一次向量运算
+        for species, traits in TRAITS.items():
+            stats = self.trait_stats[species] = trait_stats(self.genome_values(species), traits)
+            for trait, mean in zip(traits, stats['mean'].tolist()):
+                self.trait_history[species][trait.name].append(mean)
+
+    def genome_values(self, species):
+        """某物种存活个体的基因组（每行一个个体，列顺序见 genome.TRAITS）"""
+        if self.world is not None:
+            return getattr(self.world, 'predators' if species == 'predator' else 'prey').genome
+        return self.genomes[species].live()
+
+    def step(self):
+        """推进一个模拟tick（不含绘制，计时全部以tick为单位）"""
+        profiler = self.profiler
         self.current_tick += 1
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_plant_spawn >= self.plant_spawn_interval:
+        if self.biomass is not None:
+            self.biomass.grow()
+        if self.current_tick - self.last_plant_spawn >= self.plant_spawn_interval:
             self._spawn_plant_cluster()
-            self.last_plant_spawn = current_time
-        # 数据记录
-        if current_time - self.last_chart_update >= self.chart_update_interval:
-            self.last_chart_update = current_time
-            pred_count = len(self.predators)
-            prey_count = len(self.prey)
-            self.predator_counts.append(pred_count)
-            self.prey_counts.append(prey_count)
-            self.plant_history.append(self.current_plants)
-            self.total_counts.append(pred_count + prey_count + self.current_plants)
-        # 并行更新生物状态
-        future_pred = self.executor.submit(self._update_predators, self.prey)
-        future_prey = self.executor.submit(self._update_prey, self.predators, self.plants)
-        future_pred.result()
-        future_prey.result()
-        # 更新所有生物屏幕边界
-        for obj in (*self.predators, *self.prey):
-            obj.screen_rect = pygame.Rect(0, 0, self.width, self.height)
-        self.current_plants = len(self.plants) # 更新当前植物数量
-        # 绘制流程
+            self.last_plant_spawn = self.current_tick
+        if profiler is not None:
+            profiler.lap('spawn')
+        if self.world is not None:
+            self.world.step() # 数组引擎批量更新（分阶段计时在引擎内完成）
+        else:
+            self._rebuild_grids()
+            if profiler is not None:
+                profiler.lap('grid')
+            # 按固定顺序更新（先捕食者、后被捕食者，组内按加入顺序），保证结果可复现；每个阶段末统一增删
+            self._update_predators(self.prey)
+            self.spawn_queue.flush()
+            if profiler is not None:
+                profiler.lap('predators')
+            self._update_prey(self.predators, self.plants if self.biomass is None else self.biomass)
+            self.spawn_queue.flush()
+            if self.perception is not None:
+                self.perception.end_tick()
+            if profiler is not None:
+                profiler.lap('prey')
+        # 更新当前植物数量（植被网格按总能量折算）
+        self.current_plants = len(self.plants) if self.biomass is None else self.biomass.plant_equivalent()
+        # 数据记录（tick末采样，与指标日志同一时刻，见 metrics.MetricsRecorder.record）
+        if self.current_tick - self.last_chart_update >= self.chart_update_interval:
+            self.last_chart_update = self.current_tick
+            self._record_sample()
+        if profiler is not None:
+            profiler.lap('sample')
+        if self.autosaver is not None:
+            self.autosaver.maybe_save()
+        if self.recorder is not None:
+            self.recorder.record()
+        if self.metrics is not None:
+            self.metrics.record()
+        if profiler is not None:
+            profiler.lap('io')
+
+    def render(self):
+        """绘制当前画面并控制帧率（frame_limit 为 0 时只计量帧率）"""
+        if self.dirty is not None:
+            self.dirty.render()
+        else:
+            self.draw_frame()
+        self.frames += 1
+        self.clock.tick(self.frame_limit)
+
+    def draw_frame(self):
+        """整屏重绘并刷新显示"""
+        profiler = self.profiler
         self.draw_background()              # 1.先绘制背景
-        self.prey.draw(self.screen)         # 2.绘制被捕食者
-        self.predators.draw(self.screen)    # 3.绘制捕食者
-        self.plants.draw(self.screen)       # 3.绘制植物
+        self.draw_entities()                # 2.绘制被捕食者、捕食者、植物
+        if profiler is not None:
+            profiler.lap('draw')
         self.fps_display()                  # 4.绘制帧率
         self.draw_charts()                  # 5.最后绘制图表
+        if profiler is not None:
+            profiler.lap('charts')
         # 显示刷新与帧率控制
         pygame.display.flip()
-        self.clock.tick(60)
+        if profiler is not None:
+            profiler.lap('flip')
 
-def startUp(PREDATOR_COUNT, PREY_COUNT):
-    """启动"""
-    pygame.init()
-    canvas = GameCanvas()
-    # 配置生成参数
-    PREDATOR_COUNT = PREDATOR_COUNT  # 捕食者数量
-    PREY_COUNT = PREY_COUNT      # 被捕食者数量
+    def update(self, render=None):
+        """推进一个tick并绘制（render 默认为有窗口时绘制；为 False 时只推进模拟）"""
+        if self.profiler is not None:
+            self.profiler.begin()
+        self.step()
+        if (not self.headless) if render is None else render:
+            self.render()
+        if self.profiler is not None:
+            self.profiler.end()
+
+    def population_series(self):
+        """已采集的种群序列（全分辨率，每次采样一条）
+
+        图表缓冲只保留最近 RAW_CAPACITY 条采样（见 chart_buffer.HistoryBuffer）；超出后从指标日志读取全程序列。
+        指标日志须与图表同一采样间隔、从第一次采样起连续记录到最近一次采样，否则报错而不返回截断或混杂的序列
+        （run 会为超出缓冲的运行自动挂上临时指标记录）。
+        """
+        if all(history.complete for history in self.history.values()):
+            return {name: history.series() for name, history in self.history.items()}
+        if self.metrics is None:
+            raise RuntimeError('population history overflowed the chart ring; attach a MetricsRecorder for long runs')
+        data = self.metrics.series(('tick', 'predator', 'prey', 'plant'))
+        interval = self.chart_update_interval
+        ticks = data['tick']
+        latest = self.history['tick'].series()[-1]
+        if self.metrics.interval != interval or not len(ticks) or ticks[-1] != latest or \
+                not np.array_equal(ticks, np.arange(interval, latest + 1, interval)):
+            raise RuntimeError(
+                'population history overflowed the chart ring and the attached metrics log does not cover '
+                'every chart sample of this run'
+            )
+        data['total'] = data['predator'] + data['prey'] + data['plant']
+        return {name: data[name].tolist() for name in self.history}
+
+    def trait_series(self):
+        """已采集的性状均值序列：物种 -> 性状 -> 序列（与图表同步采样，只保留最近 HISTORY_RAW 条）"""
+        return {
+            species: {name: history.series() for name, history in histories.items()}
+            for species, histories in self.trait_history.items()
+        }
+
+    def run(self, ticks):
+        """连续推进 ticks 个模拟tick并返回种群序列
+
+        无界面模式下不绘制、不限帧，以CPU允许的最快速度运行；
+        有窗口时照常绘制并处理退出事件。
+        挂有遥测服务时每tick之前执行其命令并发布统计，暂停期间在此等待恢复。
+        采样数将超出图表环形缓冲且未挂指标记录时，本次运行临时记录到指标日志，返回完整序列。
+        """
+        ring = self.history['tick']
+        if self.metrics is None and len(ring) + ticks // self.chart_update_interval > len(ring.raw):
+            return self._run_logged(ticks)
+        self._advance(ticks)
+        return self.population_series()
+
+    def _advance(self, ticks):
+        for _ in range(ticks):
+            if not self.headless:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return
+            if self.telemetry is not None:
+                self.telemetry.service(block=True)
+            self.update()
+
+    def _run_logged(self, ticks):
+        """超出图表环形缓冲的运行：开始前的采样 + 本次运行写入临时指标日志的采样"""
+        before = self.population_series()
+        with tempfile.TemporaryDirectory(prefix='run_metrics_') as directory:
+            recorder = MetricsRecorder(self, directory, self.chart_update_interval)
+            try:
+                self._advance(ticks)
+                data = recorder.series(('tick', 'predator', 'prey', 'plant'))
+            finally:
+                recorder.close()
+        data['total'] = data['predator'] + data['prey'] + data['plant']
+        return {name: before[name] + data[name].tolist() for name in self.history}
+
+def populate(canvas, PREDATOR_COUNT, PREY_COUNT):
+    """按随机位置批量生成初始种群与植物簇（位置按列向量化抽取，个体批量创建）"""
     AREA_WIDTH = canvas.width  # 生成区域留边50px
     AREA_HEIGHT = canvas.height
-    # 生成捕食者（随机位置）
-    for _ in range(PREDATOR_COUNT):
-        x = random.randint(50, AREA_WIDTH)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas.predators.add(Predator(x, y))
-    # 生成被捕食者（随机位置） 
-    for _ in range(PREY_COUNT):
-        x = random.randint(50, AREA_HEIGHT)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas.prey.add(Prey(x, y))
+    rng = canvas.rng['spawn']
+    predator_x = rng.integers(50, AREA_WIDTH + 1, PREDATOR_COUNT)
+    predator_y = rng.integers(50, AREA_HEIGHT + 1, PREDATOR_COUNT)
+    prey_x = rng.integers(50, AREA_WIDTH + 1, PREY_COUNT)
+    prey_y = rng.integers(50, AREA_HEIGHT + 1, PREY_COUNT)
+    if canvas.world is not None:
+        # 数组引擎批量生成
+        canvas.world.add_predators(predator_x, predator_y)
+        canvas.world.add_prey(prey_x, prey_y)
+    else:
+        # 批量生成捕食者与被捕食者（画布与始祖基因组，子代繁殖时继承）
+        canvas.predators.add(*Predator.found_many(canvas, predator_x, predator_y, canvas.rng['predator']))
+        canvas.prey.add(*Prey.found_many(canvas, prey_x, prey_y, canvas.rng['prey']))
     # 生成植物簇（随机位置）
-    for _ in range(canvas.MAX_PLANTS):
-        x = random.randint(50, AREA_WIDTH)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas._spawn_plant_cluster()
-    # 主循环
+    canvas._seed_plants()
+    return canvas
+
+def startUp(PREDATOR_COUNT, PREY_COUNT, engine='sprite', headless=False, ticks=10000, seed=None, profile=None,
+            world_size=(1500, 1000), dirty=False, vegetation='sprites', mutation=MUTATION, metrics=None,
+            speed=1, telemetry=None, autosave=None, autosave_interval=AUTOSAVE_INTERVAL):
+    """启动
+
+    headless=True 时不打开窗口，运行 ticks 个tick后返回种群序列；
+    指定 seed 时整个运行可复现。
+    profile 为 True 时开启分阶段计时（窗口中按 F3 显示/隐藏统计浮层），为文件路径时同时导出（.csv 或 .jsonl）。
+    world_size 大于窗口时方向键/WASD 平移、滚轮缩放、右键拖动，Home 显示整个世界。
+    dirty=True 时只重绘个体移动经过的区域与变化的叠加层（软件显示下帧时间更短）。
+    vegetation='grid' 时植被为可再生的能量网格（见 biomass）。
+    mutation 为子代性状的突变系数（0 为不突变）。
+    metrics 为目录时每30个tick采样一次种群指标并追加写入该目录（见 metrics.MetricsRecorder）。
+    speed 为窗口模式的初始倍速（1/10/100/None 不限速），运行中按数字键 1~4 切换；
+    每个显示帧在时间预算内推进多个tick，绘制较慢时降频绘制（见 timestep.FixedTimestep），模拟结果与绘制帧数无关。
+    telemetry 为端口号时在 localhost 上开启遥测服务，推送实时统计并接受 pause/resume/snapshot/speed 命令
+    （见 telemetry，telemetry.watch(端口) 查看）。
+    autosave 为文件路径时每 autosave_interval 个tick在后台写一次存档（见 checkpoint.Autosaver，load_checkpoint 续跑）。
+    """
+    canvas = populate(
+        GameCanvas(*world_size, engine=engine, headless=headless, seed=seed, dirty=dirty,
+                   vegetation=vegetation, mutation=mutation),
+        PREDATOR_COUNT, PREY_COUNT
+    )
+    profiler = None
+    if profile:
+        profiler = Profiler(canvas, path=profile if isinstance(profile, str) else None, overlay=not headless)
+    recorder = MetricsRecorder(canvas, metrics) if metrics else None
+    server = TelemetryServer(canvas, port=telemetry) if telemetry is not None else None
+    autosaver = Autosaver(canvas, autosave, autosave_interval) if autosave else None
+    if headless:
+        series = canvas.run(ticks)
+        if profiler is not None:
+            profiler.close()
+        if recorder is not None:
+            recorder.close()
+        if server is not None:
+            server.close()
+        if autosaver is not None:
+            autosaver.close()
+        return series
+    # 主循环（固定步长：每帧推进的tick数由倍速与时间预算决定）
+    timestep = FixedTimestep(canvas, speed=speed)
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if profiler is not None:
+                    profiler.close()
+                if recorder is not None:
+                    recorder.close()
+                if server is not None:
+                    server.close()
+                if autosaver is not None:
+                    autosaver.close()
                 pygame.quit()
                 sys.exit()
-        canvas.update()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler is not None:
+                profiler.overlay = not profiler.overlay
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4: # 切换细节层次（自动/精灵/逐点/热力图）
+                options = (None, *MODES)
+                canvas.lod.force = options[(options.index(canvas.lod.force) + 1) % len(options)]
+            if event.type == pygame.WINDOWEXPOSED and canvas.dirty is not None: # 窗口被遮挡后需整屏重绘
+                canvas.dirty.invalidate()
+            canvas.camera.handle(event)
+            timestep.handle(event)
+        canvas.camera.scroll(pygame.key.get_pressed())
+        timestep.frame()
+
+class ReplayViewer:
+    """轨迹回放：从记录日志直接读取各帧，可拖动进度条定位、暂停、逐帧与变速播放
+
+    空格 暂停/播放 | ←/→ 后退/前进一帧（Shift 为100帧）| ↑/↓ 倍速加倍/减半 | Home/End 跳到首/尾帧
+    """
+    SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self, log):
+        self.log = log
+        self.width, self.height = log.width, log.height
+        self.screen = open_display((self.width, self.height))
+        pygame.display.set_caption("Survival & Evolution - Replay")
+        self.clock = pygame.time.Clock()
+        self.font = get_font(16)
+        self.bg_color = (44,64,73)
+        self.position = 0.0 # 当前帧序号（可为小数，便于慢速播放）
+        self.speed_index = self.SPEEDS.index(1)
+        self.playing = True
+        self.scrubber = pygame.Rect(20, self.height - 30, self.width - 40, 12)
+        atlas = get_atlas()
+        self.images = {KIND_PREDATOR: atlas.creature('predator'), KIND_PREY: atlas.creature('prey')}
+        self.plant_images = atlas.plants
+
+    def seek(self, position):
+        self.position = float(min(max(position, 0), len(self.log) - 1))
+
+    def _handle(self, event):
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            step = 100 if event.mod & pygame.KMOD_SHIFT else 1
+            if event.key == pygame.K_SPACE:
+                self.playing = not self.playing
+            elif event.key == pygame.K_RIGHT:
+                self.seek(int(self.position) + step)
+            elif event.key == pygame.K_LEFT:
+                self.seek(int(self.position) - step)
+            elif event.key == pygame.K_UP:
+                self.speed_index = min(self.speed_index + 1, len(self.SPEEDS) - 1)
+            elif event.key == pygame.K_DOWN:
+                self.speed_index = max(self.speed_index - 1, 0)
+            elif event.key == pygame.K_HOME:
+                self.seek(0)
+            elif event.key == pygame.K_END:
+                self.seek(len(self.log) - 1)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+            pressed = event.type == pygame.MOUSEBUTTONDOWN or event.buttons[0]
+            if pressed and self.scrubber.inflate(0, 16).collidepoint(event.pos):
+                ratio = (event.pos[0] - self.scrubber.left) / self.scrubber.width
+                self.seek(round(ratio * (len(self.log) - 1)))
+        return True
+
+    def draw(self):
+        self.screen.fill(self.bg_color)
+        frame = self.log.frame_at(int(self.position))
+        blits = []
+        for kind in (KIND_PLANT, KIND_PREY, KIND_PREDATOR):
+            part = frame[frame['kind'] == kind]
+            if kind == KIND_PLANT:
+                images = [self.plant_images[v] for v in part['variant'].tolist()]
+                half = self.plant_images[0].get_width() // 2
+            else:
+                image = self.images[kind]
+                images = [image] * len(part)
+                half = image.get_width() // 2
+            left = (part['x'] - half).astype(int).tolist()
+            top = (part['y'] - half).astype(int).tolist()
+            blits.extend(zip(images, zip(left, top)))
+        self.screen.blits(blits, doreturn=False)
+        # 进度条与状态信息
+        pygame.draw.rect(self.screen, (30,30,30), self.scrubber, border_radius=6)
+        done = self.scrubber.copy()
+        done.width = max(int(self.scrubber.width * self.position / max(len(self.log) - 1, 1)), 1)
+        pygame.draw.rect(self.screen, (104,140,200), done, border_radius=6)
+        tick = int(self.log.index[int(self.position)]['tick'])
+        status = 'Playing' if self.playing else 'Paused'
+        text = self.font.render(
+            f'Tick: {tick}  Speed: x{self.SPEEDS[self.speed_index]}  {status}  Entities: {len(frame)}',
+            True, (255,255,255))
+        self.screen.blit(text, (10, 5))
+        pygame.display.flip()
+
+    def run(self):
+        while True:
+            for event in pygame.event.get():
+                if not self._handle(event):
+                    return
+            if self.playing:
+                self.position += self.SPEEDS[self.speed_index]
+                if self.position >= len(self.log) - 1:
+                    self.log.refresh() # 记录仍在进行时继续读取新帧
+                    self.seek(self.position)
+            self.draw()
+            self.clock.tick(60)
+
+def replay(directory):
+    """回放轨迹日志（无需重新模拟）"""
+    log = TrajectoryLog(directory)
+    if not len(log):
+        print(f"Empty trajectory log: {directory}")
+        return
+    ReplayViewer(log).run()
+    pygame.quit()
 
 # 示例用法
 if __name__ == "__main__":
-    canvas = GameCanvas()
     # 配置生成参数
     PREDATOR_COUNT = 13  # 捕食者数量
     PREY_COUNT = 30      # 被捕食者数量
-    AREA_WIDTH = canvas.width - 50  # 生成区域留边50px
-    AREA_HEIGHT = canvas.height - 50
-    # 生成捕食者（随机位置）
-    for _ in range(PREDATOR_COUNT):
-        x = random.randint(50, AREA_WIDTH)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas.predators.add(Predator(x, y))
-    # 生成被捕食者（随机位置） 
-    for _ in range(PREY_COUNT):
-        x = random.randint(50, AREA_HEIGHT)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas.prey.add(Prey(x, y))
-    # 生成植物簇（随机位置）
-    for _ in range(canvas.MAX_PLANTS):
-        x = random.randint(50, AREA_WIDTH)
-        y = random.randint(50, AREA_HEIGHT)
-        canvas._spawn_plant_cluster()
+    canvas = populate(GameCanvas(), PREDATOR_COUNT, PREY_COUNT)
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
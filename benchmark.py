@@ -0,0 +1,791 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: benchmark
+Propose: Performance benchmarks for the simulation
+'''
+
+# import modules
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import pygame
+
+from chart_buffer import HistoryBuffer
+from collision import _centers, _rects, circle_contacts, rect_contacts
+from creature_def import Predator, Prey
+from genome import PREY_TRAITS, mutate, trait_bounds
+from perception import sees, senses
+from profiler import PHASES, Profiler
+from sim_random import SimRandom
+from soa_engine import ArrayWorld
+from spatial_index import SpatialGrid, grid_candidates, grid_colliders
+from vegetation import Plant
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# 默认场景密度：1500x1000 画布约容纳 1000 个生物
+BASE_AGENTS = 1000
+# 吞吐量场景：(名称, 捕食者, 被捕食者, tick数)，植物上限与被捕食者数成比例（默认 50 → 200）
+SCENARIOS = (
+    ('10/50', 10, 50, 2000),
+    ('100/1k', 100, 1000, 300),
+    ('1k/10k', 1000, 10000, 40),
+    ('5k/50k', 5000, 50000, 10),
+)
+PLANTS_PER_PREY = 4
+# 启动耗时的世界规模（生物总数，捕食者:被捕食者 = 1:10）：参数扫描会启动成千上万次短时模拟，每次都要付出这部分开销
+STARTUP_SIZES = (100, 10000, 100000)
+# 在全新解释器中执行：导入 -> 构建画布 -> 生成初始世界 -> 第一个tick，最后一行输出各阶段耗时（秒）
+_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from UI_design import GameCanvas, populate
+imported = time.perf_counter()
+import json
+from benchmark import PLANTS_PER_PREY, world_size
+predators, prey = {predators}, {prey}
+begin = time.perf_counter()
+canvas = GameCanvas(*world_size(predators + prey), engine={engine!r}, headless=True, seed={seed})
+canvas.MAX_PLANTS = prey * PLANTS_PER_PREY
+built = time.perf_counter()
+populate(canvas, predators, prey)
+populated = time.perf_counter()
+canvas.step()
+stepped = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start, 'canvas_s': built - begin, 'populate_s': populated - built,
+    'first_tick_s': stepped - populated, 'plants': len(canvas.plants),
+}}))
+"""
+
+
+def world_size(agent_count):
+    """按默认密度换算世界尺寸"""
+    scale = max(agent_count / BASE_AGENTS, 1) ** 0.5
+    return int(1500 * scale), int(1000 * scale)
+
+
+def build_world(agent_count, seed=0):
+    """按默认密度构建测试世界（捕食者:被捕食者 = 1:10，植物数与被捕食者相同）"""
+    rnd = random.Random(seed)
+    streams = SimRandom(seed)
+    width, height = world_size(agent_count)
+    predators = pygame.sprite.Group()
+    prey = pygame.sprite.Group()
+    plants = pygame.sprite.Group()
+    predator_count = max(agent_count // 11, 1)
+    for _ in range(predator_count):
+        predators.add(Predator(rnd.randint(0, width), rnd.randint(0, height), streams['predator']))
+    for _ in range(agent_count - predator_count):
+        prey.add(Prey(rnd.randint(0, width), rnd.randint(0, height), streams['prey']))
+        plants.add(Plant(rnd.randint(0, width), rnd.randint(0, height), 0, streams['plant']))
+    return predators, prey, plants
+
+
+def _perceive(predators, prey, plants, sample):
+    """执行一个tick的感知/碰撞查询（与 creature_def 中的扫描一致），返回结果用于比对"""
+    results = []
+    for predator in sample[0]:
+        results.append([
+            p for p in grid_candidates(prey, predator.rect.center, predator.sensory_distance)
+            if predator._is_in_cone(p.rect.center) and predator._is_within_distance(p.rect.center)
+        ])
+        results.append(pygame.sprite.spritecollide(
+            predator, grid_colliders(prey, predator), False, pygame.sprite.collide_circle))
+    for animal in sample[1]:
+        reach = max(animal.sensory_distance, animal.hearing_radius)
+        results.append([
+            p for p in grid_candidates(predators, animal.rect.center, reach)
+            if ((animal._is_in_cone(p.rect.center) and animal._is_within_distance(p.rect.center))
+                or animal._is_within_hearing(p.rect.center))
+        ])
+        results.append([
+            p for p in grid_candidates(plants, animal.rect.center, 45)
+            if animal._is_within_distance(p.rect.center, 45)
+        ])
+        results.append([
+            p for p in grid_colliders(plants, animal) if animal.rect.colliderect(p.rect)
+        ])
+    return results
+
+
+def bench_spatial(sizes=(1000, 10000, 50000), sample_size=200, seed=0):
+    """比较全量扫描与网格索引的每tick查询耗时
+
+    全量扫描在大规模下是 O(N²)，因此只对抽样个体计时后按个体数外推；
+    同一批抽样个体上两种方式的结果必须完全一致。
+    """
+    rows = []
+    for size in sizes:
+        predators, prey, plants = build_world(size, seed)
+        rnd = random.Random(seed)
+        pred_list, prey_list = predators.sprites(), prey.sprites()
+        sample = (
+            rnd.sample(pred_list, min(sample_size // 10 or 1, len(pred_list))),
+            rnd.sample(prey_list, min(sample_size, len(prey_list))),
+        )
+        # 全量扫描（抽样外推）
+        start = time.perf_counter()
+        brute = _perceive(predators, prey, plants, sample)
+        brute_sample = time.perf_counter() - start
+        brute_tick = brute_sample * size / (len(sample[0]) + len(sample[1]))
+        # 网格索引（含重建）
+        grids = [SpatialGrid().attach(g) for g in (predators, prey, plants)]
+        start = time.perf_counter()
+        for grid in grids:
+            grid.rebuild()
+        rebuild = time.perf_counter() - start
+        start = time.perf_counter()
+        _perceive(predators, prey, plants, (pred_list, prey_list))
+        grid_tick = rebuild + time.perf_counter() - start
+        indexed = _perceive(predators, prey, plants, sample)
+        for group in (predators, prey, plants):
+            del group.spatial_grid
+        rows.append({
+            'agents': size,
+            'brute_ms': brute_tick * 1000,
+            'grid_ms': grid_tick * 1000,
+            'rebuild_ms': rebuild * 1000,
+            'match': brute == indexed,
+        })
+    return rows
+
+
+def bench_engine(agent_count=5000, ticks=20, seed=0):
+    """比较逐对象精灵循环与 NumPy 数组引擎的每tick耗时"""
+    width, height = world_size(agent_count)
+    # 逐对象精灵引擎：同一批个体放入无界面画布，按 GameCanvas.step 推进（空间索引重建、移动、批量碰撞与繁殖）
+    from UI_design import GameCanvas
+
+    predators, prey, plants = build_world(agent_count, seed)
+    canvas = GameCanvas(width, height, headless=True, seed=seed)
+    for group, target in ((predators, canvas.predators), (prey, canvas.prey)):
+        for sprite in group:
+            sprite.found(canvas)
+        target.add(*group)
+    canvas.plants.add(*plants)
+    canvas.current_plants = len(canvas.plants)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        canvas.step()
+    sprite_tick = (time.perf_counter() - start) / ticks
+    # 数组引擎（相同初始位置）
+    predators, prey, plants = build_world(agent_count, seed)
+    world = ArrayWorld(width, height, seed=seed)
+    world.add_predators([s.rect.centerx for s in predators], [s.rect.centery for s in predators])
+    world.add_prey([s.rect.centerx for s in prey], [s.rect.centery for s in prey])
+    world.add_plants([s.rect.centerx for s in plants], [s.rect.centery for s in plants], 0)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.step()
+    array_tick = (time.perf_counter() - start) / ticks
+    return {
+        'agents': agent_count,
+        'sprite_ms': sprite_tick * 1000,
+        'numpy_ms': array_tick * 1000,
+        'speedup': sprite_tick / array_tick,
+    }
+
+
+def _peak_rss_mb():
+    """本进程的峰值常驻内存（MB），平台不支持时为 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1) # macOS 单位为字节，Linux 为KB
+
+
+def build_canvas(predator_count, prey_count, engine='sprite', seed=0, workers=0):
+    """按默认密度构建无界面画布（与 startUp 相同的初始化流程）"""
+    from UI_design import GameCanvas, populate
+
+    width, height = world_size(predator_count + prey_count)
+    canvas = GameCanvas(width, height, engine=engine, headless=True, seed=seed, workers=workers)
+    canvas.MAX_PLANTS = prey_count * PLANTS_PER_PREY
+    return populate(canvas, predator_count, prey_count)
+
+
+def run_scenario(name, engine='sprite', seed=0, ticks=None, workers=0):
+    """运行一个吞吐量场景（应在独立进程中调用，峰值内存才只属于该场景）"""
+    _, predator_count, prey_count, default_ticks = next(s for s in SCENARIOS if s[0] == name)
+    ticks = ticks or default_ticks
+    start = time.perf_counter()
+    canvas = build_canvas(predator_count, prey_count, engine, seed, workers)
+    build = time.perf_counter() - start
+    profiler = Profiler(canvas, window=ticks)
+    gc_before = [stats['collections'] for stats in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    canvas.run(ticks)
+    elapsed = time.perf_counter() - start
+    gc_after = [stats['collections'] for stats in gc.get_stats()]
+    times = profiler.times[:profiler.rows] * 1000
+    return {
+        'scenario': name,
+        'engine': engine,
+        'ticks': ticks,
+        'build_s': build,
+        'ticks_per_sec': ticks / elapsed,
+        'phase_ms': dict(zip(PHASES, times.mean(axis=0).tolist())),
+        'tick_ms_p50_p95_p99': np.percentile(times[:, -1], (50, 95, 99)).tolist(),
+        'peak_rss_mb': _peak_rss_mb(),
+        'gc_collections': [after - before for before, after in zip(gc_before, gc_after)],
+        'allocated_blocks_delta': sys.getallocatedblocks() - blocks_before,
+        'final_population': [len(canvas.predators), len(canvas.prey), len(canvas.plants)],
+        'workers': workers,
+    }
+
+
+def bench_scenarios(names=None, engines=('sprite', 'numpy'), seed=0, tick_scale=1.0, workers=0):
+    """依次在全新子进程中运行各场景（进程间互不影响峰值内存与缓存状态）"""
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    for name, _, _, ticks in SCENARIOS:
+        if names and name not in names:
+            continue
+        for engine in engines:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                row = executor.submit(
+                    run_scenario, name, engine, seed, max(int(ticks * tick_scale), 1), workers
+                ).result()
+            print(f"{name:>8} {engine:>6}: {row['ticks_per_sec']:9.1f} ticks/s, "
+                  f"p95 {row['tick_ms_p50_p95_p99'][1]:8.2f} ms, peak RSS {row['peak_rss_mb'] or 0:7.1f} MB")
+            rows.append(row)
+    return rows
+
+
+def time_to_first_tick(agent_count, engine='sprite', seed=0):
+    """在全新的无界面解释器中计时：导入、构建画布、生成初始世界、推进第一个tick（含植物，与 build_canvas 相同的密度）"""
+    predator_count = max(agent_count // 11, 1)
+    prey_count = agent_count - predator_count
+    script = _STARTUP_SCRIPT.format(predators=predator_count, prey=prey_count, engine=engine, seed=seed)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    process = time.perf_counter() - start
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    row.update({
+        'agents': agent_count, 'engine': engine, 'process_s': process,
+        'time_to_first_tick_s': row['import_s'] + row['canvas_s'] + row['populate_s'] + row['first_tick_s'],
+    })
+    return row
+
+
+def bench_startup(sizes=STARTUP_SIZES, engines=('sprite', 'numpy'), seed=0):
+    """各规模世界的启动耗时（每次一个新进程，导入缓存不共享）"""
+    rows = []
+    print(f"{'agents':>8} {'engine':>6} {'import':>8} {'canvas':>8} {'populate':>9} {'1st tick':>9} "
+          f"{'to 1st tick':>12} {'process':>8}")
+    for size in sizes:
+        for engine in engines:
+            row = time_to_first_tick(size, engine, seed)
+            print(f"{size:>8} {engine:>6} {row['import_s']:>8.3f} {row['canvas_s']:>8.3f} {row['populate_s']:>9.3f} "
+                  f"{row['first_tick_s']:>9.3f} {row['time_to_first_tick_s']:>12.3f} {row['process_s']:>8.3f}")
+            rows.append(row)
+    return rows
+
+
+def _best_ns(statement, number, repeat=5, **names):
+    """timeit 多次取最优，返回每次调用的纳秒数"""
+    return min(timeit.Timer(statement, globals=names).repeat(repeat, number)) / number * 1e9
+
+
+def bench_micro(seed=0):
+    """热点函数微基准（1000 生物的默认密度世界，结果为每次调用纳秒数）"""
+    predators, prey, plants = build_world(1000, seed)
+    for group in (predators, prey, plants):
+        SpatialGrid().attach(group).rebuild()
+    predator, animal = predators.sprites()[0], prey.sprites()[0]
+    targets = [p.rect.center for p in prey]
+    offsets = [(x - predator.rect.centerx, y - predator.rect.centery) for x, y in targets]
+    predator_list, prey_list = predators.sprites(), prey.sprites()
+    rng = SimRandom(seed)['plant']
+    history = HistoryBuffer()
+    for i in range(10000):
+        history.append(i % 97)
+    from UI_design import GameCanvas
+    canvas = GameCanvas(headless=True, seed=seed)
+    collide_circle = pygame.sprite.collide_circle
+    cases = {
+        '_is_in_cone': ('for t in targets: cone(t)', len(targets), dict(targets=targets, cone=predator._is_in_cone)),
+        '_is_within_distance': ('for t in targets: within(t)', len(targets),
+                                dict(targets=targets, within=predator._is_within_distance)),
+        'perception.sees': ('for dx, dy in offsets: sees(s, hx, hy, dx, dy)', len(offsets),
+                            dict(offsets=offsets, sees=sees, hx=predator.direction.x, hy=predator.direction.y,
+                                 s=senses(predator.fov_angle, predator.sensory_distance))),
+        'per-sprite spritecollide': (
+            'for s in hunters: spritecollide(s, grid_colliders(prey, s), False, collide_circle)', len(predator_list),
+            dict(hunters=predator_list, prey=prey, spritecollide=pygame.sprite.spritecollide,
+                 grid_colliders=grid_colliders, collide_circle=collide_circle)),
+        'per-sprite colliderect': (
+            'for s in eaters: [p for p in grid_colliders(plants, s) if s.rect.colliderect(p.rect)]', len(prey_list),
+            dict(eaters=prey_list, plants=plants, grid_colliders=grid_colliders)),
+        'collision batch/tick': (
+            'circle_contacts(*hunter_xyr, *prey_xyr); rect_contacts(prey_rects, plant_rects)', 1,
+            dict(circle_contacts=circle_contacts, rect_contacts=rect_contacts,
+                 hunter_xyr=[np.array(v, dtype=float) for v in zip(*((*s.rect.center, s.radius) for s in predator_list))],
+                 prey_xyr=[np.array(v, dtype=float) for v in zip(*((*s.rect.center, s.radius) for s in prey_list))],
+                 prey_rects=np.array([s.rect for s in prey_list]), plant_rects=np.array([p.rect for p in plants]))),
+        'Plant.__init__': ('Plant(100, 100, 0, rng)', 1, dict(Plant=Plant, rng=rng)),
+        'genome.mutate 20k': ('mutate(genomes, traits, rng, 1.0)', 1, dict(
+            mutate=mutate, genomes=np.tile(np.mean(trait_bounds(PREY_TRAITS)[:2], axis=0), (20000, 1)),
+            traits=PREY_TRAITS, rng=np.random.default_rng(seed))),
+        'draw_single_chart': ('canvas.draw_single_chart(rect, history, (104, 140, 200), "Total")', 1,
+                              dict(canvas=canvas, rect=pygame.Rect(0, 0, 230, 130), history=history)),
+    }
+    rows = []
+    for name, (statement, calls, names) in cases.items():
+        loops = max(1, 2000 // calls)
+        rows.append({'name': name, 'ns_per_call': _best_ns(statement, loops, **names) / calls})
+        print(f"{name:>22}: {rows[-1]['ns_per_call']:10.0f} ns/call")
+    return rows
+
+
+# ---------- 功能开关的开销（--feature） ----------
+def _ms_per_tick(canvas, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        canvas.step()
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def bench_metrics(engines=('sprite', 'numpy'), seed=0, predators=100, prey=1000, ticks=3000, interval=10):
+    """有无指标记录的每tick耗时（metrics.MetricsRecorder）"""
+    from metrics import MetricsRecorder
+
+    rows = []
+    for engine in engines:
+        row = {'engine': engine}
+        for recording in (False, True):
+            canvas = build_canvas(predators, prey, engine, seed)
+            with tempfile.TemporaryDirectory(prefix='bench_metrics_') as directory:
+                recorder = MetricsRecorder(canvas, directory, interval) if recording else None
+                row['with_ms' if recording else 'without_ms'] = _ms_per_tick(canvas, ticks)
+                if recorder is not None:
+                    recorder.close()
+        print(f"{engine:>6}: {row['without_ms']:.2f} ms/tick without metrics, {row['with_ms']:.2f} ms/tick with metrics")
+        rows.append(row)
+    return rows
+
+
+def bench_perception_cache(engines=('sprite', 'numpy'), seed=0, predators=200, prey=2000, ticks=600, cadence=4, margin=8.0):
+    """逐tick感知与启用感知缓存的每tick耗时，以及缓存运行中重新感知的比例与审计偏差率"""
+    from perception_cache import PerceptionCache
+
+    rows = []
+    for engine in engines:
+        row = {'engine': engine, 'cadence': cadence, 'margin': margin}
+        for cached in (False, True):
+            canvas = build_canvas(predators, prey, engine, seed)
+            cache = PerceptionCache(canvas, cadence=cadence, margin=margin) if cached else None
+            row['cached_ms' if cached else 'exact_ms'] = _ms_per_tick(canvas, ticks)
+            if cache is not None:
+                row['summary'] = cache.summary()
+        print(f"{engine:>6}: exact {row['exact_ms']:.2f} ms/tick, cached {row['cached_ms']:.2f} ms/tick "
+              f"(x{row['exact_ms'] / row['cached_ms']:.2f}); " + ', '.join(
+                  f"{species} re-sensed {s['sense_rate']:.1%}, diverged {s['divergence']:.2%}"
+                  for species, s in row['summary'].items()))
+        rows.append(row)
+    return rows
+
+
+def bench_biomass(engines=None, seed=0, sizes=(1500, 5000, 20000), ticks=20):
+    """植被网格每tick再生的耗时与内存（与植被多少无关，只与地图面积有关）"""
+    from biomass import CAPACITY, BiomassGrid
+
+    rows = []
+    for size in sizes:
+        grid = BiomassGrid(size, size)
+        grid.energy[::3, ::2] = CAPACITY / 2
+        start = time.perf_counter()
+        for _ in range(ticks):
+            grid.grow()
+        row = {'size': size, 'cells': grid.columns * grid.rows, 'mb': grid.energy.nbytes / 1e6,
+               'grow_ms': (time.perf_counter() - start) / ticks * 1000}
+        print(f"{size}x{size}: {row['cells']} cells, {row['mb']:.2f} MB, grow {row['grow_ms']:.2f} ms/tick")
+        rows.append(row)
+    return rows
+
+
+def bench_collision(engines=None, seed=0, sizes=((200, 2000), (2000, 20000))):
+    """精灵引擎一次接触查询的耗时：逐个体判定（spritecollide / colliderect）对比批量点对，两者结果必须一致"""
+    from UI_design import GameCanvas, populate
+
+    rows = []
+    for predator_count, prey_count in sizes:
+        canvas = populate(GameCanvas(headless=True, seed=seed), predator_count, prey_count)
+        canvas._rebuild_grids()
+        predators, prey, plants = canvas.predators.sprites(), canvas.prey.sprites(), canvas.plants.sprites()
+        prey_index = {q: j for j, q in enumerate(prey)}
+        plant_index = {f: j for j, f in enumerate(plants)}
+        start = time.perf_counter()
+        attack = sorted(
+            (i, prey_index[q]) for i, p in enumerate(predators)
+            for q in pygame.sprite.spritecollide(p, grid_colliders(canvas.prey, p), False, pygame.sprite.collide_circle)
+        )
+        eat = sorted(
+            (i, plant_index[f]) for i, q in enumerate(prey)
+            for f in grid_colliders(canvas.plants, q) if q.rect.colliderect(f.rect)
+        )
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        px, py = _centers(predators)
+        qx, qy = _centers(prey)
+        qi, tj = circle_contacts(px, py, np.array([p.radius for p in predators], dtype=float),
+                                 qx, qy, np.array([q.radius for q in prey], dtype=float))
+        ei, ej = rect_contacts(_rects(prey), _rects(plants))
+        batched = time.perf_counter() - start
+        row = {
+            'agents': f'{predator_count}/{prey_count}/{len(plants)}', 'contacts': len(attack) + len(eat),
+            'single_ms': single * 1000, 'batched_ms': batched * 1000,
+            'match': attack == list(zip(qi.tolist(), tj.tolist())) and eat == list(zip(ei.tolist(), ej.tolist())),
+        }
+        print(f"{row['agents']} agents, {row['contacts']} contacts: per-sprite {row['single_ms']:.2f} ms, "
+              f"batched {row['batched_ms']:.2f} ms, match {row['match']}")
+        rows.append(row)
+    return rows
+
+
+def bench_dirty_render(engines=('sprite',), seed=0, sizes=((10, 50), (30, 200), (100, 1000)), frames=300, repeat=3):
+    """整屏重绘与脏矩形绘制的每帧耗时（只计绘制，不经 clock.tick 限帧）
+
+    两种方式交替各运行 repeat 次取最快的一次（显示表面由 set_mode 全局切换，两个画布不能同时绘制）。
+    """
+    from UI_design import GameCanvas, populate
+
+    warm_up = populate(GameCanvas(seed=seed), *sizes[0]) # 进程中第一次创建的显示表面明显更慢，不计入比较
+    for _ in range(30):
+        warm_up.step()
+        warm_up.draw_frame()
+    rows = []
+    for engine in engines:
+        for predator_count, prey_count in sizes:
+            row = {'engine': engine, 'agents': f'{predator_count}/{prey_count}', 'full_ms': np.inf, 'dirty_ms': np.inf}
+            for dirty in (False, True) * repeat:
+                canvas = populate(GameCanvas(engine=engine, seed=seed, dirty=dirty), predator_count, prey_count)
+                elapsed = 0.0
+                for _ in range(frames):
+                    canvas.step()
+                    start = time.perf_counter()
+                    canvas.dirty.render() if dirty else canvas.draw_frame()
+                    elapsed += time.perf_counter() - start
+                key = 'dirty_ms' if dirty else 'full_ms'
+                row[key] = min(row[key], elapsed / frames * 1000)
+                if canvas.world is not None:
+                    canvas.world.close()
+            print(f"{engine:>6} {row['agents']:>9}: full redraw {row['full_ms']:.2f} ms/frame, "
+                  f"dirty rects {row['dirty_ms']:.2f} ms/frame (x{row['full_ms'] / row['dirty_ms']:.2f}, "
+                  f"{pygame.display.get_driver()} driver)")
+            rows.append(row)
+    return rows
+
+
+def bench_parallel(engines=None, seed=0, predators=5000, prey=45000, ticks=60, workers=2):
+    """数组引擎串行、强制多进程与自适应选择三种方式的每tick耗时（最终状态须逐位一致）"""
+    from parallel import TileExecutor, available_cpus
+    from sim_random import fingerprint
+
+    row = {'agents': f'{predators}/{prey}', 'workers': workers, 'cpus': available_cpus()}
+    prints = []
+    for label, count, adaptive in (('serial', 0, False), ('forced', workers, False), ('adaptive', workers, True)):
+        canvas = build_canvas(predators, prey, 'numpy', seed)
+        if count:
+            canvas.world.executor = TileExecutor(count, min_agents=0, adaptive=adaptive)
+        row[f'{label}_ms'] = _ms_per_tick(canvas, ticks)
+        prints.append(fingerprint(canvas))
+        canvas.world.close()
+    row['match'] = prints[1] == prints[0] == prints[2]
+    print(f"{row['agents']} agents, {ticks} ticks: serial {row['serial_ms']:.1f} ms/tick, "
+          f"{workers} workers {row['forced_ms']:.1f} ms/tick (x{row['serial_ms'] / row['forced_ms']:.2f}), "
+          f"adaptive {row['adaptive_ms']:.1f} ms/tick (x{row['serial_ms'] / row['adaptive_ms']:.2f}) "
+          f"on {row['cpus']} CPUs, match {row['match']}")
+    return [row]
+
+
+def bench_timestep(engines=('sprite', 'numpy'), seed=0, predators=10, prey=50, ticks=2000):
+    """窗口模式下逐tick绘制（run）与不限速固定步长循环（降频绘制）的tick速率"""
+    from timestep import FixedTimestep
+    from UI_design import GameCanvas, populate
+
+    rows = []
+    for engine in engines:
+        row = {'engine': engine}
+        for loop in (False, True):
+            canvas = populate(GameCanvas(engine=engine, seed=seed), predators, prey)
+            start = time.perf_counter()
+            if loop:
+                timestep = FixedTimestep(canvas, speed=None)
+                while canvas.current_tick < ticks:
+                    timestep.frame(limit=ticks - canvas.current_tick)
+                    pygame.event.pump()
+                row['frames'], row['render_every'] = timestep.frames, timestep.render_every
+            else:
+                canvas.run(ticks)
+            row['loop_tps' if loop else 'run_tps'] = ticks / (time.perf_counter() - start)
+            if canvas.world is not None:
+                canvas.world.close()
+        print(f"{engine:>6}: run {row['run_tps']:.0f} ticks/s, fixed timestep {row['loop_tps']:.0f} ticks/s "
+              f"({row['frames']} frames, draw 1/{row['render_every']})")
+        rows.append(row)
+    return rows
+
+
+# ---------- 对象池实验（未被采用，见 README“批量增删”一节；--feature pool） ----------
+class SpritePool:
+    """实验用对象池，只在 measure_pool 的子进程中安装，模拟本身不使用
+
+    安装后 Predator/Prey/Plant 的构造优先取回收的实例并在其上重新执行 __init__（随机数消耗与新建相同，结果逐位一致）；
+    死亡实例在阶段末登记，下一tick重建空间网格后才可复用（本tick的网格仍引用它们）。
+    安装会替换这些类的 __new__，且无法还原（CPython 中删除或改回 __new__ 后，带参数的构造会报错），
+    因此 install 只在子进程（measure_pool 启动）中执行，在主进程中调用直接报错。
+    """
+    def __init__(self):
+        self.free = {} # 类 -> 可复用实例列表
+        self.retired = []
+        self.created = 0 # 新建的实例数
+        self.reused = 0 # 复用的实例数
+        self._classes = ()
+
+    def _new(self, cls, *args, **kwargs):
+        free = self.free.get(cls)
+        if free:
+            self.reused += 1
+            return free.pop() # 随后由类型调用照常执行 __init__
+        self.created += 1
+        return object.__new__(cls)
+
+    def recycle(self):
+        """空间网格重建后调用：上一tick死亡的实例变为可复用"""
+        for sprite in self.retired:
+            self.free.setdefault(type(sprite), []).append(sprite)
+        self.retired.clear()
+
+    def install(self, canvas):
+        from creature_def import Predator
+        from vegetation import Plant
+
+        if multiprocessing.parent_process() is None:
+            raise RuntimeError('SpritePool.install cannot be undone; it only runs in the process started by measure_pool')
+
+        self._classes = (Predator, Plant) # Prey 继承 Predator.__new__
+        for cls in self._classes:
+            cls.__new__ = self._new
+        queue, flush = canvas.spawn_queue, canvas.spawn_queue.flush
+        rebuild = canvas._rebuild_grids
+
+        def pooled_flush():
+            self.retired.extend(queue.deaths)
+            flush()
+
+        def pooled_rebuild():
+            rebuild()
+            self.recycle()
+
+        queue.flush = pooled_flush
+        canvas._rebuild_grids = pooled_rebuild
+
+
+def measure_pool(predator_count=100, prey_count=1500, ticks=3000, seed=3, pooled=False):
+    """精灵引擎无界面长时间运行，统计每tick耗时、新建实例速率、各代垃圾回收的次数与停顿，返回结果字典
+
+    每次测量在新启动的进程中运行：垃圾回收统计不受调用方已有对象影响，对象池的安装也不会留在调用方进程中。
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_measure_pool, predator_count, prey_count, ticks, seed, pooled).result()
+
+
+def _measure_pool(predator_count, prey_count, ticks, seed, pooled):
+    from UI_design import GameCanvas, populate
+
+    canvas = populate(GameCanvas(headless=True, seed=seed), predator_count, prey_count)
+    pool = SpritePool() if pooled else None
+    pauses = {0: [], 1: [], 2: []}
+    started = [0.0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            started[0] = time.perf_counter()
+        else:
+            pauses[info['generation']].append(time.perf_counter() - started[0])
+
+    prey_range = [len(canvas.prey), len(canvas.prey)]
+    events = dict(canvas.events)
+    plants = canvas.current_plants
+    gc.collect()
+    if pool is not None:
+        pool.install(canvas)
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            canvas.update()
+            prey_range[0] = min(prey_range[0], len(canvas.prey))
+            prey_range[1] = max(prey_range[1], len(canvas.prey))
+    finally:
+        gc.callbacks.remove(on_gc)
+    elapsed = time.perf_counter() - start
+    births = sum(canvas.events[name] - events[name] for name in ('predator_births', 'prey_births'))
+    # 新生植物数 = 植物数变化 + 被吃掉的植物数
+    plant_births = len(canvas.plants) - plants + canvas.events['plant_deaths'] - events['plant_deaths']
+    return {
+        'ms_per_tick': elapsed / ticks * 1000,
+        'prey_range': prey_range,
+        'instances_per_tick': (births + plant_births) / ticks,
+        'collections': [len(pauses[g]) for g in (0, 1, 2)],
+        'gc_total_ms': sum(sum(p) for p in pauses.values()) * 1000,
+        'gc_max_ms': max((max(p) for p in pauses.values() if p), default=0) * 1000,
+        'created': pool.created if pool is not None else None,
+        'reused': pool.reused if pool is not None else None,
+        'population': (len(canvas.predators), len(canvas.prey), len(canvas.plants)),
+    }
+
+
+def bench_pool(engines=None, seed=3, predators=100, prey=1500, ticks=3000):
+    """精灵引擎有无对象池的长时间运行（各自在新启动的进程中）：每tick耗时、新建实例速率与各代垃圾回收的次数/停顿"""
+    results = {}
+    for pooled in (False, True):
+        r = results[pooled] = measure_pool(predators, prey, ticks, seed, pooled)
+        churn = f", {r['created']} created / {r['reused']} reused" if pooled else ''
+        print(f"{'pooled  ' if pooled else 'unpooled'}: {r['ms_per_tick']:.2f} ms/tick, prey {r['prey_range'][0]}~{r['prey_range'][1]}, "
+              f"{r['instances_per_tick']:.2f} new sprites/tick, gc gen0/1/2 {'/'.join(map(str, r['collections']))}, "
+              f"pause total {r['gc_total_ms']:.2f} ms, max {r['gc_max_ms']:.2f} ms{churn}")
+    same = results[False]['population'] == results[True]['population']
+    gain = results[False]['ms_per_tick'] / results[True]['ms_per_tick']
+    print(f"{'IDENTICAL' if same else 'DIFFERENT'}: final population {results[True]['population']}; pooled x{gain:.2f}")
+    return [dict(r, pooled=pooled) for pooled, r in results.items()]
+
+
+FEATURES = {
+    'biomass': bench_biomass,
+    'collision': bench_collision,
+    'dirty-render': bench_dirty_render,
+    'metrics': bench_metrics,
+    'parallel': bench_parallel,
+    'perception-cache': bench_perception_cache,
+    'pool': bench_pool,
+    'timestep': bench_timestep,
+}
+
+
+def run_suite(out_path, names=None, engines=('sprite', 'numpy'), seed=0, tick_scale=1.0, workers=0):
+    """完整基准：吞吐量场景 + 微基准，结果写入 JSON"""
+    results = {
+        'meta': {
+            'seed': seed, 'tick_scale': tick_scale, 'workers': workers, 'cpus': os.cpu_count(), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pygame': pygame.version.ver, 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'scenarios': bench_scenarios(names, engines, seed, tick_scale, workers),
+        'micro': bench_micro(seed),
+        'startup': bench_startup(engines=engines, seed=seed),
+    }
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out_path}")
+    return results
+
+
+def compare(baseline, current, threshold=0.1):
+    """对比两份结果：吞吐量下降、峰值内存、微基准耗时或启动耗时上升超过 threshold 即视为退化"""
+    regressions = []
+
+    def check(label, old, new, higher_is_better):
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = 'REGRESSION' if worse > threshold else ''
+        print(f"{label:>40}: {old:12.2f} -> {new:12.2f} ({change:+7.1%}) {flag}")
+        if flag:
+            regressions.append(label)
+
+    old_rows = {(r['scenario'], r['engine']): r for r in baseline.get('scenarios', [])}
+    for row in current.get('scenarios', []):
+        old = old_rows.get((row['scenario'], row['engine']))
+        if old is None:
+            continue
+        label = f"{row['scenario']} {row['engine']}"
+        check(f'{label} ticks/s', old['ticks_per_sec'], row['ticks_per_sec'], True)
+        check(f'{label} peak RSS MB', old['peak_rss_mb'], row['peak_rss_mb'], False)
+    old_micro = {r['name']: r for r in baseline.get('micro', [])}
+    for row in current.get('micro', []):
+        if row['name'] in old_micro:
+            check(f"{row['name']} ns/call", old_micro[row['name']]['ns_per_call'], row['ns_per_call'], False)
+    old_startup = {(r['agents'], r['engine']): r for r in baseline.get('startup', [])}
+    for row in current.get('startup', []):
+        old = old_startup.get((row['agents'], row['engine']))
+        if old is not None:
+            check(f"startup {row['agents']} {row['engine']} s", old['time_to_first_tick_s'], row['time_to_first_tick_s'], False)
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Survival & Evolution benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', action='store_true', help='compare sprite loop vs NumPy engine at 5k agents')
+    parser.add_argument('--suite', action='store_true', help='run throughput scenarios + micro-benchmarks + startup')
+    parser.add_argument('--startup', action='store_true', help='time-to-first-tick for 100 / 10k / 100k agent worlds')
+    parser.add_argument('--scenarios', nargs='+', choices=[s[0] for s in SCENARIOS], help='subset of scenarios')
+    parser.add_argument('--engines', nargs='+', choices=('sprite', 'numpy'), default=['sprite', 'numpy'])
+    parser.add_argument('--tick-scale', type=float, default=1.0, help='scale every scenario tick count')
+    parser.add_argument('--workers', type=int, default=0, help='NumPy engine worker processes (0 = serial)')
+    parser.add_argument('--out', default='benchmark_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    parser.add_argument('--feature', choices=sorted(FEATURES), help='cost of an optional feature (on vs off)')
+    args = parser.parse_args()
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding='utf-8') as f:
+            current = json.load(f)
+        raise SystemExit(1 if compare(baseline, current, args.threshold) else 0)
+    if args.suite:
+        run_suite(args.out, args.scenarios, args.engines, args.seed, args.tick_scale, args.workers)
+        return
+    if args.startup:
+        bench_startup(engines=args.engines, seed=args.seed)
+        return
+    if args.feature:
+        options = {'workers': args.workers} if args.feature == 'parallel' and args.workers else {}
+        FEATURES[args.feature](engines=args.engines, seed=args.seed, **options)
+        return
+    if args.engine:
+        row = bench_engine(seed=args.seed)
+        print(f"{row['agents']} agents: sprite {row['sprite_ms']:.1f} ms/tick, "
+              f"numpy {row['numpy_ms']:.1f} ms/tick, speedup x{row['speedup']:.1f}")
+        return
+    print(f"{'agents':>8} {'brute ms/tick':>14} {'grid ms/tick':>13} {'rebuild ms':>11} {'match':>6}")
+    for row in bench_spatial(args.sizes, seed=args.seed):
+        print(f"{row['agents']:>8} {row['brute_ms']:>14.1f} {row['grid_ms']:>13.1f} "
+              f"{row['rebuild_ms']:>11.1f} {str(row['match']):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: biomass
+Propose: Grid vegetation model: per-cell energy with logistic regrowth, cluster seeding and a cached surfarray layer
+'''
+
+# import modules
+import math
+
+import numpy as np
+import pygame
+
+CELL_SIZE = 16 # 每格世界像素数
+CAPACITY = 30.0 # 每格能量上限（与一株植物的能量相同，图表中按此折算为植物数）
+GROWTH_RATE = 0.01 # logistic 再生速率（每tick）
+EDIBLE = 0.5 * CAPACITY # 不低于此能量的格子可被觅食/进食
+RESIDUE = 0.05 * CAPACITY # 进食后格子留下的能量，logistic 从此处再生
+FORAGE_RADIUS = 45 # 觅食搜索半径（与寻找最近植物的半径相同）
+LAYER_INTERVAL = 10 # 绘制层最多每隔多少tick重新着色一次
+GRASS_COLOR = (84, 140, 82) # 满能量格子的颜色
+
+
+def forage_cells(energy, x, y, cell, edible, ox, oy, radius):
+    """批量觅食：每个个体在偏移窗口 (ox, oy)（按距离排序）中取半径内能量最高的可食格子中心
+
+    只读能量网格，返回目标坐标 tx, ty 与是否找到。
+    """
+    columns, rows = energy.shape
+    gx = np.floor_divide(x, cell).astype(np.intp)[:, None] + ox
+    gy = np.floor_divide(y, cell).astype(np.intp)[:, None] + oy
+    inside = (gx >= 0) & (gx < columns) & (gy >= 0) & (gy < rows)
+    tx, ty = (gx + 0.5) * cell, (gy + 0.5) * cell
+    d2 = (tx - x[:, None]) ** 2 + (ty - y[:, None]) ** 2
+    value = energy[np.clip(gx, 0, columns - 1), np.clip(gy, 0, rows - 1)]
+    value = np.where(inside & (d2 > 0) & (d2 <= radius * radius) & (value >= edible), value, -1)
+    best = np.argmax(value, axis=1) # 第一个最大值（偏移按距离排序）
+    index = np.arange(len(x))
+    return tx[index, best], ty[index, best], value[index, best] >= 0
+
+
+class BiomassGrid:
+    """植被能量网格
+
+    每格一个 float32 能量值，每tick按 logistic 方程整体再生（就地向量运算）；植物簇播种把格子设为满能量，
+    被捕食者进食时取走格子能量（只留 RESIDUE）。内存与每tick开销只取决于地图面积，与植被多少无关。
+    觅食改为在半径内的格子窗口中取能量最大者（同能量取较近者），不再逐株比较距离。
+    """
+    def __init__(self, width, height, cell_size=CELL_SIZE, capacity=CAPACITY, growth_rate=GROWTH_RATE):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.capacity = capacity
+        self.growth_rate = growth_rate
+        self.edible = EDIBLE * capacity / CAPACITY
+        self.residue = RESIDUE * capacity / CAPACITY
+        self.columns = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.energy = np.zeros((self.columns, self.rows), dtype=np.float32) # 按 (x, y) 索引，与 surfarray 一致
+        self.ticks = 0
+        self.revision = 0 # 播种/恢复时递增（绘制层缓存用）
+        self._factor = np.empty_like(self.energy) # grow 的复用缓冲区
+        self._windows = {}
+        self._layer = None # (版本与摄像机状态, 缩放后的 Surface, 屏幕位置)
+
+    # ---------- 演化 ----------
+    def seed(self, x, y):
+        """植物簇播种：坐标所在格子设为满能量"""
+        gx = np.clip(np.floor_divide(np.asarray(x), self.cell_size).astype(np.intp), 0, self.columns - 1)
+        gy = np.clip(np.floor_divide(np.asarray(y), self.cell_size).astype(np.intp), 0, self.rows - 1)
+        self.energy[gx, gy] = self.capacity
+        self.revision += 1
+
+    def grow(self):
+        """logistic 再生：e += r * e * (1 - e / K)"""
+        factor = self._factor
+        np.multiply(self.energy, -self.growth_rate / self.capacity, out=factor)
+        factor += 1 + self.growth_rate
+        self.energy *= factor
+        self.ticks += 1
+
+    def total(self):
+        return float(self.energy.sum(dtype=np.float64))
+
+    def plant_equivalent(self):
+        """总能量折算的植物数（图表与植物生成上限用）"""
+        return int(self.total() / self.capacity)
+
+    # ---------- 觅食/进食（单个个体，精灵引擎） ----------
+    def _window(self, radius):
+        """可能落在半径内的格子偏移，按距离排序（窗口取最大值时同能量优先较近的格子）"""
+        window = self._windows.get(radius)
+        if window is None:
+            reach = int(radius // self.cell_size) + 1
+            offsets = [
+                (ox, oy) for ox in range(-reach, reach + 1) for oy in range(-reach, reach + 1)
+                # 个体可在本格内任意位置：只保留最近可能距离不超过半径的偏移
+                if (max(abs(ox) - 0.5, 0) ** 2 + max(abs(oy) - 0.5, 0) ** 2) * self.cell_size ** 2 <= radius * radius
+            ]
+            offsets.sort(key=lambda o: (o[0] * o[0] + o[1] * o[1], o))
+            window = self._windows[radius] = (
+                offsets, np.array([o[0] for o in offsets]), np.array([o[1] for o in offsets])
+            )
+        return window
+
+    def forage_target(self, x, y, radius=FORAGE_RADIUS):
+        """半径内（不含自身所在位置）能量最高的可食格子中心，没有则为 None"""
+        cell = self.cell_size
+        energy, columns, rows = self.energy, self.columns, self.rows
+        cx, cy = int(x // cell), int(y // cell)
+        r2 = radius * radius
+        best, target = self.edible, None
+        for ox, oy in self._window(radius)[0]:
+            gx, gy = cx + ox, cy + oy
+            if not (0 <= gx < columns and 0 <= gy < rows):
+                continue
+            value = energy.item(gx, gy)
+            if value < best or (target is not None and value == best):
+                continue
+            tx, ty = (gx + 0.5) * cell, (gy + 0.5) * cell
+            d2 = (tx - x) ** 2 + (ty - y) ** 2
+            if 0 < d2 <= r2:
+                best, target = value, (tx, ty)
+        return target
+
+    def graze(self, x, y):
+        """进食所在格子：可食时取走能量（留下 RESIDUE），返回获得的能量"""
+        gx, gy = int(x // self.cell_size), int(y // self.cell_size)
+        if not (0 <= gx < self.columns and 0 <= gy < self.rows):
+            return 0.0
+        value = self.energy.item(gx, gy)
+        if value < self.edible:
+            return 0.0
+        self.energy[gx, gy] = self.residue
+        return value - self.residue
+
+    # ---------- 觅食/进食（整批，数组引擎） ----------
+    def forage_targets(self, x, y, radius=FORAGE_RADIUS):
+        """forage_target 的批量版：返回目标坐标 tx, ty 与是否找到"""
+        return forage_cells(self.energy, x, y, *self.forage_params(radius))
+
+    def forage_params(self, radius=FORAGE_RADIUS):
+        """forage_cells 除能量网格与个体位置以外的参数（数组引擎的分块意图在工作进程中调用 forage_cells）"""
+        _, ox, oy = self._window(radius)
+        return self.cell_size, self.edible, ox, oy, radius
+
+    def graze_many(self, x, y):
+        """graze 的批量版：同一格子只有顺序最靠前的个体吃到，返回每个个体获得的能量"""
+        gain = np.zeros(len(x))
+        gx = np.floor_divide(x, self.cell_size).astype(np.intp)
+        gy = np.floor_divide(y, self.cell_size).astype(np.intp)
+        inside = np.flatnonzero((gx >= 0) & (gx < self.columns) & (gy >= 0) & (gy < self.rows))
+        flat = gx[inside] * self.rows + gy[inside]
+        energy = self.energy.reshape(-1)
+        edible = energy[flat] >= self.edible
+        inside, flat = inside[edible], flat[edible]
+        flat, first = np.unique(flat, return_index=True)
+        gain[inside[first]] = energy[flat] - self.residue
+        energy[flat] = self.residue
+        return gain
+
+    # ---------- 存档 ----------
+    def get_state(self):
+        return {'energy': self.energy.copy(), 'ticks': np.array(self.ticks)}
+
+    def set_state(self, state):
+        self.energy[...] = state['energy']
+        self.ticks = int(state['ticks'])
+        self.revision += 1
+
+    # ---------- 绘制 ----------
+    def layer_version(self):
+        """绘制层内容版本（每 LAYER_INTERVAL 个tick或播种后变化）"""
+        return (self.revision, self.ticks // LAYER_INTERVAL)
+
+    def draw(self, surface, camera, bg_color):
+        """只为视口内的格子着色，缩放后缓存；版本与摄像机不变时直接 blit 缓存"""
+        key = (self.layer_version(), camera.x, camera.y, camera.zoom_index)
+        if self._layer is None or self._layer[0] != key:
+            self._layer = (key, *self._render(camera, bg_color))
+        _, image, pos = self._layer
+        if image is not None:
+            surface.blit(image, pos)
+
+    def _render(self, camera, bg_color):
+        cell = self.cell_size
+        view = camera.view_rect()
+        c0, r0 = max(view.left // cell, 0), max(view.top // cell, 0)
+        c1, r1 = min(-(-view.right // cell), self.columns), min(-(-view.bottom // cell), self.rows)
+        if c1 <= c0 or r1 <= r0:
+            return None, None
+        share = np.minimum(self.energy[c0:c1, r0:r1] * (1 / self.capacity), 1)[..., None]
+        bg = np.asarray(bg_color, dtype=np.float32)
+        rgb = (bg + (np.asarray(GRASS_COLOR, dtype=np.float32) - bg) * share).astype(np.uint8)
+        small = pygame.Surface((c1 - c0, r1 - r0))
+        pygame.surfarray.blit_array(small, rgb)
+        left, top = camera.to_screen(c0 * cell, r0 * cell)
+        right, bottom = camera.to_screen(c1 * cell, r1 * cell)
+        left, top = math.floor(left), math.floor(top)
+        size = (max(math.floor(right) - left, 1), max(math.floor(bottom) - top, 1))
+        return pygame.transform.scale(small, size), (left, top)
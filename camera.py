@@ -0,0 +1,158 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: camera
+Propose: Pannable, zoomable viewport over the world with view culling for drawing
+'''
+
+# import modules
+import math
+
+import numpy as np
+import pygame
+
+# 缩放档位（每档 √2 倍，1/64 ~ 4 倍），离散档位使缩放后的图像可以缓存
+ZOOM_LEVELS = tuple(2 ** (k / 2) for k in range(-12, 5))
+PAN_SPEED = 12 # 方向键平移速度（屏幕像素/帧）
+
+
+class Camera:
+    """视口摄像机：世界坐标与屏幕坐标互换，只绘制视口内的个体
+
+    屏幕坐标 = (世界坐标 - 视口左上角) * 缩放；缩放为 1 且视口在原点时与直接按世界坐标绘制完全相同。
+    方向键/WASD 平移，鼠标滚轮以光标为中心缩放，右键或中键拖动平移，Home 显示整个世界。
+    """
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.zoom_index = ZOOM_LEVELS.index(1)
+        self.x = self.y = 0.0 # 视口左上角的世界坐标
+        self._scaled = {} # 原图像 -> 当前缩放下的图像
+        self.clamp()
+
+    @property
+    def zoom(self):
+        return ZOOM_LEVELS[self.zoom_index]
+
+    # ---------- 坐标 ----------
+    def view_rect(self, margin=0):
+        """视口覆盖的世界矩形（外扩 margin 个世界像素）"""
+        x0, y0 = math.floor(self.x - margin), math.floor(self.y - margin)
+        x1 = math.ceil(self.x + self.view_width / self.zoom + margin)
+        y1 = math.ceil(self.y + self.view_height / self.zoom + margin)
+        return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+    def to_screen(self, x, y):
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+
+    def to_world(self, sx, sy):
+        return sx / self.zoom + self.x, sy / self.zoom + self.y
+
+    def world_on_screen(self):
+        """世界边界在屏幕上的矩形"""
+        left, top = self.to_screen(0, 0)
+        return pygame.Rect(
+            math.floor(left), math.floor(top),
+            math.ceil(self.world_width * self.zoom), math.ceil(self.world_height * self.zoom)
+        )
+
+    # ---------- 平移/缩放 ----------
+    def clamp(self):
+        """视口不超出世界；世界比视口小时居中"""
+        for axis, view, world in (('x', self.view_width, self.world_width), ('y', self.view_height, self.world_height)):
+            span = view / self.zoom
+            value = getattr(self, axis)
+            value = (world - span) / 2 if span >= world else min(max(value, 0), world - span)
+            setattr(self, axis, value)
+
+    def pan(self, dx, dy):
+        """按屏幕像素平移"""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+
+    def zoom_to(self, index, anchor=None):
+        """切换缩放档位，anchor（屏幕坐标）下的世界点保持不动"""
+        index = min(max(index, 0), len(ZOOM_LEVELS) - 1)
+        if index == self.zoom_index:
+            return
+        ax, ay = anchor if anchor is not None else (self.view_width / 2, self.view_height / 2)
+        wx, wy = self.to_world(ax, ay)
+        self.zoom_index = index
+        self.x, self.y = wx - ax / self.zoom, wy - ay / self.zoom
+        self._scaled.clear()
+        self.clamp()
+
+    def fit(self):
+        """显示整个世界"""
+        scale = min(self.view_width / self.world_width, self.view_height / self.world_height, 1)
+        index = max((i for i, z in enumerate(ZOOM_LEVELS) if z <= scale), default=0)
+        self.zoom_to(index)
+        self.clamp()
+
+    def handle(self, event):
+        """处理输入事件，返回是否已处理"""
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_to(self.zoom_index + (1 if event.y > 0 else -1), pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            self.pan(-event.rel[0], -event.rel[1])
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+            self.fit()
+        else:
+            return False
+        return True
+
+    def scroll(self, keys):
+        """按住方向键/WASD 时持续平移（每帧调用，keys 为 pygame.key.get_pressed()）"""
+        dx = (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])
+        dy = (keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])
+        if dx or dy:
+            self.pan(dx * PAN_SPEED, dy * PAN_SPEED)
+
+    # ---------- 绘制 ----------
+    def image(self, image):
+        """当前缩放下的图像（缓存，换档时清空）"""
+        if self.zoom == 1:
+            return image
+        scaled = self._scaled.get(image)
+        if scaled is None:
+            w, h = image.get_size()
+            size = (max(1, round(w * self.zoom)), max(1, round(h * self.zoom)))
+            scaled = self._scaled[image] = pygame.transform.scale(image, size)
+        return scaled
+
+    def sprite_blits(self, sprites):
+        """精灵的 (图像, 屏幕位置) 列表（调用方已按视口裁剪）"""
+        ox, oy, zoom = self.x, self.y, self.zoom
+        blits = []
+        for sprite in sprites:
+            image = self.image(sprite.image)
+            cx, cy = sprite.rect.center
+            blits.append((
+                image,
+                (math.floor((cx - ox) * zoom) - image.get_width() // 2, math.floor((cy - oy) * zoom) - image.get_height() // 2)
+            ))
+        return blits
+
+    def point_blits(self, x, y, images, variants=None):
+        """中心坐标数组的 (图像, 屏幕位置) 列表（先按视口向量化裁剪，只为可见个体生成）"""
+        half = max(max(image.get_size()) for image in images)
+        view = self.view_rect(half)
+        idx = np.flatnonzero((x >= view.left) & (x < view.right) & (y >= view.top) & (y < view.bottom))
+        scaled = [self.image(image) for image in images]
+        left = np.floor((x[idx] - self.x) * self.zoom).astype(int)
+        top = np.floor((y[idx] - self.y) * self.zoom).astype(int)
+        if variants is None:
+            image = scaled[0]
+            left, top = (left - image.get_width() // 2).tolist(), (top - image.get_height() // 2).tolist()
+            return [(image, pos) for pos in zip(left, top)]
+        chosen = [scaled[v] for v in variants[idx].tolist()]
+        return [
+            (image, (l - image.get_width() // 2, t - image.get_height() // 2))
+            for image, l, t in zip(chosen, left.tolist(), top.tolist())
+        ]
@@ -0,0 +1,130 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: chart_buffer
+Propose: Fixed-size, multi-resolution history buffers for the population charts
+'''
+
+# import modules
+import numpy as np
+
+RAW_CAPACITY = 4096 # 原始采样环形缓冲保留条数（约12万tick@30tick采样）
+LEVEL_CAPACITY = 512 # 每级降采样保留的块数（亦即图表最多绘制的点数）
+LEVELS = 24 # 第k级每块包含 2^k 个采样，最粗一级可覆盖 512*2^23 个采样
+
+
+def _empty(dtype):
+    """未满块的最小/最大值初值"""
+    info = np.iinfo(dtype) if np.issubdtype(dtype, np.integer) else None
+    return (info.max, info.min) if info is not None else (np.inf, -np.inf)
+
+
+class HistoryBuffer:
+    """定长历史序列（默认整数，dtype=float 用于性状均值等小数序列）：原始采样环形缓冲 + 逐级二倍降采样的 (最小, 最大, 总和) 块
+
+    每级各自累计当前未满的块，写入一个采样只做常数次数组运算；
+    内存与运行时长无关，任意时长的历史都能以不超过 LEVEL_CAPACITY 个块完整概括，
+    且每块保留最小/最大值，尖峰与灭绝（0）不会被平均掉。
+    series 只返回环形缓冲中保留的最近 raw_capacity 条原始采样（从不返回降采样块）；
+    更长的全分辨率序列由指标日志提供（见 GameCanvas.population_series 与 metrics.MetricsRecorder）。
+    """
+    def __init__(self, raw_capacity=RAW_CAPACITY, level_capacity=LEVEL_CAPACITY, levels=LEVELS, dtype=np.int64):
+        self.raw = np.zeros(raw_capacity, dtype=dtype)
+        self.lo = np.zeros((levels, level_capacity), dtype=dtype)
+        self.hi = np.zeros((levels, level_capacity), dtype=dtype)
+        self.sum = np.zeros((levels, level_capacity), dtype=dtype)
+        self._empty_lo, self._empty_hi = _empty(self.raw.dtype)
+        self.block_sizes = 2 ** np.arange(levels)
+        self.blocks = np.zeros(levels, dtype=np.int64) # 各级已完成的块数
+        # 各级当前未满块的累计值
+        self.acc_lo = np.full(levels, self._empty_lo, dtype=dtype)
+        self.acc_hi = np.full(levels, self._empty_hi, dtype=dtype)
+        self.acc_sum = np.zeros(levels, dtype=dtype)
+        self.acc_n = np.zeros(levels, dtype=np.int64)
+        self.count = 0
+        self.min = self._empty_lo # 全部历史的最小/最大值（增量维护）
+        self.max = self._empty_hi
+        self.last = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.raw[self.count % len(self.raw)] = value
+        self.count += 1
+        self.last = value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        np.minimum(self.acc_lo, value, out=self.acc_lo)
+        np.maximum(self.acc_hi, value, out=self.acc_hi)
+        self.acc_sum += value
+        self.acc_n += 1
+        full = np.flatnonzero(self.acc_n == self.block_sizes)
+        if len(full):
+            slots = self.blocks[full] % self.lo.shape[1]
+            self.lo[full, slots] = self.acc_lo[full]
+            self.hi[full, slots] = self.acc_hi[full]
+            self.sum[full, slots] = self.acc_sum[full]
+            self.blocks[full] += 1
+            self.acc_lo[full] = self._empty_lo
+            self.acc_hi[full] = self._empty_hi
+            self.acc_sum[full] = 0
+            self.acc_n[full] = 0
+
+    def _level(self, max_points):
+        """能以不超过 max_points 个块覆盖全部历史的最细一级"""
+        needed = -(-self.count // self.block_sizes) # 各级覆盖全部历史所需块数（含未满块）
+        fits = np.flatnonzero(needed <= min(max_points, self.lo.shape[1]))
+        return int(fits[0]) if len(fits) else len(self.block_sizes) - 1
+
+    def _blocks(self, level):
+        """第 level 级全部块（含未满块）的 (最小, 最大, 总和, 采样数)，按时间顺序"""
+        capacity = self.lo.shape[1]
+        done = int(min(self.blocks[level], capacity))
+        order = (np.arange(int(self.blocks[level]) - done, int(self.blocks[level])) % capacity)
+        lo, hi, total = self.lo[level, order], self.hi[level, order], self.sum[level, order]
+        n = np.full(done, self.block_sizes[level])
+        if self.acc_n[level]:
+            lo = np.append(lo, self.acc_lo[level])
+            hi = np.append(hi, self.acc_hi[level])
+            total = np.append(total, self.acc_sum[level])
+            n = np.append(n, self.acc_n[level])
+        return lo, hi, total, n
+
+    def envelope(self, max_points=LEVEL_CAPACITY):
+        """覆盖全部历史的最小/最大包络（不超过 max_points 个点），用于绘图"""
+        if self.count <= min(max_points, len(self.raw)):
+            values = self.raw[:self.count]
+            return values, values
+        lo, hi, _, _ = self._blocks(self._level(max_points))
+        return lo, hi
+
+    @property
+    def complete(self):
+        """环形缓冲是否仍保留全部采样"""
+        return self.count <= len(self.raw)
+
+    def series(self):
+        """环形缓冲中保留的原始采样（按时间顺序）：未写满时为全部采样，之后为最近 raw_capacity 条"""
+        if self.complete:
+            return self.raw[:self.count].tolist()
+        start = self.count % len(self.raw)
+        return np.concatenate([self.raw[start:], self.raw[:start]]).tolist()
+
+    def get_state(self):
+        """缓冲内容（供存档）"""
+        state = {name: getattr(self, name) for name in ('lo', 'hi', 'sum', 'blocks', 'acc_lo', 'acc_hi', 'acc_sum', 'acc_n')}
+        return {
+            **state, 'raw': self.raw,
+            'scalars': np.array([self.count, self.min, self.max, self.last], dtype=self.raw.dtype)
+        }
+
+    def set_state(self, state):
+        for name, value in state.items():
+            if name != 'scalars':
+                getattr(self, name)[...] = value
+        self.count, self.min, self.max, self.last = state['scalars'].tolist()
+        self.count = int(self.count)
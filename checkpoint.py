@@ -0,0 +1,295 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: checkpoint
+Propose: Save and restore the full world state as a compact .npz checkpoint
+'''
+
+# import modules
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import operator
+import os
+import threading
+import traceback
+
+import numpy as np
+import pygame
+
+from creature_def import Predator, Prey
+from soa_engine import BOOL_FIELDS, FLOAT_FIELDS
+from vegetation import Plant
+
+CHECKPOINT_VERSION = 7 # 2: 图表历史改为 HistoryBuffer 状态；3: 植被网格与簇计数；4: 基因组与性状均值历史；5: 历史缓冲保存全部原始采样；6: 累计事件计数；7: 历史缓冲恢复为定长环形缓冲
+CANVAS_FIELDS = (
+    'width', 'height', 'engine', 'current_tick', 'last_plant_spawn', 'plant_spawn_interval',
+    'last_chart_update', 'chart_update_interval', 'MAX_PLANTS', 'current_plants', 'vegetation', 'plant_clusters',
+    'mutation',
+)
+PLANT_FIELDS = ('x', 'y', 'energy', 'cluster_id')
+AUTOSAVE_INTERVAL = 36000 # 默认自动存档间隔（tick，1倍速下约10分钟）
+# 由 rect/direction 派生的列（其余列与精灵属性同名）
+SPRITE_COLUMNS = ('x', 'y', 'dx', 'dy')
+SPRITE_ATTRS = dict(zip(SPRITE_COLUMNS, ('rect.centerx', 'rect.centery', 'direction.x', 'direction.y')))
+
+
+def _columns(sprites, attrs, dtype=float):
+    """按属性路径一次遍历取出 (个体数, 列数) 的数组
+
+    attrgetter 逐个体取出一行，fromiter 直接展开写入数组，不构造中间的行列表（开销随个体数线性增长）。
+    """
+    sprites = list(sprites)
+    getter = operator.attrgetter(*attrs)
+    rows = map(getter, sprites) if len(attrs) > 1 else ((value,) for value in map(getter, sprites))
+    table = np.fromiter(itertools.chain.from_iterable(rows), dtype=dtype, count=len(sprites) * len(attrs))
+    return table.reshape(len(sprites), len(attrs))
+
+
+def _sprite_columns(creatures, fields):
+    """一次遍历取出所有列（rect/direction 派生的列按属性路径取值）"""
+    table = _columns(creatures, [SPRITE_ATTRS.get(name, name) for name in fields])
+    return {name: table[:, i] for i, name in enumerate(fields)}
+
+
+def capture_state(canvas):
+    """把画布状态拷贝为若干 NumPy 数组（主线程调用，之后可在后台写盘）"""
+    meta = {name: getattr(canvas, name) for name in CANVAS_FIELDS}
+    meta.update(
+        version=CHECKPOINT_VERSION, seed=canvas.rng.seed, rng_state=canvas.rng.get_state(), events=dict(canvas.events)
+    )
+    arrays = {
+        f'chart_{name}_{field}': value.copy()
+        for name, history in canvas.history.items() for field, value in history.get_state().items()
+    }
+    arrays.update({
+        f'trait.{species}.{name}.{field}': value.copy()
+        for species, histories in canvas.trait_history.items()
+        for name, history in histories.items() for field, value in history.get_state().items()
+    })
+    if canvas.biomass is not None:
+        arrays.update({f'biomass_{name}': value for name, value in canvas.biomass.get_state().items()})
+    if canvas.world is not None:
+        world = canvas.world
+        meta['world_tick'] = world.tick
+        for species, store in (('predator', world.predators), ('prey', world.prey)):
+            for name in (*FLOAT_FIELDS, *BOOL_FIELDS, 'genome'):
+                arrays[f'{species}_{name}'] = getattr(store, name).copy()
+            meta[f'{species}_params'] = {k: v for k, v in store.params.items() if k != 'image'}
+        for name in (*PLANT_FIELDS, 'variant'):
+            arrays[f'plant_{name}'] = getattr(world.plants, name).copy()
+    else:
+        for species, group in (('predator', canvas.predators), ('prey', canvas.prey)):
+            cls = Predator if species == 'predator' else Prey
+            fields = [*FLOAT_FIELDS, *BOOL_FIELDS[:2], *cls.TUNABLE]
+            if species == 'prey':
+                fields.append('is_fleeing')
+            for name, column in _sprite_columns(group, fields).items():
+                arrays[f'{species}_{name}'] = column
+            # 基因组库原样保存，个体按精灵组顺序记录行号
+            arrays.update({f'genome_{species}_{k}': v for k, v in canvas.genomes[species].get_state().items()})
+            arrays[f'genome_{species}_rows'] = _columns(group, ('genome',), np.int64)[:, 0]
+        plants = canvas.plants.sprites()
+        table = _columns(plants, ('rect.centerx', 'rect.centery', 'energy', 'cluster_id'))
+        for i, name in enumerate(PLANT_FIELDS):
+            arrays[f'plant_{name}'] = table[:, i]
+        arrays['plant_cluster_id'] = arrays['plant_cluster_id'].astype(np.int64)
+        arrays['plant_shape'] = np.fromiter(
+            itertools.chain.from_iterable(map(operator.attrgetter('shape'), plants)), dtype=float, count=4 * len(plants)
+        ).reshape(len(plants), 4)
+    arrays['meta'] = np.array(json.dumps(meta))
+    return arrays
+
+
+def write_state(arrays, path):
+    """写入 .npz（不压缩以保证速度；先写临时文件再替换，中途崩溃不会损坏旧存档）"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(canvas, path):
+    """保存存档"""
+    write_state(capture_state(canvas), path)
+
+
+def load_checkpoint(path, headless=True):
+    """读取存档并重建 GameCanvas（随机数流状态最后恢复，续跑结果与未中断时一致）"""
+    from UI_design import GameCanvas
+
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays['meta']))
+    if meta['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {meta['version']}")
+    canvas = GameCanvas(
+        meta['width'], meta['height'], engine=meta['engine'], headless=headless, seed=meta['seed'],
+        vegetation=meta['vegetation'], mutation=meta['mutation']
+    )
+    for name in CANVAS_FIELDS:
+        setattr(canvas, name, meta[name])
+    canvas.events.update(meta['events']) # 就地更新：出生/死亡队列与数组引擎持有同一个字典
+    for name, history in canvas.history.items():
+        prefix = f'chart_{name}_'
+        history.set_state({key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)})
+    for species, histories in canvas.trait_history.items():
+        for name, history in histories.items():
+            prefix = f'trait.{species}.{name}.'
+            history.set_state({key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)})
+    if canvas.biomass is not None:
+        canvas.biomass.set_state({key[len('biomass_'):]: value for key, value in arrays.items() if key.startswith('biomass_')})
+    if canvas.world is not None:
+        world = canvas.world
+        world.tick = meta['world_tick']
+        for species, store in (('predator', world.predators), ('prey', world.prey)):
+            store.params.update(meta[f'{species}_params'])
+            count = len(arrays[f'{species}_x'])
+            store._reserve(count)
+            store.n = count
+            for name in (*FLOAT_FIELDS, *BOOL_FIELDS, 'genome'):
+                getattr(store, name)[:] = arrays[f'{species}_{name}']
+        count = len(arrays['plant_x'])
+        world.plants._reserve(count)
+        world.plants.n = count
+        for name in (*PLANT_FIELDS, 'variant'):
+            getattr(world.plants, name)[:] = arrays[f'plant_{name}']
+    else:
+        _restore_sprites(canvas, arrays)
+    canvas.rng.set_state(meta['rng_state'])
+    return canvas
+
+
+def _restore_sprites(canvas, arrays):
+    """按存档列重建精灵
+
+    不逐个调用构造函数（每次都会新建 Surface 并抽取随机数），
+    而是复制一个模板个体的属性字典，只替换存档中的列，共享模板的图像。
+    """
+    Vector2 = pygame.math.Vector2
+    for species, cls, group in (('predator', Predator, canvas.predators), ('prey', Prey, canvas.prey)):
+        prefix = f'{species}_'
+        columns = {
+            key[len(prefix):]: (arrays[key].astype(bool) if key.startswith(prefix + 'is_') else arrays[key]).tolist()
+            for key in arrays if key.startswith(prefix)
+        }
+        bank = canvas.genomes[species]
+        bank.set_state({k: arrays[f'genome_{species}_{k}'] for k in ('values', 'alive', 'free', 'defaults')})
+        template = cls(0, 0, canvas.rng[species])
+        base = {k: v for k, v in template.__dict__.items() if not k.startswith('_Sprite')}
+        base['canvas'] = canvas
+        size = template.rect.size
+        names = [n for n in columns if n not in SPRITE_COLUMNS]
+        rows = zip(columns['x'], columns['y'], columns['dx'], columns['dy'], zip(*(columns[n] for n in names)))
+        creatures = []
+        for (x, y, dx, dy, values), genome in zip(rows, arrays[f'genome_{species}_rows'].tolist()):
+            creature = cls.__new__(cls)
+            pygame.sprite.Sprite.__init__(creature)
+            state = creature.__dict__
+            state.update(base)
+            state.update(zip(names, values))
+            rect = pygame.Rect((0, 0), size)
+            rect.center = (x, y)
+            state['rect'] = rect
+            state['direction'] = Vector2(dx, dy)
+            state['genome'] = genome # 性状属性已在存档列中，不重新表达
+            creatures.append(creature)
+        group.add(*creatures)
+    shapes = arrays['plant_shape'].tolist()
+    plant_rng = canvas.rng['plant']
+    group = []
+    for x, y, energy, cluster_id, shape in zip(
+        arrays['plant_x'].tolist(), arrays['plant_y'].tolist(),
+        arrays['plant_energy'].tolist(), arrays['plant_cluster_id'].tolist(), shapes
+    ):
+        sides, radius, angle_offset, color_index = shape
+        plant = Plant(x, y, cluster_id, plant_rng, (int(sides), int(radius), angle_offset, int(color_index)))
+        plant.energy = energy
+        group.append(plant)
+    canvas.plants.add(*group)
+
+
+class Autosaver:
+    """定期自动存档；上一次未写完时跳过本次
+
+    只有模拟线程一个线程时（未开启遥测、指标记录、并行进程池等后台线程），在支持 os.fork 的平台上每次存档 fork 一个子进程：
+    子进程得到整个世界写时复制的快照，在其中拷贝状态并写盘后直接退出，模拟线程只付出 fork 本身
+    （10万个体时约 2~4 ms，在模拟线程上拷贝精灵状态约 170 ms）；代价是子进程写盘期间被模拟改写的内存页会复制一份。
+    有其他线程时 fork 出的子进程可能继承被那些线程持有的锁而死锁，因此改为在模拟线程上拷贝状态数组、后台线程写盘；
+    不支持 fork 的平台与 fork=False 同样如此。fork=True 时有其他线程则报错。
+    """
+    def __init__(self, canvas, path, interval=AUTOSAVE_INTERVAL, fork=None):
+        self.canvas = canvas
+        self.path = path
+        self.interval = interval # 存档间隔（tick）
+        if fork and not hasattr(os, 'fork'):
+            raise ValueError('os.fork is not available on this platform')
+        self.fork = hasattr(os, 'fork') if fork is None else fork
+        self.require_fork = bool(fork)
+        self.executor = None # 后台写盘线程（第一次不 fork 的存档时创建）
+        self.pending = None # 进行中的写盘：子进程号或 Future
+        self.failures = 0 # 写盘失败的次数（子进程的错误信息输出到 stderr）
+        canvas.autosaver = self
+
+    def _busy(self):
+        """上一次存档是否仍在写盘（子进程已结束时回收并记录结果）"""
+        if self.pending is None:
+            return False
+        if not isinstance(self.pending, int):
+            if not self.pending.done():
+                return True
+            self.failures += self.pending.exception() is not None
+            self.pending = None
+            return False
+        pid, status = os.waitpid(self.pending, os.WNOHANG)
+        if pid == 0:
+            return True
+        self._reap(status)
+        return False
+
+    def _reap(self, status):
+        if not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+            self.failures += 1
+        self.pending = None
+
+    def _can_fork(self):
+        """本次存档是否 fork：需要平台支持且进程中没有其他线程"""
+        if not self.fork:
+            return False
+        if threading.active_count() == 1:
+            return True
+        if self.require_fork:
+            raise RuntimeError('fork autosave needs a single-threaded process (telemetry, metrics or workers are running)')
+        return False
+
+    def maybe_save(self):
+        if self.canvas.current_tick % self.interval or self._busy():
+            return
+        if not self._can_fork():
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=1)
+            self.pending = self.executor.submit(write_state, capture_state(self.canvas), self.path)
+            return
+        pid = os.fork()
+        if pid == 0:
+            # 子进程：只拷贝与写盘，用 os._exit 退出，不运行父进程的退出处理（窗口等不属于子进程）
+            code = 1
+            try:
+                write_state(capture_state(self.canvas), self.path)
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        self.pending = pid
+
+    def close(self):
+        """等待最后一次写盘完成"""
+        if isinstance(self.pending, int):
+            self._reap(os.waitpid(self.pending, 0)[1])
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self._busy()
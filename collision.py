@@ -0,0 +1,161 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: collision
+Propose: Batched collision stage for the sprite engine: all attack / foraging contacts per tick, bulk resolution
+'''
+
+# import modules
+import itertools
+
+import numpy as np
+
+from biomass import BiomassGrid
+from spatial_index import grid_colliders, grid_knockback, grid_pairs
+
+REPEL_DISTANCE = 2 # 击退距离
+BITE_DAMAGE = 15 # 每次接触猎物扣除的能量
+BITE_GAIN = 7 # 每次接触捕食者获得的能量
+
+
+def circle_contacts(ax, ay, ar, bx, by, br):
+    """圆形碰撞点对：网格分桶（grid_pairs）找候选，再按各自半径之和精确过滤（同 pygame.sprite.collide_circle）
+
+    返回按 (a 下标, b 下标) 排序的两个下标数组。
+    """
+    if not len(ax) or not len(bx):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    ai, bj = grid_pairs(ax, ay, bx, by, ar + br.max())
+    ddx, ddy = bx[bj] - ax[ai], by[bj] - ay[ai]
+    reach = ar[ai] + br[bj]
+    touch = ddx * ddx + ddy * ddy <= reach * reach
+    return ai[touch], bj[touch]
+
+
+def rect_contacts(a, b):
+    """矩形重叠点对（同 pygame.Rect.colliderect）：a、b 为 (n, 4) 的 left/top/width/height 数组
+
+    按中心点网格分桶（查询半径取两组最大半对角线之和），返回按 (a 下标, b 下标) 排序的下标数组。
+    """
+    if not len(a) or not len(b):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    a, b = a.astype(float), b.astype(float)
+    reach = np.hypot(a[:, 2], a[:, 3]).max() / 2 + np.hypot(b[:, 2], b[:, 3]).max() / 2
+    ai, bj = grid_pairs(a[:, 0] + a[:, 2] / 2, a[:, 1] + a[:, 3] / 2, b[:, 0] + b[:, 2] / 2, b[:, 1] + b[:, 3] / 2, reach)
+    pa, pb = a[ai], b[bj]
+    touch = (
+        (pa[:, 0] < pb[:, 0] + pb[:, 2]) & (pb[:, 0] < pa[:, 0] + pa[:, 2]) &
+        (pa[:, 1] < pb[:, 1] + pb[:, 3]) & (pb[:, 1] < pa[:, 1] + pa[:, 3])
+    )
+    return ai[touch], bj[touch]
+
+
+def _centers(sprites):
+    centers = np.array([s.rect.center for s in sprites], dtype=float).reshape(-1, 2)
+    return centers[:, 0], centers[:, 1]
+
+
+def _rects(sprites):
+    """(n, 4) 的 left/top/width/height 数组（fromiter 逐个展开 Rect，比 np.array(Rect 列表) 快数倍）"""
+    rects = np.fromiter(itertools.chain.from_iterable(s.rect for s in sprites), dtype=np.int64, count=4 * len(sprites))
+    return rects.reshape(-1, 4)
+
+
+def resolve_attacks(canvas):
+    """攻击：一次找出全部捕食者-猎物接触点对，击退、伤害、能量转移与捕杀同时结算（与数组引擎 _attack 相同）
+
+    结果与个体更新顺序无关：同一猎物被多个捕食者接触时伤害累加，能量降到0时全部接触者进入捕猎冷却。
+    返回接触点对数。
+    """
+    predators = [p for p in canvas.predators if not p.dead]
+    prey = [q for q in canvas.prey if not q.dead]
+    px, py = _centers(predators)
+    qx, qy = _centers(prey)
+    pr = np.array([p.radius for p in predators], dtype=float)
+    qr = np.array([q.radius for q in prey], dtype=float)
+    qi, tj = circle_contacts(px, py, pr, qx, qy, qr)
+    if not len(qi):
+        return 0
+    ddx, ddy = qx[tj] - px[qi], qy[tj] - py[qi]
+    overlap = np.flatnonzero((ddx == 0) & (ddy == 0))
+    if len(overlap):
+        ddx[overlap], ddy[overlap] = canvas.rng['predator'].uniform(-1, 1, (2, len(overlap)))
+    length = np.hypot(ddx, ddy)
+    ux, uy = ddx / length, ddy / length
+    # 位移按个体累加后一次写回矩形
+    hits = np.bincount(qi, minlength=len(predators))
+    bitten = np.bincount(tj, minlength=len(prey))
+    push_px = np.bincount(qi, ux, len(predators)) * -REPEL_DISTANCE
+    push_py = np.bincount(qi, uy, len(predators)) * -REPEL_DISTANCE
+    push_qx = np.bincount(tj, ux, len(prey)) * REPEL_DISTANCE
+    push_qy = np.bincount(tj, uy, len(prey)) * REPEL_DISTANCE
+    grid_knockback(canvas.predators, np.hypot(push_px, push_py).max() + 1) # 取整最多再偏1像素
+    grid_knockback(canvas.prey, np.hypot(push_qx, push_qy).max() + 1)
+    for i in np.flatnonzero(hits).tolist():
+        predator, n = predators[i], int(hits[i])
+        predator.rect.center = (round(px[i] + push_px[i]), round(py[i] + push_py[i]))
+        predator.speed = max(1.5, predator.speed - 0.3 * n) # 捕食者速度减缓
+        predator.energy = min(predator.energy + BITE_GAIN * n, 100)
+    killed = np.zeros(len(prey), dtype=bool)
+    for j in np.flatnonzero(bitten).tolist():
+        victim = prey[j]
+        victim.rect.center = (round(qx[j] + push_qx[j]), round(qy[j] + push_qy[j]))
+        victim.energy -= BITE_DAMAGE * int(bitten[j])
+        if victim.energy <= 0:
+            killed[j] = True
+            victim.kill()
+    kills = int(np.count_nonzero(killed))
+    if kills:
+        canvas.events['kills'] += kills
+        for i in np.unique(qi[killed[tj]]).tolist():
+            predator = predators[i]
+            predator.hunt_cooldown = predator.HUNT_COOLDOWN # 成功捕猎冷却
+            predator.is_chasing = False
+            predator.speed = max(1.5, predator.speed - 0.1)
+    return len(qi)
+
+
+def resolve_grazing(canvas, plant_group):
+    """进食：一次找出全部被捕食者-植物接触（植被网格时为所在格子），批量结算
+
+    每株植物只被组内顺序最靠前的接触者吃掉；个体获得所吃到的第一株植物（按植物顺序）的能量，每株恢复15点耐力。
+    被吃植物登记到死亡队列，本阶段末统一移出（植物数在tick末重新统计）。返回进食接触数。
+    """
+    prey = [q for q in canvas.prey if not q.dead]
+    if not prey:
+        return 0
+    if isinstance(plant_group, BiomassGrid):
+        x, y = _centers(prey)
+        gain = plant_group.graze_many(x, y)
+        eaters = np.flatnonzero(gain > 0)
+        for j, energy in zip(eaters.tolist(), gain[eaters].tolist()):
+            animal = prey[j]
+            animal.energy = min(animal.energy + energy, animal.max_energy)
+            animal.stamina = min(animal.stamina + 15, 100)
+        return len(eaters)
+    plants = [p for p in plant_group if not p.dead]
+    if not plants:
+        return 0
+    qi, tj = rect_contacts(_rects(prey), _rects(plants))
+    if not len(qi):
+        return 0
+    # 每株植物的第一个接触者
+    order = np.lexsort((qi, tj))
+    eaten, first = np.unique(tj[order], return_index=True)
+    eater = qi[order][first]
+    count = np.bincount(eater, minlength=len(prey))
+    # 每个个体吃到的第一株植物（eaten 已按植物顺序排列）
+    idx, first_plant = np.unique(eater, return_index=True)
+    despawn = canvas.spawn_queue.despawn
+    for j in eaten.tolist():
+        despawn(plants[j])
+    for j, k in zip(idx.tolist(), eaten[first_plant].tolist()):
+        animal = prey[j]
+        animal.energy = min(animal.energy + plants[k].energy, animal.max_energy) # 进食能量
+        animal.stamina = min(animal.stamina + 15 * int(count[j]), 100) # 体力恢复
+    return len(eaten)
@@ -10,23 +10,41 @@ Propose: To define the visual representation of animals
 
 # import modules
 import pygame
-import random
-import math
+
+from biomass import BiomassGrid
+from perception import cone_reference, hears, sees, senses, within
+from sim_random import default_stream
+from spatial_index import grid_candidates, grid_insert
+from sprite_cache import get_atlas
+
+# 被捕食者游荡转向节奏：每 WANDER_TURN_PERIOD 个tick中前 WANDER_TURN_WINDOW 个tick转向
+WANDER_TURN_PERIOD = 6
+WANDER_TURN_WINDOW = 2
 
 class Predator(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    SPECIES = 'predator' # 基因组物种名（见 genome.TRAITS）
+    # 可调参数（参数扫描时覆盖，子代从父代继承；属于基因组的性状由基因组表达）
+    TUNABLE = (
+        'max_speed', 'fov_angle', 'sensory_distance', 'hearing_radius',
+        'chase_stamina_threshold', 'HUNT_COOLDOWN', 'max_energy', 'reproduce_threshold_ratio',
+    )
+
+    canvas = None # 所属画布（加入画布后由 GameCanvas 设置）
+    FACING_DRAWS = 1 # 构造时抽取朝向角的次数（被捕食者在父类构造之后重新抽取一次）
+    bounds = pygame.Rect(0, 0, 800, 600) # 未加入画布时的活动范围（加入后取画布的 world_rect，全体共用一份）
+
+    def __init__(self, x, y, rng=None):
         super().__init__()
-        self.screen_rect = pygame.Rect(0, 0, 800, 600)
+        self.rng = rng if rng is not None else default_stream('predator') # 随机数流（子代共用）
         """捕食者视觉定义"""
-        self.image = pygame.Surface((16, 16), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (205, 82, 87), (8, 8), 3)
+        self.image = get_atlas().creature('predator') # 共享预渲染图像
         self.rect = self.image.get_rect(center=(x, y))
         """能量系统定义"""
         self.energy = 100.0
         self.radius = 3  # 用于圆形碰撞检测（半径）
         """捕食者行为定义"""
         self.speed = 1.7
-        angle = random.uniform(0, 360)
+        angle = self.rng.uniform(0, 360)
         self.direction = pygame.math.Vector2(1, 0).rotate(angle)  # 从0度方向开始随机旋转
         self.direction.normalize_ip()
         """捕食者属性定义"""
@@ -50,16 +68,100 @@ class Predator(pygame.sprite.Sprite):
         self.reproduce_timer = 0 # 达标持续时间（帧）
         self.wander_duration = 0 # 游荡持续时间（帧）
         self.reproduce_cooldown = 0 # 繁殖冷却时间（帧）
+        self.dead = False # 是否已死亡（死亡后在本阶段末统一移出精灵组；不用 alive 以免遮蔽 Sprite.alive()）
+        """遗传"""
+        self.genome = None # 基因组行号（见 genome.GenomeBank；未加入画布时为 None，性状取上面的默认值）
+        self._senses = None # 感知预计算值（性状变化时重新计算）
+        self._percept = None # 感知缓存条目（见 perception_cache，未启用时不使用）
+
+    def kill(self):
+        """死亡：加入画布时登记到出生/死亡队列，本阶段末统一移出（见 pooling.SpawnQueue），否则立即移出"""
+        if self.dead:
+            return
+        self.dead = True
+        if self.canvas is not None:
+            if self.genome is not None:
+                self.canvas.genomes[self.SPECIES].release(self.genome)
+            self.canvas.spawn_queue.despawn(self)
+        else:
+            super().kill()
+
+    def found(self, canvas):
+        """作为始祖个体加入画布：取得物种默认基因组"""
+        self.canvas = canvas
+        self.genome = canvas.genomes[self.SPECIES].found()
+
+    @classmethod
+    def found_many(cls, canvas, x, y, rng):
+        """批量新建始祖个体（初始种群），结果与逐个 cls(x, y, rng) 再 found(canvas) 完全相同
+
+        朝向角一次向量化抽取（随机数消耗与逐个新建相同，见 FACING_DRAWS），出生状态中与位置、朝向无关的属性
+        先在一个样板实例上设置好，再整体复制给每个个体，基因组行号批量分配。返回个体列表。
+        """
+        count = len(x)
+        angles = rng.uniform(0, 360, (count, cls.FACING_DRAWS))[:, -1].tolist()
+        template = cls(0, 0, default_stream(cls.SPECIES)) # 样板用后备流构造，不消耗 rng
+        state = template.__dict__.copy()
+        for name in ('_Sprite__g', 'rect', 'direction'):
+            del state[name]
+        state['rng'], state['canvas'] = rng, canvas
+        rows = canvas.genomes[cls.SPECIES].found_many(count).tolist()
+        get_rect, Vector2, init = template.image.get_rect, pygame.math.Vector2, pygame.sprite.Sprite.__init__
+        creatures = []
+        for cx, cy, angle, row in zip(x.tolist(), y.tolist(), angles, rows):
+            creature = cls.__new__(cls)
+            init(creature)
+            creature.__dict__.update(state)
+            creature.rect = get_rect(center=(cx, cy))
+            direction = creature.direction = Vector2(1, 0)
+            direction.rotate_ip(angle)
+            direction.normalize_ip()
+            creature.genome = row
+            creatures.append(creature)
+        return creatures
+
+    def express(self):
+        """把基因组写入性状属性（仅在出生时调用，之后行为代码照常读取属性）"""
+        self.__dict__.update(self.canvas.genomes[self.SPECIES].express(self.genome))
+
+    @property
+    def max_step(self):
+        """下一次移动的最大位移（空间网格按此放宽查询范围）：移动前的加速不超过最大速度或游荡速度上限2.5"""
+        return max(self.speed, self.max_speed, 2.5)
+
+    def _sense(self):
+        """本个体的感知预计算值
+
+        性状随个体突变后取值各不相同，共享的 senses 缓存会不断失效，因此每个个体保留一份，
+        只在视野角度/视距/听觉半径变化时重新计算（捕食者的视觉判定不使用听觉字段）。
+        """
+        s = self._senses
+        if s is None or s.fov != self.fov_angle or s.sensory != self.sensory_distance or s.hearing != self.hearing_radius:
+            s = self._senses = senses.__wrapped__(self.fov_angle, self.sensory_distance, self.hearing_radius)
+        return s
+
+    def _add_child(self, child):
+        """子代登记到出生队列，本阶段末加入精灵组与空间网格（未加入画布时立即加入）"""
+        group = self.groups()[0]
+        if self.canvas is not None:
+            self.canvas.spawn_queue.spawn(group, child)
+        else:
+            group.add(child)
+            grid_insert(group, child)
+        self._count('births')
     
     def wander(self):
         """游荡行为"""
         if not self.is_chasing:
             # 被动追踪逻辑
+            candidates = grid_candidates(self.groups()[0], self.rect.center, self.sensory_distance)
+            self._count('perception', len(candidates))
+            x, y = self.rect.center
+            hx, hy = self.direction
+            s = self._sense()
             visible_prey = [
-                p for p in self.groups()[0]
-                if self._is_in_cone(p.rect.center) and 
-                self._is_within_distance(p.rect.center) and
-                isinstance(p, Prey)
+                p for p in candidates
+                if sees(s, hx, hy, p.rect.centerx - x, p.rect.centery - y) and isinstance(p, Prey)
             ]
             if visible_prey:
                 # 仅调整方向不触发正式追逐
@@ -71,8 +173,8 @@ class Predator(pygame.sprite.Sprite):
                 except ValueError:
                     pass
             # 保持随机转向逻辑
-            if random.random() < 0.02:
-                self.direction = pygame.math.Vector2(random.uniform(-1,1), random.uniform(-1,1)).normalize()
+            if self.rng.random() < 0.02:
+                self.direction = pygame.math.Vector2(self.rng.uniform(-1,1), self.rng.uniform(-1,1)).normalize()
             # 游荡速度维持
             if visible_prey:
                 self.speed = min(self.max_speed, self.speed + 0.01)  # 发现猎物时加速但限制上限
@@ -82,14 +184,23 @@ class Predator(pygame.sprite.Sprite):
                 self.speed = max(1.5, self.speed - 0.02)  # 正常状态缓慢减速
             self.stamina = min(self.stamina + 1, 100)
 
+    def _sim_tick(self):
+        """当前模拟tick（有画布时取画布tick，否则按60帧换算墙钟）"""
+        if self.canvas is not None:
+            return self.canvas.current_tick
+        return pygame.time.get_ticks() * 60 // 1000
+
+    def _count(self, counter, n=1):
+        """性能计数（未启用分析器时不记录）"""
+        profiler = self.canvas.profiler if self.canvas is not None else None
+        if profiler is not None:
+            profiler.count(counter, n)
+
     def _is_in_cone(self, target_pos):
-        """锥形视野检测"""
+        """锥形视野检测（逐个目标的角度公式；批量感知见 perception.sees）"""
         dx = target_pos[0] - self.rect.centerx
         dy = target_pos[1] - self.rect.centery
-        target_angle = math.degrees(math.atan2(-dy, dx)) % 360
-        source_angle = math.degrees(math.atan2(-self.direction.y, self.direction.x)) % 360
-        angle_diff = abs(target_angle - source_angle) % 360
-        return angle_diff <= self.fov_angle / 2 or angle_diff >= 360 - self.fov_angle / 2
+        return cone_reference(self.direction.x, self.direction.y, dx, dy, self.fov_angle)
     
     def _is_within_distance(self, target_pos, radius=None):
         """距离检测"""
@@ -102,7 +213,7 @@ class Predator(pygame.sprite.Sprite):
         dx = target_pos[0] - self.rect.centerx
         dy = target_pos[1] - self.rect.centery
         if dx == 0 and dy == 0:
-            self.direction = pygame.math.Vector2(random.uniform(-1,1), random.uniform(-1,1)).normalize()
+            self.direction = pygame.math.Vector2(self.rng.uniform(-1,1), self.rng.uniform(-1,1)).normalize()
             return
         try:
             target_dir = pygame.math.Vector2(dx, dy).normalize()
@@ -118,59 +229,57 @@ class Predator(pygame.sprite.Sprite):
 
     def _reproduce(self):
         """繁殖行为"""
-        offset = random.uniform(2, 5) # 防止重叠
-        child = Predator(self.rect.centerx + offset, self.rect.centery + offset)
+        offset = self.rng.uniform(2, 5) # 防止重叠
+        child = Predator(self.rect.centerx + offset, self.rect.centery + offset, self.rng)
+        self._inherit(child)
         child.energy = self.max_energy * self.reproduce_threshold_ratio # 新个体能量为繁殖能量阈值的85%（避免新生儿刚落地就能生，太生草了）
         child.hunt_cooldown = child.HUNT_COOLDOWN # 添加捕猎冷却（不能一出生就是杀手吧？）
         return child
+
+    def _inherit(self, child):
+        """子代继承父代的可调参数与所属画布；有基因组时由父代基因组突变得到子代基因组并表达"""
+        for name in self.TUNABLE:
+            setattr(child, name, getattr(self, name))
+        child.canvas = canvas = self.canvas
+        if self.genome is not None:
+            child.genome = canvas.genomes[self.SPECIES].inherit(self.genome, canvas.rng['genome'], canvas.mutation)
+            child.express()
     
     def _edge_bounce(self, prey_group):
         """边缘反弹"""
         prev_rect = self.rect.copy()
-        self.rect.clamp_ip(self.screen_rect)
+        self.rect.clamp_ip(self.canvas.world_rect if self.canvas is not None else self.bounds)
         if self.rect.left != prev_rect.left or self.rect.right!= prev_rect.right:
             self.direction.x *= -1
         if self.rect.top!= prev_rect.top or self.rect.bottom!= prev_rect.bottom:
             self.direction.y *= -1
 
-    def _attack(self, prey_group):
-        """攻击行为"""
-        collied_preys = pygame.sprite.spritecollide(self, prey_group, False, pygame.sprite.collide_circle)
-        for prey in collied_preys:
-            if prey.alive:
-                dx = prey.rect.centerx - self.rect.centerx
-                dy = prey.rect.centery - self.rect.centery
-                if dx == 0 and dy == 0:
-                    direction = pygame.math.Vector2(random.uniform(-1,1), random.uniform(-1,1)).normalize()
-                else:
-                    direction = pygame.math.Vector2(dx, dy).normalize()
-                repel_distance = 2 # 击退距离
-                self.rect.centerx -= direction.x * repel_distance
-                self.rect.centery -= direction.y * repel_distance
-                prey.rect.centerx += direction.x * repel_distance
-                prey.rect.centery += direction.y * repel_distance
-                self.speed = max(1.5, self.speed - 0.3) # 捕食者速度减缓
-                prey.energy -= 15 # 猎物扣除15点能量
-                self.energy = min(self.energy + 7, 100) # 捕食者增加7点能量
-                if prey.energy <= 0:
-                    self.hunt_cooldown = self.HUNT_COOLDOWN # 成功捕猎冷却
-                    prey.kill()
-                    self.is_chasing = False
-                    self.speed = max(1.5, self.speed - 0.1) # 捕食者速度减缓
+    def _visible_prey(self, prey_group, profiler):
+        """视野内的猎物（按组内顺序）"""
+        candidates = grid_candidates(prey_group, self.rect.center, self.sensory_distance)
+        if profiler is not None:
+            profiler.count('perception', len(candidates))
+        # 本tick的位置与朝向只取一次，视野参数按物种预计算
+        x, y = self.rect.center
+        hx, hy = self.direction
+        s = self._sense()
+        return [p for p in candidates if sees(s, hx, hy, p.rect.centerx - x, p.rect.centery - y)]
 
-    def update(self, prey_group):
-        """更新捕食者状态"""
+    def move(self, prey_group):
+        """移动、感知与追逐/游荡（碰撞之前的部分）"""
+        profiler = self.canvas.profiler if self.canvas is not None else None # 性能分析（未启用时为 None）
         # 边缘反弹
         self._edge_bounce(prey_group)
         # 移动逻辑
         if not self.is_reproducing:
             self.rect.center += self.direction * self.speed
-            visible_prey = [
-                p for p in prey_group
-                if self._is_in_cone(p.rect.center) and self._is_within_distance(p.rect.center)
-            ]
+            cache = self.canvas.perception if self.canvas is not None else None # 感知缓存（未启用时为 None）
+            if cache is None or not prey_group: # 被捕食者的通用移动逻辑传入空组，不占用其缓存条目
+                visible_prey = self._visible_prey(prey_group, profiler)
+            else:
+                visible_prey = cache.sense(self, lambda: self._visible_prey(prey_group, profiler))
             # 正常行为
-            if visible_prey and visible_prey[0].alive and self.hunt_cooldown <= 0:
+            if visible_prey and not visible_prey[0].dead and self.hunt_cooldown <= 0:
                 self._chase(visible_prey[0].rect.center) # 有猎物，出动!
                 if self.stamina <= self.chase_stamina_threshold: # 低耐力时开始游荡
                     self.is_chasing = False
@@ -181,8 +290,9 @@ class Predator(pygame.sprite.Sprite):
             self.reproduce_duration -= 1
             if self.reproduce_duration <= 0:
                 self.is_reproducing = False
-        # 两种生物发生碰撞即捕食者发出攻击
-        self._attack(prey_group)
+
+    def settle(self):
+        """冷却、繁殖与能量消耗（碰撞之后的部分）"""
         self.hunt_cooldown = max(0, self.hunt_cooldown - 1)
         # 繁殖
         if(
@@ -202,7 +312,7 @@ class Predator(pygame.sprite.Sprite):
             self.wander_duration >= 60 and # 60帧
             not self.is_chasing and # 不在追逐状态
             self.reproduce_cooldown <= 0 and # 繁殖冷却
-            random.random() < 0.4
+            self.rng.random() < 0.4
         ):
             # 触发繁殖强制重置追逐状态
             self.is_chasing = False
@@ -210,7 +320,7 @@ class Predator(pygame.sprite.Sprite):
             self.reproduce_duration = 60 # 繁殖60帧
             child = self._reproduce()
             if child:
-                self.groups()[0].add(child)
+                self._add_child(child)
             self.energy = max(self.energy * 0.6, 0)
             self.reproduce_cooldown = 10800
         self.reproduce_cooldown =  max(0, self.reproduce_cooldown - 1) # 繁殖冷却
@@ -220,11 +330,14 @@ class Predator(pygame.sprite.Sprite):
             self.kill()
 
 class Prey(Predator):
-    def __init__(self, x, y):
-        super().__init__(x, y)
+    SPECIES = 'prey'
+    TUNABLE = Predator.TUNABLE + ('hunger_threshold',)
+    FACING_DRAWS = 2
+
+    def __init__(self, x, y, rng=None):
+        super().__init__(x, y, rng if rng is not None else default_stream('prey'))
         """被捕食者视觉定义"""
-        self.image = pygame.Surface((16, 16), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (239, 197, 127), (8, 8), 2)
+        self.image = get_atlas().creature('prey') # 共享预渲染图像
         self.rect = self.image.get_rect(center=(x, y))
         """能量系统定义"""
         self.energy = 100
@@ -232,7 +345,7 @@ class Prey(Predator):
         self.hunger_threshold = 40 # 饥饿阈值
         """被捕食者行为定义"""
         self.speed = 1.5
-        angle = random.uniform(0, 360)
+        angle = self.rng.uniform(0, 360)
         self.direction = pygame.math.Vector2(1, 0).rotate(angle)
         self.direction.normalize_ip()
         """被捕食者属性定义"""
@@ -241,7 +354,6 @@ class Prey(Predator):
         self.fov_angle = 85 # 视野角度
         self.sensory_distance = 100 # 感知范围
         self.hearing_radius = 56 # 听觉范围
-        self.alive = True # 是否存活
         self.is_fleeing = False # 是否逃跑
         """被捕食者繁殖属性"""
         self.max_energy = 100 # 最大能量
@@ -250,19 +362,20 @@ class Prey(Predator):
         self.wander_duration = 0 # 游荡持续时间（帧）
         self.reproduce_cooldown = 0 # 繁殖冷却时间（帧）
 
-    def _eat_plant(self, plant_group):
-        """进食植物"""
-        eaten = pygame.sprite.spritecollide(self, plant_group, True) # 碰撞检测并移除植物
-        if eaten:
-            if hasattr(self, 'canvas'):
-                self.canvas.current_plants -= len(eaten)
-                self.canvas.plants.remove(*eaten) # 移除被吃植物
-            self.energy = min(self.energy + eaten[0].energy, self.max_energy) # 进食能量
-            self.stamina = min(self.stamina + 15 * len(eaten), 100) # 体力恢复
-    
-    def kill(self):
-        self.alive = False
-        super().kill()
+    def _plant_target(self, plant_group, x, y, profiler):
+        """最近可食用植物的位置（植被网格时为半径内能量最高的格子中心），没有则为 None"""
+        if isinstance(plant_group, BiomassGrid):
+            return plant_group.forage_target(x, y, 45)
+        candidates = grid_candidates(plant_group, (x, y), 45)
+        if profiler is not None:
+            profiler.count('perception', len(candidates))
+        nearby_plants = [
+            p for p in candidates
+            if within((p.rect.centerx - x) ** 2 + (p.rect.centery - y) ** 2, 45, 2025)
+        ]
+        if not nearby_plants:
+            return None
+        return min(nearby_plants, key=lambda p: (p.rect.centerx - x) ** 2 + (p.rect.centery - y) ** 2).rect.center
 
     def _flee(self, threat_pos):
         """逃离威胁"""
@@ -270,13 +383,13 @@ class Prey(Predator):
         dx = self.rect.centerx - threat_pos[0]
         dy = self.rect.centery - threat_pos[1]
         if dx == 0 and dy == 0:
-            self.direction = pygame.math.Vector2(random.uniform(-1,1), random.uniform(-1,1)).normalize()
+            self.direction = pygame.math.Vector2(self.rng.uniform(-1,1), self.rng.uniform(-1,1)).normalize()
             return
         try:
             target_dir = pygame.math.Vector2(dx, dy).normalize()
             self.direction = self.direction.lerp(target_dir, 0.25).normalize() # 平滑转向
         except ValueError:
-            direction = pygame.math.Vector2(random.uniform(-1,1), random.uniform(-1,1)).normalize()
+            direction = pygame.math.Vector2(self.rng.uniform(-1,1), self.rng.uniform(-1,1)).normalize()
         direction = pygame.math.Vector2(dx, dy).normalize()
         self.direction = direction
         self.speed = min(self.max_speed, self.speed + 0.05)
@@ -285,8 +398,8 @@ class Prey(Predator):
 
     def wander(self):
         """游荡行为"""
-        if pygame.time.get_ticks() % 100 < 30:
-            angle = random.uniform(-45, 45)  # 被捕食者转向更灵活
+        if self._sim_tick() % WANDER_TURN_PERIOD < WANDER_TURN_WINDOW:
+            angle = self.rng.uniform(-45, 45)  # 被捕食者转向更灵活
             self.direction = self.direction.rotate(angle).normalize()
         self.speed = max(1.5, self.speed - 0.05)
         self.stamina = min(self.stamina + 0.04, 90)
@@ -299,35 +412,46 @@ class Prey(Predator):
     
     def _reproduce(self):
         """繁殖行为"""
-        offset = random.uniform(2, 5)
-        child = Prey(self.rect.centerx + offset, self.rect.centery + offset)
+        offset = self.rng.uniform(2, 5)
+        child = Prey(self.rect.centerx + offset, self.rect.centery + offset, self.rng)
+        self._inherit(child)
         child.energy = self.max_energy * self.reproduce_threshold_ratio # 新个体能量为繁殖能量阈值的85%（避免新生儿刚落地就能生，太生草了）
         return child
 
-    def update(self, predator_group, plant_group):
-        """更新被捕食者状态"""
-        nearby_predators = [
-            p for p in predator_group
-            if ((self._is_in_cone(p.rect.center) and self._is_within_distance(p.rect.center))
-            or self._is_within_hearing(p.rect.center)) 
-            and (p.rect.centerx != self.rect.centerx or p.rect.centery != self.rect.centery)
-        ]
-        if nearby_predators and self.stamina > 0 and nearby_predators[0].alive:
+    def _nearby_predators(self, predator_group, profiler):
+        """视野或听觉范围内的捕食者（按组内顺序，不含重合位置）"""
+        candidates = grid_candidates(predator_group, self.rect.center, max(self.sensory_distance, self.hearing_radius))
+        if profiler is not None:
+            profiler.count('perception', len(candidates))
+        x, y = self.rect.center
+        hx, hy = self.direction
+        s = self._sense()
+        nearby_predators = []
+        for p in candidates:
+            dx, dy = p.rect.centerx - x, p.rect.centery - y
+            if (dx or dy) and (sees(s, hx, hy, dx, dy) or hears(s, dx, dy)):
+                nearby_predators.append(p)
+        return nearby_predators
+
+    def move(self, predator_group, plant_group):
+        """感知、逃跑/觅食/游荡与通用移动（进食之前的部分）"""
+        profiler = self.canvas.profiler if self.canvas is not None else None # 性能分析（未启用时为 None）
+        cache = self.canvas.perception if self.canvas is not None else None # 感知缓存（未启用时为 None）
+        if cache is None:
+            nearby_predators = self._nearby_predators(predator_group, profiler)
+        else:
+            nearby_predators = cache.sense(self, lambda: self._nearby_predators(predator_group, profiler))
+        x, y = self.rect.center
+        if nearby_predators and self.stamina > 0 and not nearby_predators[0].dead:
             self._flee(nearby_predators[0].rect.center) # 有捕食者，逃离！
         elif self.energy < self.hunger_threshold:
             # 寻找最近可食用植物
-            nearby_plants = [
-                p for p in plant_group
-                if self._is_within_distance(p.rect.center, 45)
-            ]
-            if nearby_plants:
-                target = min(nearby_plants,
-                             key=lambda p: (p.rect.centerx - self.rect.centerx) ** 2 + (p.rect.centery - self.rect.centery) ** 2)
-                dx = target.rect.centerx - self.rect.centerx
-                dy = target.rect.centery - self.rect.centery
+            target = self._plant_target(plant_group, x, y, profiler)
+            if target is not None:
+                dx = target[0] - self.rect.centerx
+                dy = target[1] - self.rect.centery
                 if dx == 0 and dy == 0:
-                    foot_dir = pygame.math.Vector2(dx, dy).normalize()
-                    self.direction = self.direction.lerp(foot_dir, 0.15).normalize()
+                    # 已在目标上：朝向不变（原先向零向量插值后归一化，结果即原朝向，但零向量归一化会抛出异常），只加速
                     self.speed = min(self.speed * 1.05, self.max_speed)
                 else:
                     target_dir = pygame.math.Vector2(dx, dy).normalize()
@@ -336,8 +460,13 @@ class Prey(Predator):
                     self.wander()
         else:
             self.wander() # 无捕食者，游荡一会儿...
-        super().update([])
-        self._eat_plant(plant_group)
+        super().move([]) # 通用移动逻辑（无猎物）
+        super().settle()
+
+    def settle(self):
+        """繁殖与能量消耗（进食之后的部分）"""
+        if self.dead: # 通用逻辑中能量耗尽
+            return
         # 繁殖
         if (
             self.energy >= self.max_energy * self.reproduce_threshold_ratio and
@@ -353,11 +482,11 @@ class Prey(Predator):
             self.reproduce_timer >= 180 and
             self.wander_duration >= 60 and
             self.reproduce_cooldown <= 0 and
-            random.random() < 0.6
+            self.rng.random() < 0.6
         ):
             child = self._reproduce()
             if child:
-                self.groups()[0].add(child)
+                self._add_child(child)
             self.energy = max(self.energy * 0.6, 0)
             self.reproduce_cooldown = 90
         self.reproduce_cooldown = max(0, self.reproduce_cooldown-1)
@@ -0,0 +1,143 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: dirty_render
+Propose: Dirty-rectangle drawing path: repaint only where entities and overlays changed, update only those rects
+'''
+
+# import modules
+import pygame
+
+MAX_UPDATE_RECTS = 4096 # 待刷新矩形超过此数时改为整屏 flip（逐个矩形提交的开销超过整屏）
+# 可见个体超过此数或总面积超过屏幕的 MAX_DIRTY_AREA 时本帧整屏重绘：擦除并逐个重绘的开销随个体数增长，
+# 超过整屏重绘（benchmark.py --feature dirty-render，单核 dummy 驱动下约 350 个个体时两者持平）
+MAX_DIRTY_RECTS = 300
+MAX_DIRTY_AREA = 0.5
+
+
+class DirtyRenderer:
+    """脏矩形绘制
+
+    背景（底色、植被层与世界边界）按 GameCanvas.background_key 缓存为一张 Surface。每帧先用背景擦除上一帧个体所在的矩形，
+    再按原顺序绘制全部可见个体；内容变化或与个体矩形相交的叠加层（帧率、tick、图表、统计浮层）
+    在其区域内按“背景 -> 个体 -> 叠加层”完整重绘，最后只把这些矩形提交给 pygame.display.update。
+    画面与每帧整屏重绘逐像素相同。摄像机移动、缩放、植被层重新着色、细节层次不是完整精灵，
+    或可见个体过多、总面积过大（见 MAX_DIRTY_RECTS / MAX_DIRTY_AREA）时退回整屏重绘。
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.background = None # 背景缓存
+        self.view = None # 背景对应的键（摄像机状态与植被层版本）
+        self.rects = None # 上一帧个体的屏幕矩形（None 时下一帧整屏重绘）
+        self.rect_area = 0 # 当前摄像机状态下个体图像的平均面积
+        self.overlays = [] # 上一帧叠加层的 (内容键, 矩形)
+        self.full_frames = 0
+        self.dirty_frames = 0
+
+    def invalidate(self):
+        """下一帧整屏重绘（窗口被遮挡后重新显示等）"""
+        self.rects = None
+
+    def render(self):
+        canvas = self.canvas
+        view = canvas.background_key()
+        mode = canvas.choose_lod()
+        crowded = self._crowded(canvas.visible_estimate())
+        if crowded or view != self.view or mode != 'sprites' or self.rects is None:
+            self._full(mode, view, crowded)
+        else:
+            self._dirty()
+
+    def _crowded(self, count):
+        """可见个体的数量或总面积（按平均面积估计）超过阈值：脏矩形不再比整屏重绘快"""
+        width, height = self.canvas.screen.get_size()
+        return count > MAX_DIRTY_RECTS or count * self.rect_area > MAX_DIRTY_AREA * width * height
+
+    def _full(self, mode, view, crowded=False):
+        """整屏重绘（不拥挤时同时记录下一帧擦除所需的状态）"""
+        canvas, screen, profiler = self.canvas, self.canvas.screen, self.canvas.profiler
+        canvas.draw_background()
+        moved = view != self.view
+        if moved:
+            self.background = screen.copy()
+            self.view = view
+        if mode == 'sprites' and not crowded:
+            self.rects = rects = screen.blits(canvas.entity_blits())
+            if rects and (moved or not self.rect_area): # 矩形大小只随缩放变化
+                self.rect_area = sum(rect.width * rect.height for rect in rects) / len(rects)
+        else:
+            canvas.draw_entities(mode) # 与 draw_frame 相同的绘制路径
+            self.rects = None
+            if moved:
+                self.rect_area = 0 # 缩放后的平均面积在下一次记录矩形时重新计算
+        if profiler is not None:
+            profiler.lap('draw')
+        overlays = canvas.overlays()
+        screen.blits([(surface, pos) for _, surface, pos in overlays], doreturn=False)
+        self.overlays = [(key, surface.get_rect(topleft=pos)) for key, surface, pos in overlays]
+        if profiler is not None:
+            profiler.lap('charts')
+        pygame.display.flip()
+        if profiler is not None:
+            profiler.lap('flip')
+        self.full_frames += 1
+
+    def _dirty(self):
+        """只重绘变化的区域"""
+        canvas, screen, profiler = self.canvas, self.canvas.screen, self.canvas.profiler
+        background = self.background
+        erased = self.rects
+        # 1.用背景擦除上一帧个体，再绘制本帧个体（未被擦除的区域此前只有背景，顺序与整屏重绘一致）
+        screen.blits([(background, rect, rect) for rect in erased], doreturn=False)
+        blits = canvas.entity_blits()
+        rects = screen.blits(blits)
+        if profiler is not None:
+            profiler.lap('draw')
+        # 2.叠加层：内容或位置变化、或与擦除/绘制过的个体矩形相交时，在其区域内完整重绘
+        overlays = canvas.overlays()
+        current = [(key, surface.get_rect(topleft=pos)) for key, surface, pos in overlays]
+        touched = erased + rects
+        regions = []
+        for index, (key, rect) in enumerate(current):
+            previous = self.overlays[index] if index < len(self.overlays) else None
+            if previous is None or previous[0] != key or previous[1] != rect:
+                regions.append(rect if previous is None else rect.union(previous[1]))
+            elif rect.collidelist(touched) != -1:
+                regions.append(rect)
+        regions += [rect for _, rect in self.overlays[len(current):]] # 已关闭的叠加层
+        for region in regions:
+            screen.set_clip(region)
+            screen.blit(background, region, region)
+            screen.blits([blits[i] for i in region.collidelistall(rects)], doreturn=False)
+            screen.blits(
+                [(surface, pos) for (_, surface, pos), (_, rect) in zip(overlays, current) if rect.colliderect(region)],
+                doreturn=False
+            )
+        screen.set_clip(None)
+        self.rects = rects
+        self.overlays = current
+        if profiler is not None:
+            profiler.lap('charts')
+        # 3.只提交变化的矩形
+        updates = touched + regions
+        if len(updates) > MAX_UPDATE_RECTS:
+            pygame.display.flip()
+        else:
+            pygame.display.update(updates)
+        if profiler is not None:
+            profiler.lap('flip')
+        self.dirty_frames += 1
+
+
+def _full_frame(canvas, surface):
+    """按整屏重绘路径把当前画面画到 surface（用于比对）"""
+    screen, canvas.screen = canvas.screen, surface
+    canvas.draw_background()
+    canvas.draw_entities()
+    canvas.fps_display()
+    canvas.draw_charts()
+    canvas.screen = screen
+
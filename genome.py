@@ -0,0 +1,179 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: genome
+Propose: Heritable trait schema, packed per-species genome storage, vectorized mutation and trait statistics
+'''
+
+# import modules
+from collections import namedtuple
+
+import numpy as np
+
+# 性状：name 为生物属性名（speed/stamina 为出生时的初始值），low/high 为取值范围（亦为直方图范围），
+# sigma 为每代相对突变的标准差（再乘以画布的 mutation 系数）
+Trait = namedtuple('Trait', 'name low high sigma')
+
+PREDATOR_TRAITS = (
+    Trait('speed', 0.5, 6.0, 0.05),
+    Trait('max_speed', 1.0, 8.0, 0.05),
+    Trait('stamina', 20.0, 300.0, 0.05),
+    Trait('fov_angle', 10.0, 360.0, 0.05),
+    Trait('sensory_distance', 10.0, 250.0, 0.05),
+    Trait('hearing_radius', 1.0, 200.0, 0.05),
+    Trait('reproduce_threshold_ratio', 0.5, 1.0, 0.02),
+)
+PREY_TRAITS = PREDATOR_TRAITS + (Trait('hunger_threshold', 5.0, 95.0, 0.05),)
+TRAITS = {'predator': PREDATOR_TRAITS, 'prey': PREY_TRAITS}
+
+MUTATION = 0.0 # 默认突变系数：不突变（子代与父代性状相同，种群历史与无基因组时逐位一致）；演化需显式传入 mutation>0
+HIST_BINS = 16 # 性状直方图的分箱数
+HISTORY_RAW = 1024 # 性状均值历史的原始采样条数（见 chart_buffer.HistoryBuffer）
+HISTORY_LEVEL = 128 # 性状均值历史每级降采样保留的块数
+
+
+def trait_bounds(traits):
+    """性状的 (下限, 上限, 相对突变标准差) 数组"""
+    return tuple(np.array([getattr(t, field) for t in traits]) for field in ('low', 'high', 'sigma'))
+
+
+def mutate(parents, traits, rng, scale=MUTATION):
+    """子代基因组：每个性状乘以 (1 + sigma * scale * N(0, 1)) 后截断到取值范围
+
+    parents 为父代基因组（每行一个个体），返回新数组；scale 为 0 时直接复制且不消耗随机数。
+    """
+    children = np.array(parents, dtype=float, ndmin=2)
+    if scale and len(children):
+        low, high, sigma = trait_bounds(traits)
+        noise = rng.standard_normal(children.shape)
+        noise *= sigma * scale
+        noise += 1
+        children *= noise
+        np.clip(children, low, high, out=children)
+    return children
+
+
+def trait_stats(values, traits, bins=HIST_BINS):
+    """一组基因组（每行一个个体）的各性状均值、方差与直方图（全部性状一次向量运算）
+
+    返回 {'count', 'mean', 'var', 'hist', 'edges'}：mean/var 形状 (性状数,)，hist 形状 (性状数, bins)，
+    edges 形状 (性状数, bins + 1)。没有个体时均值与方差为 nan。
+    """
+    values = np.asarray(values, dtype=float).reshape(-1, len(traits))
+    low, high, _ = trait_bounds(traits)
+    count = len(values)
+    if count:
+        mean = values.mean(axis=0)
+        var = values.var(axis=0)
+    else:
+        mean = var = np.full(len(traits), np.nan)
+    # 按性状偏移分箱下标，一次 bincount 得到全部直方图
+    index = np.clip(((values - low) / (high - low) * bins).astype(np.intp), 0, bins - 1)
+    index += np.arange(len(traits)) * bins
+    hist = np.bincount(index.ravel(), minlength=len(traits) * bins).reshape(len(traits), bins)
+    edges = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, bins + 1)
+    return {'count': count, 'mean': mean, 'var': var, 'hist': hist, 'edges': edges}
+
+
+class GenomeBank:
+    """一个物种的基因组存储（精灵引擎）
+
+    全体个体的基因组紧凑地存放在一个 (容量, 性状数) 的 float64 数组中，个体只持有行号（genome 属性）；
+    死亡时行号回收，出生时复用。性状只在出生时表达为生物属性（express），每tick的行为代码照常读取属性，
+    因此基因组不增加每tick开销；统计时直接对存活行做向量运算。
+    """
+    def __init__(self, traits, defaults, capacity=64):
+        self.traits = traits
+        self.names = tuple(t.name for t in traits)
+        self.index = {name: k for k, name in enumerate(self.names)}
+        self.defaults = np.array([defaults[name] for name in self.names], dtype=float)
+        self.values = np.zeros((capacity, len(traits)))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = [] # 已回收的行号
+        self.n = 0 # 使用过的行数
+
+    def __len__(self):
+        return int(self.alive[:self.n].sum())
+
+    def _row(self):
+        if self.free:
+            row = self.free.pop()
+        else:
+            row = self.n
+            if row == len(self.values):
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+                self.alive = np.concatenate([self.alive, np.zeros_like(self.alive)])
+            self.n += 1
+        self.alive[row] = True
+        return row
+
+    def found(self, values=None):
+        """始祖个体的基因组（默认为物种默认性状），返回行号"""
+        row = self._row()
+        self.values[row] = self.defaults if values is None else values
+        return row
+
+    def found_many(self, n):
+        """n 个始祖个体的基因组（初始种群批量生成用），返回行号数组（依次取用回收行号与新行号，与逐个 found 相同）"""
+        reuse = self.free[::-1][:n]
+        del self.free[len(self.free) - len(reuse):]
+        fresh = n - len(reuse)
+        need = self.n + fresh
+        if need > len(self.values):
+            grow = max(need, 2 * len(self.values)) - len(self.values)
+            self.values = np.concatenate([self.values, np.zeros((grow, len(self.traits)))])
+            self.alive = np.concatenate([self.alive, np.zeros(grow, dtype=bool)])
+        rows = np.concatenate([np.array(reuse, dtype=np.int64), np.arange(self.n, need)])
+        self.n = need
+        self.values[rows] = self.defaults
+        self.alive[rows] = True
+        return rows
+
+    def inherit(self, parent, rng, scale=MUTATION):
+        """由父代行号生成子代基因组（突变见 mutate），返回行号"""
+        row = self._row()
+        self.values[row] = mutate(self.values[parent], self.traits, rng, scale)[0]
+        return row
+
+    def release(self, row):
+        self.alive[row] = False
+        self.free.append(row)
+
+    def express(self, row):
+        """行号对应的 (属性名, 值) 序列（Python float，供写入生物属性）"""
+        return zip(self.names, self.values[row].tolist())
+
+    def set_trait(self, rows, name, value):
+        """覆盖指定个体的性状（参数扫描用），同时作为之后始祖个体的默认值"""
+        k = self.index[name]
+        self.values[rows, k] = value
+        self.defaults[k] = value
+
+    def live(self):
+        """存活个体的基因组（每行一个个体）"""
+        return self.values[:self.n][self.alive[:self.n]]
+
+    def stats(self, bins=HIST_BINS):
+        return trait_stats(self.live(), self.traits, bins)
+
+    # ---------- 存档 ----------
+    def get_state(self):
+        """存储内容（行号与回收顺序原样保留，续跑时的行分配与统计求和顺序不变）"""
+        return {
+            'values': self.values[:self.n].copy(), 'alive': self.alive[:self.n].copy(),
+            'free': np.array(self.free, dtype=np.int64), 'defaults': self.defaults.copy(),
+        }
+
+    def set_state(self, state):
+        n = len(state['values'])
+        capacity = max(len(self.values), n)
+        self.values = np.zeros((capacity, len(self.names)))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.values[:n] = state['values']
+        self.alive[:n] = state['alive']
+        self.free = state['free'].tolist()
+        self.defaults[:] = state['defaults']
+        self.n = n
@@ -0,0 +1,138 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: lod_renderer
+Propose: Level-of-detail drawing: full sprites, per-pixel points, or a binned density heatmap
+'''
+
+# import modules
+import numpy as np
+import pygame
+
+from sprite_cache import CREATURE_STYLES, PLANT_COLORS
+
+MODES = ('sprites', 'points', 'heatmap')
+SPRITE_ZOOM = 0.5 # 缩放不小于此值时绘制完整精灵
+POINT_ZOOM = 1 / 16 # 缩放不小于此值时逐点绘制，更小时绘制密度热力图
+SPRITE_BUDGET = 20000 # 视口内个体超过此数时不再逐个 blit 精灵
+POINT_DENSITY = 0.1 # 视口内个体数 / 屏幕像素数超过此值时改用热力图（点已大量重叠）
+HEAT_CELL = 4 # 热力图每格的屏幕像素数
+HEAT_SATURATION = 32 # 每格个体数达到此值时颜色饱和（对数刻度）
+# 每格个体数 -> 颜色不透明度（对数刻度查表）
+_HEAT_ALPHA = (np.log1p(np.arange(HEAT_SATURATION + 1)) / np.log1p(HEAT_SATURATION)).astype(np.float32)
+# 点/热力图颜色：取精灵的主色，植物取各外观颜色的平均
+LAYER_COLORS = {
+    'predator': CREATURE_STYLES['predator'][0],
+    'prey': CREATURE_STYLES['prey'][0],
+    'plant': tuple(sum(channel) // len(channel) for channel in zip(*PLANT_COLORS)),
+}
+
+
+class LODRenderer:
+    """按缩放与视口内个体密度选择细节层次
+
+    近景逐个绘制精灵（由调用方完成）；中景把有个体的屏幕像素经 surfarray 直接着色；
+    远景按屏幕格子计数，按对数密度混合各物种颜色后整体缩放绘制。
+    点与热力图的开销是对坐标数组的若干次向量运算，与个体数近似线性而常数很小，帧时间基本不随种群增长。
+    """
+    def __init__(self, camera, bg_color):
+        self.camera = camera
+        self.bg_color = bg_color
+        self.force = None # 固定某一层次（None 为自动选择）
+        self.mode = None # 最近一帧使用的层次
+        self._heat_small = None # 热力图格子分辨率的 Surface
+        self._heat_full = None # 缩放到屏幕尺寸的 Surface
+        self._scratch = None # 坐标换算用的复用缓冲区
+
+    def choose(self, visible):
+        """visible 为视口内个体数（估计值）"""
+        if self.force is not None:
+            mode = self.force
+        else:
+            camera = self.camera
+            zoom = camera.zoom
+            density = visible / (camera.view_width * camera.view_height)
+            if zoom >= SPRITE_ZOOM and visible <= SPRITE_BUDGET:
+                mode = 'sprites'
+            elif zoom >= POINT_ZOOM and density <= POINT_DENSITY:
+                mode = 'points'
+            else:
+                mode = 'heatmap'
+        self.mode = mode
+        return mode
+
+    def _cell_index(self, x, y, cell, columns, rows):
+        """每个坐标所在屏幕格子（边长 cell 个世界像素）的平铺下标
+
+        越界的坐标归入外圈一格，不必先按视口生成掩码；全部运算写入复用的缓冲区（大数组反复分配比计算本身更慢）。
+        """
+        camera = self.camera
+        count = len(x)
+        if self._scratch is None or len(self._scratch[0]) < count:
+            self._scratch = (np.empty(count), np.empty(count), np.empty(count, dtype=np.intp))
+        fx, fy, index = (buffer[:count] for buffer in self._scratch)
+        for source, target, origin, limit in ((x, fx, camera.x, columns), (y, fy, camera.y, rows)):
+            np.subtract(source, origin, out=target)
+            np.multiply(target, 1 / cell, out=target)
+            np.floor(target, out=target)
+            np.clip(target, -1, limit, out=target)
+            np.add(target, 1, out=target)
+        np.multiply(fx, rows + 2, out=fx)
+        np.add(fx, fy, out=fx)
+        index[...] = fx
+        return index
+
+    def _counts(self, x, y, weights, cell, columns, rows):
+        """各屏幕格子内的个体数（或权重和），形状 (columns, rows)"""
+        index = self._cell_index(x, y, cell, columns, rows)
+        counts = np.bincount(index, weights=weights, minlength=(columns + 2) * (rows + 2))
+        return counts.reshape(columns + 2, rows + 2)[1:-1, 1:-1]
+
+    def draw_points(self, surface, x, y, color):
+        """有个体的屏幕像素着色（缩放不小于 1/4 时为 2x2）"""
+        if not len(x):
+            return
+        width, height = surface.get_size()
+        index = self._cell_index(x, y, 1 / self.camera.zoom, width, height)
+        # 只按占用像素（不超过可见个体数）着色，不为整屏分配计数数组
+        occupied = np.zeros((width + 2) * (height + 2), dtype=bool)
+        occupied[index] = True
+        sx, sy = np.divmod(np.flatnonzero(occupied), height + 2)
+        inside = (sx >= 1) & (sx <= width) & (sy >= 1) & (sy <= height)
+        sx, sy = sx[inside] - 1, sy[inside] - 1
+        if surface.get_bytesize() == 3: # 24位表面不支持 pixels2d
+            pixels, value = pygame.surfarray.pixels3d(surface), color
+        else:
+            pixels, value = pygame.surfarray.pixels2d(surface), surface.map_rgb(color)
+        pixels[sx, sy] = value
+        if self.camera.zoom >= 0.25:
+            right, below = sx < width - 1, sy < height - 1
+            pixels[sx[right] + 1, sy[right]] = value
+            pixels[sx[below], sy[below] + 1] = value
+            pixels[sx[right & below] + 1, sy[right & below] + 1] = value
+        del pixels # 解除表面锁定
+
+    def draw_heatmap(self, surface, layers):
+        """layers 为 [(x, y, 权重或 None, 颜色), ...]，按顺序叠加（后者在上）"""
+        width, height = surface.get_size()
+        columns, rows = -(-width // HEAT_CELL), -(-height // HEAT_CELL)
+        cell = HEAT_CELL / self.camera.zoom # 每格的世界像素数
+        rgb = np.empty((3, columns, rows), dtype=np.float32) # 按通道连续存放，逐通道混合
+        rgb[...] = np.asarray(self.bg_color, dtype=np.float32)[:, None, None]
+        for x, y, weights, color in layers:
+            if not len(x):
+                continue
+            counts = self._counts(x, y, weights, cell, columns, rows)
+            alpha = _HEAT_ALPHA[np.minimum(counts, HEAT_SATURATION).astype(np.intp)]
+            for channel, value in zip(rgb, color):
+                channel += (value - channel) * alpha
+        if self._heat_small is None or self._heat_small.get_size() != (columns, rows):
+            self._heat_small = pygame.Surface((columns, rows))
+            self._heat_full = pygame.Surface((columns * HEAT_CELL, rows * HEAT_CELL))
+            self._heat_full.set_colorkey(self.bg_color) # 无个体的格子透明（保留背景与世界边界）
+        pygame.surfarray.blit_array(self._heat_small, np.moveaxis(rgb, 0, -1).astype(np.uint8))
+        pygame.transform.scale(self._heat_small, self._heat_full.get_size(), self._heat_full)
+        surface.blit(self._heat_full, (0, 0))
@@ -0,0 +1,313 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: metrics
+Propose: Streaming metrics export: interval sampling into preallocated buffers, background append-only columnar chunks, lazy range reader
+'''
+
+# import modules
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError: # 可选依赖：未安装时只支持 NumPy 分块格式
+    pyarrow = pq = None
+
+METRICS_VERSION = 2
+# 累计事件数（画布上的 events 字典，两种引擎在出生/死亡批量结算时累加；plant_deaths 为被吃掉的植物数）
+EVENTS = ('predator_births', 'predator_deaths', 'prey_births', 'prey_deaths', 'plant_deaths', 'kills')
+# 每次采样一行：种群数、采样间隔内的事件数、各物种平均能量/耐力、植被总能量
+COLUMNS = (
+    ('tick', '<i8'), ('predator', '<i8'), ('prey', '<i8'), ('plant', '<i8'),
+    *((name, '<i8') for name in EVENTS),
+    ('predator_energy', '<f8'), ('predator_stamina', '<f8'),
+    ('prey_energy', '<f8'), ('prey_stamina', '<f8'),
+    ('biomass', '<f8'),
+)
+# 每个分块一条索引（定长）：首/末tick、行数、数据偏移（parquet 格式为分块序号）
+INDEX_DTYPE = np.dtype([('first_tick', '<i8'), ('last_tick', '<i8'), ('rows', '<i8'), ('offset', '<i8')])
+FORMATS = ('npy', 'parquet')
+
+
+def _chunk_name(chunk):
+    return f'chunk_{chunk:05d}.parquet'
+
+
+def _mean(values):
+    return float(values.mean()) if len(values) else np.nan
+
+
+class MetricsRecorder:
+    """按固定tick间隔采样种群指标并追加写入列式日志
+
+    采样写入预分配的两组列缓冲（每列一个连续数组）之一；写满 chunk_rows 行后交给后台线程落盘并切换到另一组，
+    主线程每次采样只做一行赋值。数据按列连续写入 data.bin（或每块一个 parquet 文件），
+    随后在 index.bin 追加一条定长索引；先写数据后写索引，中途崩溃也不会出现悬空索引。
+    目录中已有同格式、同采样间隔的日志时截断到画布当前tick后继续追加（存档续跑后接着记录），不能留下间隔。
+    """
+    def __init__(self, canvas, directory, interval=30, chunk_rows=4096, fmt='npy'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        if fmt == 'parquet' and pq is None:
+            raise ImportError("Parquet output requires pyarrow")
+        os.makedirs(directory, exist_ok=True)
+        self.canvas = canvas
+        self.directory = directory
+        self.interval = interval # 采样间隔（tick）
+        self.chunk_rows = chunk_rows
+        self.fmt = fmt
+        self.names = tuple(name for name, _ in COLUMNS)
+        self._buffers = [
+            {name: np.zeros(chunk_rows, dtype=dtype) for name, dtype in COLUMNS} for _ in range(2)
+        ]
+        self._buffer = self._buffers[0]
+        self.rows = 0 # 当前缓冲中的行数
+        self.written = 0 # 已提交落盘的分块数
+        self._last_events = dict(canvas.events) # 上一次采样时的累计事件数
+        self._meta_path = os.path.join(directory, 'meta.json')
+        self._open_log()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+        canvas.metrics = self
+
+    def _open_log(self):
+        """打开索引与数据（追加）；已有日志先截断到画布当前tick，新采样必须紧接日志中的最后一行"""
+        meta = {
+            'version': METRICS_VERSION, 'format': self.fmt, 'interval': self.interval,
+            'columns': [list(column) for column in COLUMNS],
+            'events': {name: int(self.canvas.events[name]) for name in EVENTS}, # 开始记录时的累计事件数
+        }
+        index_path = os.path.join(self.directory, 'index.bin')
+        entries = np.zeros(0, dtype=INDEX_DTYPE)
+        tail = None # 跨越当前tick的分块中保留的行（截断后重新写入）
+        resumed = False
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                existing = json.load(f)
+            if {k: existing[k] for k in ('version', 'format', 'columns')} != \
+                    {k: meta[k] for k in ('version', 'format', 'columns')}:
+                raise ValueError(f"Existing metrics log in {self.directory} has a different layout")
+            if existing['interval'] != self.interval:
+                raise ValueError(
+                    f"Existing metrics log in {self.directory} samples every {existing['interval']} ticks, "
+                    f"not {self.interval}"
+                )
+            tick = self.canvas.current_tick
+            log = MetricsLog(self.directory)
+            kept = log.read(('tick', *EVENTS), stop=tick + 1) # 从存档续跑时截掉存档tick之后的采样
+            entries = np.array(log.index[log.index['first_tick'] <= tick])
+            if len(entries) and entries['last_tick'][-1] > tick:
+                chunk = log._chunk(len(entries) - 1, self.names)
+                keep = chunk['tick'] <= tick
+                tail = {name: np.array(values[keep]) for name, values in chunk.items()} # 复制后才能截断被映射的文件
+                entries = entries[:-1]
+                del chunk
+            del log
+            if len(kept['tick']):
+                last_tick = int(kept['tick'][-1])
+                if tick // self.interval * self.interval > last_tick: # 下一次采样须紧接最后一行
+                    raise ValueError(
+                        f"Metrics log in {self.directory} ends at tick {last_tick}; "
+                        f"recording from tick {tick} would leave a gap"
+                    )
+                # 上一次采样时的累计事件数：开始记录时的计数加上保留各行的增量
+                self._last_events = {name: existing['events'][name] + int(kept[name].sum()) for name in EVENTS}
+                resumed = True
+        if not resumed: # 新日志，或旧运行的采样全部被截掉
+            with open(self._meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        with open(index_path, 'ab') as f:
+            f.truncate(len(entries) * INDEX_DTYPE.itemsize)
+        self._chunk = len(entries)
+        self._index = open(index_path, 'ab')
+        if self.fmt == 'npy':
+            row_size = sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS)
+            end = int(entries['offset'][-1] + entries['rows'][-1] * row_size) if len(entries) else 0
+            self._data = open(os.path.join(self.directory, 'data.bin'), 'ab')
+            self._data.truncate(end)
+            self._data.seek(end) # 分块偏移取自 tell()
+        else:
+            self._data = None
+            chunk = self._chunk
+            while os.path.exists(os.path.join(self.directory, _chunk_name(chunk))): # 截掉的分块
+                os.remove(os.path.join(self.directory, _chunk_name(chunk)))
+                chunk += 1
+        if tail is not None:
+            self._write(tail, len(tail['tick']), self._chunk)
+            self._chunk += 1
+
+    def _sample(self, row):
+        """当前tick的一行指标（写入当前缓冲）"""
+        canvas, buffer = self.canvas, self._buffer
+        events, last = canvas.events, self._last_events
+        buffer['tick'][row] = canvas.current_tick
+        buffer['predator'][row] = len(canvas.predators)
+        buffer['prey'][row] = len(canvas.prey)
+        buffer['plant'][row] = canvas.current_plants
+        for name in EVENTS:
+            buffer[name][row] = events[name] - last[name]
+        self._last_events = dict(events)
+        world = canvas.world
+        for species, group in (('predator', canvas.predators), ('prey', canvas.prey)):
+            if world is not None:
+                store = world.predators if species == 'predator' else world.prey
+                energy, stamina = store.energy, store.stamina
+            else:
+                energy = np.fromiter((c.energy for c in group), dtype=float, count=len(group))
+                stamina = np.fromiter((c.stamina for c in group), dtype=float, count=len(group))
+            buffer[species + '_energy'][row] = _mean(energy)
+            buffer[species + '_stamina'][row] = _mean(stamina)
+        if canvas.biomass is not None:
+            biomass = canvas.biomass.total()
+        elif world is not None:
+            biomass = float(world.plants.energy.sum())
+        else:
+            biomass = float(sum(p.energy for p in canvas.plants))
+        buffer['biomass'][row] = biomass
+
+    def record(self):
+        """每 interval 个tick采样一次（由 GameCanvas.step 调用）"""
+        if self.canvas.current_tick % self.interval:
+            return
+        self._sample(self.rows)
+        self.rows += 1
+        if self.rows == self.chunk_rows:
+            self._submit()
+
+    def _submit(self):
+        """把当前缓冲交给后台线程落盘，切换到另一组缓冲"""
+        if not self.rows:
+            return
+        if self.pending is not None:
+            self.pending.result() # 另一组缓冲的上一次写盘（早已完成，除非磁盘跟不上采样）
+        buffer, rows = self._buffer, self.rows
+        self.pending = self.executor.submit(self._write, buffer, rows, self._chunk)
+        self._chunk += 1
+        self.written += 1
+        self._buffer = self._buffers[1] if buffer is self._buffers[0] else self._buffers[0]
+        self.rows = 0
+
+    def _write(self, buffer, rows, chunk):
+        """写入一个分块（后台线程）"""
+        if self.fmt == 'npy':
+            offset = self._data.tell()
+            for name in self.names:
+                self._data.write(memoryview(buffer[name][:rows]))
+            self._data.flush()
+        else:
+            offset = chunk
+            table = pyarrow.table({name: buffer[name][:rows] for name in self.names})
+            pq.write_table(table, os.path.join(self.directory, _chunk_name(chunk)))
+        ticks = buffer['tick']
+        entry = np.array([(ticks[0], ticks[rows - 1], rows, offset)], dtype=INDEX_DTYPE)
+        self._index.write(entry.tobytes())
+        self._index.flush()
+
+    def flush(self):
+        """立即写出缓冲中未满的分块并等待落盘"""
+        self._submit()
+        if self.pending is not None:
+            self.pending.result()
+
+    def series(self, columns=None):
+        """日志中的全部采样（已落盘的分块 + 缓冲中未满的分块），不写出额外的分块"""
+        columns = self.names if columns is None else tuple(columns)
+        if self.pending is not None:
+            self.pending.result()
+        logged = MetricsLog(self.directory).read(columns)
+        return {name: np.concatenate([logged[name], self._buffer[name][:self.rows]]) for name in columns}
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(wait=True)
+        if self._data is not None:
+            self._data.close()
+        self._index.close()
+        if self.canvas.metrics is self:
+            self.canvas.metrics = None
+
+
+class MetricsLog:
+    """指标日志读取器：索引与 data.bin 内存映射，只读取请求的列与覆盖请求tick范围的分块"""
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != METRICS_VERSION:
+            raise ValueError(f"Unsupported metrics log version: {self.meta['version']}")
+        self.fmt = self.meta['format']
+        if self.fmt == 'parquet' and pq is None:
+            raise ImportError("Reading a parquet metrics log requires pyarrow")
+        self.interval = self.meta['interval']
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in self.meta['columns']}
+        self.columns = tuple(self.dtypes)
+        self.refresh()
+
+    def refresh(self):
+        """重新映射索引与数据（记录仍在进行时可读取新写入的分块）"""
+        path = os.path.join(self.directory, 'index.bin')
+        count = os.path.getsize(path) // INDEX_DTYPE.itemsize
+        self.index = np.memmap(path, dtype=INDEX_DTYPE, mode='r', shape=(count,)) if count else \
+            np.zeros(0, dtype=INDEX_DTYPE)
+        self._data = None
+        if self.fmt == 'npy' and count:
+            self._data = np.memmap(os.path.join(self.directory, 'data.bin'), dtype=np.uint8, mode='r')
+
+    def __len__(self):
+        return int(self.index['rows'].sum())
+
+    def _chunk(self, k, columns):
+        """第 k 个分块的指定列（npy 格式为只读视图，不复制）"""
+        entry = self.index[k]
+        rows = int(entry['rows'])
+        if self.fmt == 'parquet':
+            table = pq.read_table(os.path.join(self.directory, _chunk_name(int(entry['offset']))), columns=list(columns))
+            return {name: table.column(name).to_numpy() for name in columns}
+        out = {}
+        offset = int(entry['offset'])
+        for name, dtype in self.dtypes.items():
+            size = rows * dtype.itemsize
+            if name in columns:
+                out[name] = self._data[offset:offset + size].view(dtype)
+            offset += size
+        return out
+
+    def chunks(self, columns=None, start=None, stop=None):
+        """逐块产出 {列名: 数组}，只包含 start <= tick < stop 的行（按块流式分析，内存与日志总长无关）"""
+        columns = self.columns if columns is None else tuple(columns)
+        unknown = set(columns) - set(self.columns)
+        if unknown:
+            raise KeyError(f"Unknown metrics columns: {sorted(unknown)}")
+        index = self.index
+        for k in range(len(index)):
+            if (start is not None and index['last_tick'][k] < start) or (stop is not None and index['first_tick'][k] >= stop):
+                continue
+            needed = columns if 'tick' in columns or (start is None and stop is None) else (*columns, 'tick')
+            chunk = self._chunk(k, needed)
+            if start is not None or stop is not None:
+                ticks = chunk['tick']
+                keep = np.ones(len(ticks), dtype=bool)
+                if start is not None:
+                    keep &= ticks >= start
+                if stop is not None:
+                    keep &= ticks < stop
+                if not keep.all():
+                    chunk = {name: values[keep] for name, values in chunk.items()}
+            yield {name: chunk[name] for name in columns}
+
+    def read(self, columns=None, start=None, stop=None):
+        """start <= tick < stop 范围内指定列的连续数组"""
+        columns = self.columns if columns is None else tuple(columns)
+        parts = list(self.chunks(columns, start, stop))
+        return {
+            name: np.concatenate([part[name] for part in parts]) if parts else np.zeros(0, dtype=self.dtypes[name])
+            for name in columns
+        }
@@ -0,0 +1,173 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: parallel
+Propose: Multi-process strip-parallel tick phases: shared-memory snapshot, per-tile intents, deterministic merge
+'''
+
+# import modules
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import math
+import multiprocessing
+import os
+import time
+import weakref
+
+import numpy as np
+
+import soa_engine
+
+_ALIGN = 64 # 各数组在共享内存中按缓存行对齐
+PROBE_BUDGET = 0.05 # 自适应重测较慢一方的额外耗时占较快一方累计耗时的上限
+
+
+def _release(pool, block):
+    """关闭进程池并释放共享内存（weakref.finalize 回调，不能引用执行器本身）"""
+    pool.shutdown(wait=True)
+    if block is not None:
+        block.close()
+        block.unlink()
+
+
+def available_cpus():
+    """本进程可用的 CPU 数（受亲和性/容器限制时小于 cpu_count）"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# ---------- 工作进程 ----------
+_attached = {} # 工作进程内已挂载的共享内存（按名称缓存）
+
+
+def _attach(name):
+    block = _attached.get(name)
+    if block is None:
+        for old in _attached.values():
+            old.close() # 主进程已换用更大的共享块
+        _attached.clear()
+        block = shared_memory.SharedMemory(name=name)
+        _attached[name] = block
+    return block
+
+
+def _warm_up():
+    """工作进程启动后预先导入模块（自适应执行器创建时在后台提交）"""
+    return os.getpid()
+
+
+def _run_tile(name, layout, fn_name, params, bounds):
+    """工作进程：对一个条带执行意图函数，条带内个体的下一状态写入共享输出列，返回附加结果（点对数与接触候选）"""
+    buffer = _attach(name).buf
+    arrays, out = {}, {}
+    for key, (offset, dtype, shape) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        if key.startswith('out:'):
+            out[key[4:]] = view # 条带互不重叠，各进程写入不同的行
+        else:
+            arrays[key] = view
+    return getattr(soa_engine, fn_name)(arrays, out, params, bounds)
+
+
+def tile_bounds(x, tiles):
+    """按 x 坐标分位数划分条带（两端开放，覆盖全部个体）"""
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, tiles + 1)[1:-1])) if len(x) else []
+    edges = [-np.inf, *np.asarray(edges).tolist(), np.inf]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class TileExecutor:
+    """按 x 条带切分个体，在常驻进程池中并行执行 soa_engine 各阶段的分块意图（predator_intents/prey_intents）
+
+    每次调用把本阶段的快照（输入列）与输出列拷贝进一块共享内存，工作进程只读快照，只写输出列中属于自己条带的行，
+    接触候选等附加结果按条带顺序合并后由主进程统一结算，因此与串行执行逐位一致。
+    个体少于 min_agents 时直接串行执行（进程调度开销大于收益）。
+    adaptive 为 True 时按实测耗时逐阶段选择串行或并行（拷贝快照的开销超过收益时自动退回串行）：
+    可用核数不足2个时始终串行；工作进程在后台启动，全部就绪前串行执行，启动开销不落在模拟线程上；
+    之后每阶段先各测一次，再选较快的一方，至少隔 probe_every 次调用、且间隔足够长使重测的额外耗时
+    不超过较快一方累计耗时的 PROBE_BUDGET 时才重测较慢的一方。两条路径结果相同，选择不影响复现。
+    """
+    def __init__(self, workers, tiles_per_worker=4, min_agents=4096, adaptive=True, probe_every=64):
+        self.workers = workers
+        self.tiles = workers * tiles_per_worker
+        self.min_agents = min_agents
+        self.adaptive = adaptive
+        self.probe_every = probe_every
+        self.cost = {} # 意图函数名 -> [串行, 并行] 最近一次实测的单个个体耗时（秒）
+        self.calls = {} # 意图函数名 -> 上次重测以来的调用次数
+        self.cpus = min(workers, available_cpus()) # 能同时运行的工作进程数
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self.ready = [self.pool.submit(_warm_up) for _ in range(workers)] if adaptive and self.cpus > 1 else []
+        self.block = None
+        self._finalizer = weakref.finalize(self, _release, self.pool, None)
+
+    def _stage(self, arrays, out):
+        """把快照与输出列写入共享内存，返回各数组的 (偏移, dtype, 形状) 与输出列的共享视图"""
+        layout, size = {}, 0
+        items = (*arrays.items(), *((f'out:{name}', value) for name, value in out.items()))
+        for key, value in items:
+            layout[key] = (size, value.dtype.str, value.shape)
+            size += -(-value.nbytes // _ALIGN) * _ALIGN
+        if self.block is None or self.block.size < size:
+            self._finalizer.detach()
+            if self.block is not None:
+                self.block.close()
+                self.block.unlink()
+            self.block = shared_memory.SharedMemory(create=True, size=max(size * 2, 1 << 20))
+            self._finalizer = weakref.finalize(self, _release, self.pool, self.block)
+        buffer = self.block.buf
+        views = {}
+        for key, value in items:
+            offset, dtype, shape = layout[key]
+            views[key] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            views[key][...] = value
+        return layout, {name: views[f'out:{name}'] for name in out}
+
+    def _mode(self, name):
+        """本次调用是否并行：先各测一次，之后选较快的一方，按重测预算定期重测较慢的一方"""
+        if not self.adaptive:
+            return True
+        if self.cpus < 2 or not all(future.done() for future in self.ready):
+            return False
+        serial, parallel = self.cost.setdefault(name, [None, None])
+        if serial is None or parallel is None:
+            return serial is not None
+        faster = parallel < serial
+        fast, slow = (parallel, serial) if faster else (serial, parallel)
+        calls = self.calls[name] = self.calls.get(name, 0) + 1
+        if calls < max(self.probe_every, math.ceil((slow - fast) / (PROBE_BUDGET * fast))):
+            return faster
+        self.calls[name] = 0
+        return not faster
+
+    def run(self, fn, arrays, out, params):
+        """执行一个阶段的意图函数（按 _mode 选择串行或并行）：输出列写入 out，返回合并后的附加结果"""
+        name = fn.__name__
+        parallel = self._mode(name)
+        start = time.perf_counter()
+        extras = self._run_parallel(fn, arrays, out, params) if parallel else fn(arrays, out, params)
+        if name in self.cost: # 自适应且工作进程已就绪
+            self.cost[name][parallel] = (time.perf_counter() - start) / max(len(arrays['x']), 1)
+        return extras
+
+    def _run_parallel(self, fn, arrays, out, params):
+        """并行执行意图函数：个体按条带分给各工作进程"""
+        layout, shared = self._stage(arrays, out)
+        futures = [
+            self.pool.submit(_run_tile, self.block.name, layout, fn.__name__, params, bounds)
+            for bounds in tile_bounds(arrays['x'], self.tiles)
+        ]
+        extras = soa_engine.merge_intents([future.result() for future in futures])
+        for name, view in shared.items():
+            out[name][...] = view
+        del shared # 释放对共享内存的引用，之后才能关闭
+        return extras
+
+    def close(self):
+        self._finalizer()
+        self.block = None
+
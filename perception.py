@@ -0,0 +1,159 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: perception
+Propose: Trig-free vision/hearing tests (dot products against precomputed cos and squared radii)
+'''
+
+# import modules
+from collections import namedtuple
+from functools import lru_cache
+import math
+
+import numpy as np
+
+# 判定值与边界的差在该范围内时改用原角度公式（两种算法的舍入误差都远小于此，结果与原实现逐一相同）
+BOUNDARY_BAND = 1e-9
+
+Senses = namedtuple('Senses', 'fov half cos2 obtuse full blind sensory sensory2 hearing hearing2')
+
+
+@lru_cache(maxsize=256)
+def senses(fov_angle, sensory_distance, hearing_radius=0):
+    """一组感知参数的预计算值（按参数缓存，同一物种的个体共用）"""
+    half = fov_angle / 2
+    cos_half = math.cos(math.radians(min(max(half, 0), 180)))
+    return Senses(
+        fov=fov_angle, half=half, cos2=cos_half * cos_half, obtuse=cos_half < 0,
+        full=half >= 180, blind=half < 0, # 视野≥360°处处可见；负角度处处不可见
+        sensory=sensory_distance, sensory2=sensory_distance * sensory_distance,
+        hearing=hearing_radius, hearing2=hearing_radius * hearing_radius,
+    )
+
+
+def senses_array(fov_angle, sensory_distance, hearing_radius=0):
+    """senses 的逐个体版：每个字段为数组（性状随个体变化时使用，不经共享缓存）"""
+    fov_angle = np.asarray(fov_angle, dtype=float)
+    sensory_distance = np.asarray(sensory_distance, dtype=float)
+    hearing_radius = np.broadcast_to(np.asarray(hearing_radius, dtype=float), fov_angle.shape)
+    half = fov_angle / 2
+    cos_half = np.cos(np.radians(np.clip(half, 0, 180)))
+    return Senses(
+        fov=fov_angle, half=half, cos2=cos_half * cos_half, obtuse=cos_half < 0,
+        full=half >= 180, blind=half < 0,
+        sensory=sensory_distance, sensory2=sensory_distance * sensory_distance,
+        hearing=hearing_radius, hearing2=hearing_radius * hearing_radius,
+    )
+
+
+def take_senses(s, index):
+    """逐个体感知参数按下标取出（如按点对的查询个体下标展开）；全体相同的字段保留为标量，省去逐点对展开"""
+    return Senses._make(
+        field[0].item() if len(field) and (field == field[0]).all() else field[index]
+        for field in s
+    )
+
+
+# ---------- 原角度公式（近边界时的精确回退） ----------
+def cone_reference(hx, hy, dx, dy, fov_angle):
+    """原 _is_in_cone 的角度判定：朝向 (hx, hy)，目标偏移 (dx, dy)"""
+    target_angle = math.degrees(math.atan2(-dy, dx)) % 360
+    source_angle = math.degrees(math.atan2(-hy, hx)) % 360
+    angle_diff = abs(target_angle - source_angle) % 360
+    return angle_diff <= fov_angle / 2 or angle_diff >= 360 - fov_angle / 2
+
+
+def cone_reference_mask(hx, hy, dx, dy, fov_angle):
+    """cone_reference 的 NumPy 版（与数组引擎原有公式相同）"""
+    target_angle = np.degrees(np.arctan2(-dy, dx)) % 360
+    source_angle = np.degrees(np.arctan2(-hy, hx)) % 360
+    angle_diff = np.abs(target_angle - source_angle) % 360
+    half = fov_angle / 2
+    return (angle_diff <= half) | (angle_diff >= 360 - half)
+
+
+# ---------- 单个目标 ----------
+def in_cone(s, hx, hy, dx, dy, d2):
+    """锥形视野：夹角 ≤ fov/2 等价于 cos(夹角) ≥ cos(fov/2)，两边平方后只需乘加
+
+    d2 为目标距离平方。目标与自身重合时原公式按 atan2(0, 0)=0（+x 方向）判定，这里同样处理。
+    """
+    if s.full or s.blind:
+        return s.full
+    if d2 == 0:
+        dx, dy, d2 = 1, 0, 1
+    dot = hx * dx + hy * dy
+    norm = (hx * hx + hy * hy) * d2
+    gap = dot * dot - s.cos2 * norm
+    if -BOUNDARY_BAND * norm <= gap <= BOUNDARY_BAND * norm:
+        return cone_reference(hx, hy, dx, dy, s.fov)
+    if s.obtuse: # 视野超过180°：前半平面全部可见，后半平面只看夹角余弦的绝对值
+        return dot >= 0 or gap < 0
+    return dot > 0 and gap > 0
+
+
+def within(d2, radius, radius2):
+    """距离平方 ≤ 半径平方（近边界时按原实现开方比较）"""
+    if -BOUNDARY_BAND * radius2 <= d2 - radius2 <= BOUNDARY_BAND * radius2:
+        return d2 ** 0.5 <= radius
+    return d2 < radius2
+
+
+def sees(s, hx, hy, dx, dy):
+    """视距内且在视野锥内"""
+    d2 = dx * dx + dy * dy
+    return within(d2, s.sensory, s.sensory2) and in_cone(s, hx, hy, dx, dy, d2)
+
+
+def hears(s, dx, dy):
+    """听觉范围内"""
+    return within(dx * dx + dy * dy, s.hearing, s.hearing2)
+
+
+# ---------- 整批点对（NumPy） ----------
+def cone_mask(s, hx, hy, dx, dy, d2):
+    """in_cone 的批量版：hx/hy 为每个点对查询个体的朝向
+
+    s 的字段可以是标量（全体共用）或与点对等长的数组（逐个体性状，见 senses_array/take_senses）。
+    """
+    # take_senses 只把全体相同的字段收为标量：cos2 相同（如 0° 与 360°）时 obtuse/full/blind 仍可能逐点对不同
+    per_pair = any(np.ndim(field) for field in (s.cos2, s.obtuse, s.full, s.blind, s.fov))
+    if np.ndim(s.full) == 0 and np.ndim(s.blind) == 0 and (s.full or s.blind):
+        return np.full(len(dx), s.full)
+    same = d2 == 0
+    if same.any():
+        dx, dy, d2 = np.where(same, 1.0, dx), np.where(same, 0.0, dy), np.where(same, 1.0, d2)
+    dot = hx * dx + hy * dy
+    norm = (hx * hx + hy * hy) * d2
+    gap = dot * dot - s.cos2 * norm
+    if per_pair:
+        if np.ndim(s.obtuse):
+            result = np.where(s.obtuse, (dot >= 0) | (gap < 0), (dot > 0) & (gap > 0))
+        else:
+            result = (dot >= 0) | (gap < 0) if s.obtuse else (dot > 0) & (gap > 0)
+        near = np.abs(gap) <= BOUNDARY_BAND * norm
+        for mask, value in ((s.full, True), (s.blind, False)):
+            if np.ndim(mask):
+                result[mask] = value
+                near &= ~mask
+        near = np.flatnonzero(near)
+        fov = s.fov[near] if np.ndim(s.fov) else s.fov
+    else:
+        result = (dot >= 0) | (gap < 0) if s.obtuse else (dot > 0) & (gap > 0)
+        near = np.flatnonzero(np.abs(gap) <= BOUNDARY_BAND * norm)
+        fov = s.fov
+    if len(near):
+        result[near] = cone_reference_mask(hx[near], hy[near], dx[near], dy[near], fov)
+    return result
+
+
+def within_mask(d2, radius, radius2):
+    """within 的批量版（近边界时按数组引擎原实现开方比较）；radius/radius2 可为与 d2 等长的数组"""
+    result = d2 < radius2
+    near = np.flatnonzero(np.abs(d2 - radius2) <= BOUNDARY_BAND * radius2)
+    if len(near):
+        result[near] = np.sqrt(d2[near]) <= (radius[near] if np.ndim(radius) else radius)
+    return result
@@ -0,0 +1,214 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: perception_cache
+Propose: Temporally coherent perception: cached target sets, per-species sensing cadence, divergence audits
+'''
+
+# import modules
+import math
+import time
+
+import numpy as np
+
+SPECIES = ('predator', 'prey')
+STATS = ('sensed', 'reused', 'audited', 'diverged')
+_NEVER = -(1 << 62) # 从未感知（任何 tick 下都已过期）
+
+
+class PerceptionCache:
+    """感知缓存
+
+    挂到画布上后（canvas.perception）两种引擎的视野/听觉判定改为先查缓存：每个个体保存上次感知到的目标
+    （精灵引擎为目标列表，数组引擎为第一个目标的下标）以及感知时自身与目标的位置、朝向。
+    满足以下任一条件时才重新感知，否则沿用缓存的目标：
+    - 距上次感知已满 cadence 个tick（按物种设置）；
+    - 自身或缓存的某个目标移动超过 margin 像素，或朝向转过 turn 度以上；
+    - 缓存的目标已死亡。
+    每 audit_interval 个tick对全体个体额外做一次逐tick精确感知，统计决策（第一个目标）不同的比例。
+    指定 budget（每物种每tick的感知耗时上限，毫秒）时按审计结果自适应调整 cadence：
+    偏差率超过 tolerance 时减小，未超过且耗时超出预算时增大（自适应依赖墙钟耗时，运行不再逐位可复现）。
+    未启用时画布上为 None，行为与逐tick感知完全相同。缓存不写入存档，读档后第一个tick全部重新感知。
+    """
+    def __init__(self, canvas, cadence=4, margin=8.0, turn=15.0, audit_interval=60, budget=None, tolerance=0.02,
+                 max_cadence=16):
+        self.canvas = canvas
+        self.cadence = dict(cadence) if isinstance(cadence, dict) else dict.fromkeys(SPECIES, cadence)
+        self.margin2 = margin * margin
+        self.turn_cos = math.cos(math.radians(turn))
+        self.audit_interval = audit_interval
+        self.budget = budget
+        self.tolerance = tolerance
+        self.max_cadence = max_cadence
+        self.stats = {species: dict.fromkeys(STATS, 0) for species in SPECIES} # 累计计数
+        self._window = {species: [0.0, 0, 0, 0] for species in SPECIES} # 自上次调整以来的 [感知耗时, tick数, 审计数, 偏差数]
+        self._arrays = {} # 数组引擎：物种 -> 缓存列
+        canvas.perception = self
+        if canvas.world is not None:
+            canvas.world.perception = self
+
+    def auditing(self):
+        """本tick是否做精确感知审计"""
+        return self.canvas.current_tick % self.audit_interval == 0
+
+    def _adapt(self, species):
+        """审计后按偏差率与耗时调整该物种的 cadence"""
+        elapsed, ticks, audited, diverged = self._window[species]
+        self._window[species] = [0.0, 0, 0, 0]
+        if self.budget is None or not audited:
+            return
+        if diverged / audited > self.tolerance:
+            self.cadence[species] = max(1, self.cadence[species] - 1)
+        elif ticks and elapsed / ticks * 1000 > self.budget:
+            self.cadence[species] = min(self.max_cadence, self.cadence[species] + 1)
+
+    def _audit(self, species, audited, diverged):
+        stats, window = self.stats[species], self._window[species]
+        stats['audited'] += audited
+        stats['diverged'] += diverged
+        window[2] += audited
+        window[3] += diverged
+        self._adapt(species)
+
+    # ---------- 精灵引擎 ----------
+    def sense(self, creature, exact):
+        """creature 的感知目标列表：缓存有效时沿用，否则调用 exact() 重新感知"""
+        species = creature.SPECIES
+        tick = self.canvas.current_tick
+        x, y = creature.rect.center
+        hx, hy = creature.direction
+        entry = creature._percept
+        stats = self.stats[species]
+        if entry is not None and self._fresh(entry, tick, x, y, hx, hy, self.cadence[species]):
+            targets = entry[5]
+            stats['reused'] += 1
+            if self.auditing():
+                truth = exact()
+                same = (targets[0] if targets else None) is (truth[0] if truth else None)
+                self._audit_sprite(species, same)
+            return targets
+        start = time.perf_counter()
+        targets = exact()
+        self._window[species][0] += time.perf_counter() - start
+        creature._percept = (tick, x, y, hx, hy, targets, [t.rect.center for t in targets])
+        stats['sensed'] += 1
+        if self.auditing():
+            self._audit_sprite(species, True)
+        return targets
+
+    def _audit_sprite(self, species, same):
+        """精灵引擎逐个体计入审计（每个物种在本tick最后一个个体之后由 end_tick 调整 cadence）"""
+        stats, window = self.stats[species], self._window[species]
+        stats['audited'] += 1
+        window[2] += 1
+        if not same:
+            stats['diverged'] += 1
+            window[3] += 1
+
+    def end_tick(self):
+        """精灵引擎每tick末调用：累计tick数，审计tick后调整 cadence"""
+        for species in SPECIES:
+            self._window[species][1] += 1
+            if self.auditing():
+                self._adapt(species)
+
+    def _fresh(self, entry, tick, x, y, hx, hy, cadence):
+        sensed, x0, y0, hx0, hy0, targets, positions = entry
+        margin2 = self.margin2
+        if tick - sensed >= cadence or (x - x0) ** 2 + (y - y0) ** 2 > margin2 or hx * hx0 + hy * hy0 < self.turn_cos:
+            return False
+        for target, (tx, ty) in zip(targets, positions):
+            cx, cy = target.rect.center
+            if target.dead or (cx - tx) ** 2 + (cy - ty) ** 2 > margin2:
+                return False
+        return True
+
+    # ---------- 数组引擎 ----------
+    def _columns(self, species, n):
+        """该物种的缓存列（新个体追加为从未感知）"""
+        cols = self._arrays.get(species)
+        if cols is None:
+            cols = self._arrays[species] = {
+                'tick': np.full(0, _NEVER, dtype=np.int64), 'target': np.zeros(0, dtype=np.int64),
+                'x': np.zeros(0), 'y': np.zeros(0), 'dx': np.zeros(0), 'dy': np.zeros(0),
+                'tx': np.zeros(0), 'ty': np.zeros(0),
+            }
+        grow = n - len(cols['tick'])
+        if grow > 0:
+            for name, col in cols.items():
+                fill = _NEVER if name == 'tick' else -1 if name == 'target' else 0
+                cols[name] = np.concatenate([col, np.full(grow, fill, dtype=col.dtype)])
+        return cols
+
+    def sense_array(self, species, s, t, exact):
+        """物种数组 s 对目标数组 t 的感知：只对过期个体调用 exact(mask)，返回 (每个个体的第一个目标下标, 点对数)
+
+        exact(mask) 返回 (目标下标数组, 点对数)，mask 为 None 时感知全体（审计用）。
+        """
+        cols = self._columns(species, s.n)
+        tick = self.canvas.current_tick
+        stats, window = self.stats[species], self._window[species]
+        target = cols['target']
+        has = target >= 0
+        safe = np.where(has, target, 0)
+        stale = (
+            (tick - cols['tick'] >= self.cadence[species])
+            | ((s.x - cols['x']) ** 2 + (s.y - cols['y']) ** 2 > self.margin2)
+            | (s.dx * cols['dx'] + s.dy * cols['dy'] < self.turn_cos)
+            | (has & ((t.x[safe] - cols['tx']) ** 2 + (t.y[safe] - cols['ty']) ** 2 > self.margin2))
+        ) if len(t.x) else np.ones(s.n, dtype=bool)
+        if stale.any():
+            start = time.perf_counter()
+            fresh, pairs = exact(stale)
+            window[0] += time.perf_counter() - start
+        else:
+            fresh, pairs = np.full(s.n, -1, dtype=np.int64), 0
+        window[1] += 1
+        result = np.where(stale, fresh, target)
+        # 写回重新感知的个体
+        idx = np.flatnonzero(stale)
+        found = fresh[idx]
+        cols['tick'][idx] = tick
+        cols['target'][idx] = found
+        cols['x'][idx], cols['y'][idx] = s.x[idx], s.y[idx]
+        cols['dx'][idx], cols['dy'][idx] = s.dx[idx], s.dy[idx]
+        hit = found >= 0
+        cols['tx'][idx[hit]], cols['ty'][idx[hit]] = t.x[found[hit]], t.y[found[hit]]
+        stats['sensed'] += len(idx)
+        stats['reused'] += s.n - len(idx)
+        if self.auditing():
+            truth, _ = exact(None)
+            self._audit(species, s.n, int(np.count_nonzero(result != truth)))
+        return result, pairs
+
+    def compact(self, species, dead, target_dead):
+        """数组引擎批量死亡后同步压缩缓存列，并把目标下标换算到压缩后的目标数组（目标已死亡的个体视为过期）"""
+        if species not in self._arrays:
+            return
+        n = len(dead)
+        cols = self._columns(species, n)
+        keep = ~dead
+        for name in cols:
+            cols[name] = cols[name][:n][keep]
+        target = cols['target']
+        has = np.flatnonzero(target >= 0)
+        lost = has[target_dead[target[has]]]
+        remap = np.cumsum(~target_dead) - 1
+        target[has] = remap[target[has]]
+        target[lost] = -1
+        cols['tick'][lost] = _NEVER
+
+    def summary(self):
+        """各物种的重新感知比例、审计偏差率与当前 cadence"""
+        rows = {}
+        for species, stats in self.stats.items():
+            total = stats['sensed'] + stats['reused']
+            rows[species] = {
+                **stats, 'cadence': self.cadence[species],
+                'sense_rate': stats['sensed'] / total if total else 0.0,
+                'divergence': stats['diverged'] / stats['audited'] if stats['audited'] else 0.0,
+            }
+        return rows
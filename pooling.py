@@ -0,0 +1,50 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: pooling
+Propose: Deferred spawn/despawn queue (births and deaths applied in one batch per phase)
+'''
+
+# import modules
+import pygame
+
+from spatial_index import grid_insert
+
+
+class SpawnQueue:
+    """一个更新阶段内的出生/死亡请求
+
+    阶段内只登记：死亡个体立即标记 dead=True（空间网格查询按此剔除），仍留在精灵组中；
+    新生个体暂不加入精灵组。阶段末 flush 按请求顺序一次性移出死亡个体、加入新生个体并插入空间网格，
+    精灵组的最终顺序与逐个即时增删相同（迭代的是阶段开始时的快照，同物种之间不互相查询）。
+    传入 events 时 flush 按物种累计出生/死亡数（见 metrics.EVENTS）。
+    """
+    def __init__(self, events=None):
+        self.events = events
+        self.births = [] # (精灵组, 新生个体)
+        self.deaths = []
+
+    def spawn(self, group, sprite):
+        self.births.append((group, sprite))
+
+    def despawn(self, sprite):
+        sprite.dead = True
+        self.deaths.append(sprite)
+
+    def flush(self):
+        for sprite in self.deaths:
+            pygame.sprite.Sprite.kill(sprite) # 子类的 kill 只登记死亡
+        for group, sprite in self.births:
+            group.add(sprite)
+            grid_insert(group, sprite)
+        events = self.events
+        if events is not None:
+            for sprite in self.deaths:
+                events[sprite.SPECIES + '_deaths'] += 1
+            for _, sprite in self.births:
+                events[sprite.SPECIES + '_births'] += 1
+        self.deaths.clear()
+        self.births.clear()
@@ -0,0 +1,167 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: profiler
+Propose: Opt-in per-phase tick timing, event counters, rolling percentiles and export
+'''
+
+# import modules
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+# 计时阶段（attack/eat 分别包含在 predators/prey 之内，单独列出便于定位碰撞开销）
+PHASES = ('spawn', 'sample', 'grid', 'predators', 'attack', 'prey', 'eat', 'io', 'draw', 'charts', 'flip', 'total')
+# 每tick计数：感知候选对、碰撞（攻击接触/进食）、出生、死亡
+COUNTERS = ('perception', 'collisions', 'births', 'deaths')
+_PHASE_INDEX = {name: i for i, name in enumerate(PHASES)}
+_COUNTER_INDEX = {name: i for i, name in enumerate(COUNTERS)}
+
+
+class Profiler:
+    """分阶段tick计时器
+
+    挂到画布上后（canvas.profiler）由 GameCanvas.step/render 与两种引擎在各阶段边界调用 lap/add/count；
+    未启用时画布上为 None，各处只多一次 None 判断。
+    最近 window 个tick的数据保存在定长数组中用于滚动分位数；指定 path 时每满一个窗口批量导出（.csv 或 JSON Lines）。
+    """
+    def __init__(self, canvas, window=600, path=None, overlay=False, overlay_interval=30):
+        self.canvas = canvas
+        self.window = window
+        self.path = path
+        self.overlay = overlay # 是否在FPS旁显示统计
+        self.overlay_interval = overlay_interval # 浮层刷新间隔（tick）
+        self.times = np.zeros((window, len(PHASES)))
+        self.counts = np.zeros((window, len(COUNTERS)), dtype=np.int64)
+        self.ticks = np.zeros(window, dtype=np.int64)
+        self.rows = 0 # 已记录的tick数
+        self.exported = 0 # 已导出的tick数
+        self._phase = [0.0] * len(PHASES)
+        self._counter = [0] * len(COUNTERS)
+        self._start = self._last = 0.0
+        self._population = 0
+        self._overlay_surface = None
+        if path is not None:
+            open(path, 'w').close() # 新建（清空）导出文件
+        canvas.profiler = self
+        if canvas.world is not None:
+            canvas.world.profiler = self
+
+    # ---------- 计时（热路径） ----------
+    def begin(self):
+        """tick开始"""
+        self._start = self._last = time.perf_counter()
+        self._phase = [0.0] * len(PHASES)
+        self._counter = [0] * len(COUNTERS)
+        self._population = len(self.canvas.predators) + len(self.canvas.prey)
+
+    def lap(self, phase):
+        """自上一次 lap 以来的耗时计入 phase"""
+        now = time.perf_counter()
+        self._phase[_PHASE_INDEX[phase]] += now - self._last
+        self._last = now
+
+    def add(self, phase, seconds):
+        """计入嵌套阶段的耗时（不影响 lap 的起点）"""
+        self._phase[_PHASE_INDEX[phase]] += seconds
+
+    def count(self, counter, n=1):
+        self._counter[_COUNTER_INDEX[counter]] += n
+
+    def end(self):
+        """tick结束：死亡数由种群变化推算，写入一行记录"""
+        canvas = self.canvas
+        self._phase[-1] = self._last - self._start # 整个tick（至最后一个阶段结束，不含帧率等待）
+        births = self._counter[_COUNTER_INDEX['births']]
+        self._counter[_COUNTER_INDEX['deaths']] = (
+            self._population + births - len(canvas.predators) - len(canvas.prey)
+        )
+        row = self.rows % self.window
+        self.times[row] = self._phase
+        self.counts[row] = self._counter
+        self.ticks[row] = canvas.current_tick
+        self.rows += 1
+        if self.path is not None and self.rows - self.exported >= self.window:
+            self.flush()
+        if self.overlay and self.rows % self.overlay_interval == 0:
+            self._overlay_surface = None
+
+    # ---------- 统计 ----------
+    def _recent(self):
+        """窗口内的记录（按时间顺序）"""
+        filled = min(self.rows, self.window)
+        order = (np.arange(self.rows - filled, self.rows)) % self.window
+        return self.ticks[order], self.times[order], self.counts[order]
+
+    def percentiles(self, q=(50, 95, 99)):
+        """窗口内各阶段耗时分位数（毫秒）：{阶段: (p50, p95, p99)}"""
+        _, times, _ = self._recent()
+        if not len(times):
+            return {}
+        values = np.percentile(times * 1000, q, axis=0)
+        return {name: tuple(values[:, i].tolist()) for i, name in enumerate(PHASES)}
+
+    def mean_counts(self):
+        """窗口内每tick平均计数"""
+        _, _, counts = self._recent()
+        if not len(counts):
+            return {}
+        return dict(zip(COUNTERS, counts.mean(axis=0).tolist()))
+
+    def summary(self):
+        return {'ticks': self.rows, 'phases_ms': self.percentiles(), 'counts_per_tick': self.mean_counts()}
+
+    # ---------- 导出 ----------
+    def flush(self):
+        """把尚未导出的记录追加写入文件（超出窗口而被覆盖的部分会丢失，故每满一个窗口自动导出一次）"""
+        if self.path is None or self.exported == self.rows:
+            return
+        start = max(self.exported, self.rows - self.window)
+        order = np.arange(start, self.rows) % self.window
+        ticks = self.ticks[order].tolist()
+        times = (self.times[order] * 1000).round(4).tolist()
+        counts = self.counts[order].tolist()
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            if self.path.endswith('.csv'):
+                writer = csv.writer(f)
+                if self.exported == 0:
+                    writer.writerow(['tick', *(f'{name}_ms' for name in PHASES), *COUNTERS])
+                writer.writerows([tick, *t, *c] for tick, t, c in zip(ticks, times, counts))
+            else:
+                for tick, t, c in zip(ticks, times, counts):
+                    record = {'tick': tick, **dict(zip(PHASES, t)), **dict(zip(COUNTERS, c))}
+                    f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.exported = self.rows
+
+    def close(self):
+        self.flush()
+        if self.canvas.profiler is self:
+            self.canvas.profiler = None
+            if self.canvas.world is not None:
+                self.canvas.world.profiler = None
+
+    # ---------- 屏幕浮层 ----------
+    def overlay_surface(self, font):
+        """分位数表 Surface（每 overlay_interval 个tick重绘一次，其间返回同一对象）"""
+        if self._overlay_surface is None:
+            lines = ['phase       p50    p95    p99 ms']
+            for name, (p50, p95, p99) in self.percentiles().items():
+                lines.append(f'{name:<9}{p50:7.2f}{p95:7.2f}{p99:7.2f}')
+            lines += [f'{name:<12}{value:9.1f}/tick' for name, value in self.mean_counts().items()]
+            rendered = [font.render(line, True, (255,255,255)) for line in lines]
+            height = sum(text.get_height() for text in rendered)
+            width = max((text.get_width() for text in rendered), default=0)
+            overlay = pygame.Surface((width + 10, height + 10), pygame.SRCALPHA)
+            overlay.fill((30,30,30,160))
+            y = 5
+            for text in rendered:
+                overlay.blit(text, (5, y))
+                y += text.get_height()
+            self._overlay_surface = overlay
+        return self._overlay_surface
@@ -0,0 +1,60 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: sim_random
+Propose: Seedable per-subsystem random streams for reproducible runs
+'''
+
+# import modules
+import numpy as np
+
+# 各子系统独立的随机数流（新增流请追加在末尾，以免改变已有流的种子派生）
+STREAMS = ('spawn', 'plant', 'predator', 'prey', 'engine', 'genome')
+
+
+class SimRandom:
+    """模拟随机数：由一个种子派生出各子系统互不干扰的 NumPy Generator"""
+    def __init__(self, seed=None):
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.seed = self.seed_sequence.entropy # 未指定种子时记录实际使用的熵，便于复现
+        children = self.seed_sequence.spawn(len(STREAMS))
+        self.streams = {name: np.random.default_rng(child) for name, child in zip(STREAMS, children)}
+
+    def __getitem__(self, name):
+        return self.streams[name]
+
+    def get_state(self):
+        """所有流的位生成器状态（可序列化为 JSON）"""
+        return {name: rng.bit_generator.state for name, rng in self.streams.items()}
+
+    def set_state(self, state):
+        """恢复所有流的位生成器状态"""
+        for name, value in state.items():
+            self.streams[name].bit_generator.state = value
+
+
+# 未显式传入随机流时的后备（不可复现，仅供单独构造生物/植物时使用）
+_fallback = SimRandom()
+
+
+def default_stream(name):
+    """后备随机流"""
+    return _fallback[name]
+
+
+def fingerprint(canvas):
+    """画布当前状态的可比较摘要：(种群采样, (个体状态, 性状均值序列))"""
+    if canvas.world is not None:
+        state = [canvas.world.predators.x.tobytes(), canvas.world.prey.energy.tobytes()]
+    else:
+        state = [
+            (c.rect.center, c.energy, c.stamina, c.direction.x, c.direction.y)
+            for c in (*canvas.predators, *canvas.prey)
+        ]
+    traits = [np.asarray(values).tobytes() for means in canvas.trait_series().values() for values in means.values()] # 灭绝后均值为 nan，按字节比较
+    series = {name: history.series() for name, history in canvas.history.items()} # 环形缓冲中的采样（超长运行只比较最近的采样）
+    return series, (state, traits)
+
@@ -0,0 +1,842 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: soa_engine
+Propose: Structure-of-arrays NumPy engine that applies the creature rules in batches
+'''
+
+# import modules
+from types import SimpleNamespace
+import time
+
+import numpy as np
+import pygame
+
+from creature_def import WANDER_TURN_PERIOD, WANDER_TURN_WINDOW, Predator, Prey
+from biomass import FORAGE_RADIUS, forage_cells
+from genome import MUTATION, TRAITS, mutate
+from perception import cone_mask, senses_array, take_senses, within_mask
+from spatial_index import grid_pairs
+from sprite_cache import get_atlas
+
+# 每个物种的数组字段（连续存储，按出生顺序排列）
+FLOAT_FIELDS = (
+    'x', 'y', 'dx', 'dy', 'speed', 'energy', 'stamina',
+    'hunt_cooldown', 'reproduce_cooldown', 'reproduce_timer',
+    'wander_duration', 'reproduce_duration',
+)
+BOOL_FIELDS = ('is_chasing', 'is_reproducing', 'is_fleeing')
+
+# 从精灵类读取的物种参数（与 creature_def 保持同一份数值）
+PARAM_NAMES = (
+    'speed', 'energy', 'stamina', 'max_speed', 'fov_angle', 'sensory_distance',
+    'hearing_radius', 'radius', 'chase_stamina_threshold', 'HUNT_COOLDOWN',
+    'max_energy', 'reproduce_threshold_ratio',
+)
+
+
+def species_params(cls):
+    """读取精灵类的默认属性作为数组引擎的物种参数"""
+    sample = cls(0, 0)
+    params = {name: getattr(sample, name) for name in PARAM_NAMES}
+    params['hunger_threshold'] = getattr(sample, 'hunger_threshold', 0)
+    params['half_size'] = sample.rect.width / 2
+    params['image'] = sample.image
+    return params
+
+
+def _normalize(vx, vy):
+    """批量单位化（零向量保持不变）"""
+    length = np.hypot(vx, vy)
+    safe = np.where(length > 0, length, 1.0)
+    return vx / safe, vy / safe
+
+
+# ---------- 感知/接触内核 ----------
+# 纯函数：只读输入数组 a（qx/qy 为查询个体，tx/ty 为目标），返回 (查询下标, 结果, 点对数)。
+# bounds 为 None 时处理全部查询个体，否则只处理 x 落在 [lo, hi) 条带内的查询个体，
+# 目标按半径外扩后取子集（保持原顺序），因此每个个体的结果与条带划分无关。
+
+def strip_indices(x, bounds=None, pad=0.0, mask=None):
+    """条带内（外扩 pad）的下标，按原顺序"""
+    if bounds is None:
+        return np.arange(len(x)) if mask is None else np.flatnonzero(mask)
+    lo, hi = bounds
+    inside = (x >= lo - pad) & (x < hi + pad)
+    if mask is not None:
+        inside &= mask
+    return np.flatnonzero(inside)
+
+
+def first_target(qi, tj, valid, count):
+    """每个查询个体满足条件的第一个目标（点对需按查询下标排序；无则 -1）"""
+    first = np.full(count, -1, dtype=np.int64)
+    qi, tj = qi[valid], tj[valid]
+    if len(qi):
+        uq, idx = np.unique(qi, return_index=True)
+        first[uq] = tj[idx]
+    return first
+
+
+def _global_targets(first, tidx):
+    """子集内的目标下标 -> 原下标"""
+    result = np.full(len(first), -1, dtype=np.int64)
+    hit = first >= 0
+    result[hit] = tidx[first[hit]]
+    return result
+
+
+def sense_first(a, params, bounds=None):
+    """视野（及听觉）范围内按目标顺序的第一个目标
+
+    每个查询个体的视距、视野角度与听觉半径取自 a['qsensory']/a['qfov']/a['qhearing']（性状随个体变化，
+    无 qhearing 时不做听觉判定）；有 a['qmask'] 时只处理选中的查询个体；params = (是否排除重合目标,)
+    """
+    distinct, = params
+    hearing = a.get('qhearing')
+    # 近邻候选按各自的感知半径取（格子按最大半径划分），再按各自的性状精确判定；条带外扩取全体的最大半径（与条带划分无关）
+    reach = a['qsensory'] if hearing is None else np.maximum(a['qsensory'], hearing)
+    qidx = strip_indices(a['qx'], bounds, mask=a.get('qmask'))
+    tidx = strip_indices(a['tx'], bounds, float(reach.max(initial=0)))
+    qi, tj = grid_pairs(a['qx'][qidx], a['qy'][qidx], a['tx'][tidx], a['ty'][tidx], reach[qidx])
+    gq, gt = qidx[qi], tidx[tj]
+    ddx, ddy = a['tx'][gt] - a['qx'][gq], a['ty'][gt] - a['qy'][gq]
+    d2 = ddx ** 2 + ddy ** 2
+    s = take_senses(senses_array(a['qfov'][qidx], a['qsensory'][qidx], 0 if hearing is None else hearing[qidx]), qi)
+    sensed = cone_mask(s, a['qdx'][gq], a['qdy'][gq], ddx, ddy, d2) & within_mask(d2, s.sensory, s.sensory2)
+    if hearing is not None:
+        sensed |= within_mask(d2, s.hearing, s.hearing2)
+    if distinct:
+        sensed &= (ddx != 0) | (ddy != 0)
+    return qidx, _global_targets(first_target(qi, tj, sensed, len(qidx)), tidx), len(qi)
+
+
+def nearest_target(a, params, bounds=None):
+    """qmask 选中的查询个体在半径内最近的目标（距离相同取下标小者）；params = (半径,)"""
+    radius, = params
+    qidx = strip_indices(a['qx'], bounds, mask=a['qmask'])
+    tidx = strip_indices(a['tx'], bounds, radius)
+    qi, tj = grid_pairs(a['qx'][qidx], a['qy'][qidx], a['tx'][tidx], a['ty'][tidx], radius)
+    pairs = len(qi)
+    gq, gt = qidx[qi], tidx[tj]
+    ddx, ddy = a['tx'][gt] - a['qx'][gq], a['ty'][gt] - a['qy'][gq]
+    d2 = ddx ** 2 + ddy ** 2
+    keep = within_mask(d2, radius, radius * radius)
+    qi, tj, d2 = qi[keep], tj[keep], d2[keep]
+    order = np.lexsort((tj, d2, qi))
+    nearest = first_target(qi[order], tj[order], np.ones(len(qi), dtype=bool), len(qidx))
+    return qidx, _global_targets(nearest, tidx), pairs
+
+
+class SpeciesArrays:
+    """单个物种的结构化数组存储
+
+    基因组是一个 (容量, 性状数) 的二维列（genome），与其余列一起按出生顺序压缩/追加；
+    行为代码通过 trait(name) 取得某一性状的逐个体视图。
+    """
+    def __init__(self, params, traits=(), capacity=64):
+        self.params = params
+        self.traits = traits
+        self.trait_index = {t.name: k for k, t in enumerate(traits)}
+        self.n = 0
+        self._cols = {name: np.zeros(capacity) for name in FLOAT_FIELDS}
+        self._cols.update({name: np.zeros(capacity, dtype=bool) for name in BOOL_FIELDS})
+        self._cols['genome'] = np.zeros((capacity, len(traits)))
+
+    def __getattr__(self, name):
+        cols = self.__dict__.get('_cols')
+        if cols is not None and name in cols:
+            return cols[name][:self.n] # 返回视图，原地修改即写回
+        raise AttributeError(name)
+
+    def __len__(self):
+        return self.n
+
+    def _reserve(self, count):
+        capacity = len(self._cols['x'])
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name, col in self._cols.items():
+            grown = np.zeros((capacity, *col.shape[1:]), dtype=col.dtype)
+            grown[:self.n] = col[:self.n]
+            self._cols[name] = grown
+
+    def trait(self, name):
+        """某一性状的逐个体视图（原地修改即写回基因组）"""
+        return self._cols['genome'][:self.n, self.trait_index[name]]
+
+    def set_trait(self, name, value):
+        """覆盖全体个体的性状（参数扫描用），同时作为之后始祖个体的默认值"""
+        self.trait(name)[:] = value
+        self.params[name] = value
+
+    def add(self, x, y, rng, energy=None, hunt_cooldown=0, genome=None):
+        """批量出生（追加在末尾）；genome 为子代基因组（每行一个个体），None 时取物种默认性状"""
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        count = len(x)
+        if count == 0:
+            return
+        start, end = self.n, self.n + count
+        self._reserve(end)
+        cols = self._cols
+        for col in cols.values():
+            col[start:end] = 0
+        cols['x'][start:end] = np.rint(x)
+        cols['y'][start:end] = np.rint(np.atleast_1d(np.asarray(y, dtype=float)))
+        angle = np.radians(rng.uniform(0, 360, count))
+        cols['dx'][start:end] = np.cos(angle)
+        cols['dy'][start:end] = np.sin(angle)
+        if genome is None:
+            cols['genome'][start:end] = [self.params[t.name] for t in self.traits]
+        else:
+            cols['genome'][start:end] = genome
+        cols['energy'][start:end] = self.params['energy'] if energy is None else energy
+        # 初始速度与耐力由基因组决定
+        cols['speed'][start:end] = cols['genome'][start:end, self.trait_index['speed']]
+        cols['stamina'][start:end] = cols['genome'][start:end, self.trait_index['stamina']]
+        cols['hunt_cooldown'][start:end] = hunt_cooldown
+        self.n = end
+
+    def remove(self, dead):
+        """批量死亡（保持存活个体的相对顺序）"""
+        if not dead.any():
+            return
+        keep = ~dead
+        count = int(keep.sum())
+        for col in self._cols.values():
+            col[:count] = col[:self.n][keep]
+        self.n = count
+
+
+class PlantArrays:
+    """植物的结构化数组存储"""
+    def __init__(self, capacity=256):
+        self.n = 0
+        self._cols = {
+            'x': np.zeros(capacity), 'y': np.zeros(capacity), 'energy': np.zeros(capacity),
+            'cluster_id': np.zeros(capacity, dtype=np.int64),
+            'variant': np.zeros(capacity, dtype=np.int64),
+        }
+
+    __getattr__ = SpeciesArrays.__getattr__
+    __len__ = SpeciesArrays.__len__
+    _reserve = SpeciesArrays._reserve
+    remove = SpeciesArrays.remove
+
+    def add(self, x, y, cluster_id, variant, energy=30.0):
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        count = len(x)
+        if count == 0:
+            return
+        start, end = self.n, self.n + count
+        self._reserve(end)
+        cols = self._cols
+        cols['x'][start:end] = np.rint(x)
+        cols['y'][start:end] = np.rint(np.atleast_1d(np.asarray(y, dtype=float)))
+        cols['energy'][start:end] = energy
+        cols['cluster_id'][start:end] = cluster_id
+        cols['variant'][start:end] = variant
+        self.n = end
+
+
+class ArrayGroupView:
+    """轻量精灵视图：只用于绘制与计数，接口与 pygame.sprite.Group 的 draw/len 相同"""
+    def __init__(self, arrays, images, half_size):
+        self.arrays = arrays
+        self.images = images
+        self.half_size = half_size
+
+    def __len__(self):
+        return len(self.arrays)
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def sprites(self):
+        """按需生成精灵视图（仅供调试/兼容，绘制走 draw）"""
+        views = []
+        for image, pos in self._blit_sequence():
+            sprite = pygame.sprite.Sprite()
+            sprite.image = image
+            sprite.rect = image.get_rect(topleft=pos)
+            views.append(sprite)
+        return views
+
+    def _blit_sequence(self):
+        arrays = self.arrays
+        left = (arrays.x - self.half_size).astype(int).tolist()
+        top = (arrays.y - self.half_size).astype(int).tolist()
+        if len(self.images) == 1:
+            image = self.images[0]
+            return [(image, pos) for pos in zip(left, top)]
+        images = self.images
+        return [(images[v], pos) for v, pos in zip(arrays.variant.tolist(), zip(left, top))]
+
+    def draw(self, surface, camera=None):
+        """绘制；指定 camera 时只绘制视口内的个体"""
+        if camera is None:
+            surface.blits(self._blit_sequence(), doreturn=False)
+            return
+        surface.blits(self.blits(camera), doreturn=False)
+
+    def blits(self, camera):
+        """视口内个体的 (图像, 屏幕位置) 列表"""
+        arrays = self.arrays
+        return camera.point_blits(arrays.x, arrays.y, self.images, arrays.variant if len(self.images) > 1 else None)
+
+
+def run_kernel(kernel, arrays, params):
+    """串行执行感知/接触内核：返回每个查询个体的结果（无则 -1）与点对数"""
+    out = np.full(len(arrays['qx']), -1, dtype=np.int64)
+    qidx, values, pairs = kernel(arrays, params)
+    out[qidx] = values
+    return out, pairs
+
+
+def sense_exact(query, params):
+    """逐tick精确感知（未挂感知缓存时）：视野/听觉范围内按目标顺序的第一个目标与点对数"""
+    return run_kernel(sense_first, query, params)
+
+
+# ---------- 分块意图 ----------
+# 每个阶段（先捕食者、后被捕食者）分三步：
+# 1. 主进程取本阶段开始时的快照（本物种与目标的列，阶段内只读），并为每个个体预先抽取本阶段要用的随机数；
+# 2. 意图函数 fn(a, out, params, bounds) 只处理快照中 x 落在条带 [lo, hi) 内的个体：移动、感知、追逐/逃跑/觅食、
+#    游荡与繁殖计时，把这些个体的下一状态写入输出列 out 中它们自己的行，返回点对数与接触候选等附加结果；
+# 3. 主进程按固定顺序合并：接触（攻击、进食）同时结算，再结算依赖接触结果的代谢与繁殖，批量出生/死亡。
+# 个体只读快照与自己的随机数，目标按本条带个体的实际范围外扩后取子集（保持原顺序），
+# 因此结果与条带划分无关：bounds 为 None（串行）与任意条带划分（parallel.TileExecutor）逐位一致。
+
+def _targets(tx, qx, pad, bounds):
+    """目标中 x 落在查询个体范围外扩 pad 内的下标（按原顺序）；不分条带时取全部目标"""
+    if bounds is None or not len(qx):
+        return np.arange(len(tx) if bounds is None else 0)
+    return np.flatnonzero((tx >= qx.min() - pad) & (tx <= qx.max() + pad))
+
+
+def merge_intents(results):
+    """按条带顺序合并各条带的附加结果：计数相加，下标数组（或数组元组）依次拼接"""
+    merged = {}
+    for key, value in results[0].items():
+        values = [result[key] for result in results]
+        if isinstance(value, tuple):
+            merged[key] = tuple(np.concatenate(parts) for parts in zip(*values))
+        elif isinstance(value, np.ndarray):
+            merged[key] = np.concatenate(values)
+        else:
+            merged[key] = sum(values)
+    return merged
+
+
+def _edge_bounce(c, half, width, height, mask):
+    """边缘反弹：矩形夹回画布，被夹的方向分量取反"""
+    for pos, vel, limit in ((c['x'], c['dx'], width), (c['y'], c['dy'], height)):
+        clamped = np.clip(pos, half, limit - half)
+        hit = mask & (clamped != pos)
+        pos[mask] = clamped[mask]
+        vel[hit] *= -1
+
+
+def _move(c, mask):
+    c['x'][mask] = np.rint(c['x'][mask] + c['dx'][mask] * c['speed'][mask])
+    c['y'][mask] = np.rint(c['y'][mask] + c['dy'][mask] * c['speed'][mask])
+
+
+def _steer(c, idx, tx, ty, t):
+    """方向向目标方向线性插值后单位化"""
+    c['dx'][idx], c['dy'][idx] = _normalize(
+        c['dx'][idx] + (tx - c['dx'][idx]) * t,
+        c['dy'][idx] + (ty - c['dy'][idx]) * t,
+    )
+
+
+def _prey_wander(c, mask, angle=None):
+    """被捕食者游荡；angle 为本tick转向时每个个体的转角（度），不转向的tick为 None"""
+    if angle is not None:
+        idx = np.flatnonzero(mask)
+        radians = np.radians(angle[idx]) # 被捕食者转向更灵活
+        cos, sin = np.cos(radians), np.sin(radians)
+        dx, dy = c['dx'][idx], c['dy'][idx]
+        c['dx'][idx], c['dy'][idx] = _normalize(dx * cos - dy * sin, dx * sin + dy * cos)
+    c['speed'][mask] = np.maximum(1.5, c['speed'][mask] - 0.05)
+    c['stamina'][mask] = np.minimum(c['stamina'][mask] + 0.04, 90)
+
+
+def reproduce_block(c, ratio, max_energy, eligible, extra_condition, step_down, wander_bonus, roll, chance, cooldown):
+    """繁殖计时与触发（返回触发繁殖的个体下标）；ratio 为繁殖能量比例性状，roll 为每个个体的 [0, 1) 随机数"""
+    ok = eligible & extra_condition & (c['energy'] >= max_energy * ratio) & (c['reproduce_cooldown'] <= 0)
+    rest = eligible & ~ok
+    c['reproduce_timer'][ok] += 1
+    c['wander_duration'][ok] += 1 + (wander_bonus[ok] if wander_bonus is not None else 0)
+    c['reproduce_timer'][rest] = np.maximum(0, c['reproduce_timer'][rest] - step_down)
+    c['wander_duration'][rest] = 0
+    trigger = (
+        eligible & (c['reproduce_timer'] >= 180) & (c['wander_duration'] >= 60)
+        & ~c['is_chasing'] & (c['reproduce_cooldown'] <= 0)
+        & (roll < chance)
+    )
+    idx = np.flatnonzero(trigger)
+    c['energy'][idx] = np.maximum(c['energy'][idx] * 0.6, 0)
+    c['reproduce_cooldown'][idx] = cooldown
+    return idx
+
+
+# 意图函数写入的本物种列（被捕食者另有 alive：未被捕杀且能量未耗尽）
+PREDATOR_OUTPUTS = (
+    'x', 'y', 'dx', 'dy', 'speed', 'energy', 'stamina', 'is_chasing', 'is_reproducing', 'reproduce_duration',
+)
+PREY_COLUMNS = (
+    'x', 'y', 'dx', 'dy', 'speed', 'energy', 'stamina', 'hunt_cooldown', 'reproduce_timer', 'wander_duration',
+    'reproduce_cooldown', 'is_chasing', 'is_reproducing', 'is_fleeing', 'reproduce_duration',
+)
+PREY_OUTPUTS = PREY_COLUMNS + ('alive',)
+
+
+def predator_intents(a, out, params, bounds=None, sense=None):
+    """捕食者意图：边缘反弹、移动、感知视野内第一个猎物、追逐或游荡、繁殖中停留
+
+    a 中 tx/ty 为猎物位置，rturn/rdir 为预先抽取的游荡转向概率与两组随机方向（重合时、转向时）；
+    sense 为挂有感知缓存时主进程传入的感知函数。返回感知点对数与捕食者-猎物接触点对（攻击由主进程结算）。
+    """
+    rows = strip_indices(a['x'], bounds)
+    c = {name: a[name][rows] for name in PREDATOR_OUTPUTS}
+    x, y, dx, dy, speed, stamina, energy = (c[name] for name in ('x', 'y', 'dx', 'dy', 'speed', 'stamina', 'energy'))
+    rturn, rdir = a['rturn'][rows], a['rdir'][rows]
+    _edge_bounce(c, params['half_size'], params['width'], params['height'], np.ones(len(rows), dtype=bool))
+    moving = ~c['is_reproducing']
+    _move(c, moving)
+    # 感知：视野内的第一个猎物
+    sensory = a['sensory_distance'][rows]
+    tidx = _targets(a['tx'], x, float(sensory.max(initial=0)) + 1, bounds)
+    tx, ty = a['tx'][tidx], a['ty'][tidx]
+    target, pairs = (sense or sense_exact)({
+        'qx': x, 'qy': y, 'qdx': dx, 'qdy': dy, 'tx': tx, 'ty': ty,
+        'qsensory': sensory, 'qfov': a['fov_angle'][rows],
+    }, (False,))
+    hunting = moving & (target >= 0) & (a['hunt_cooldown'][rows] <= 0)
+    # 追逐
+    idx = np.flatnonzero(hunting)
+    tdx, tdy = tx[target[idx]] - x[idx], ty[target[idx]] - y[idx]
+    overlap = (tdx == 0) & (tdy == 0)
+    stuck = idx[overlap]
+    dx[stuck], dy[stuck] = _normalize(rdir[stuck, 0], rdir[stuck, 1])
+    idx, tdx, tdy = idx[~overlap], tdx[~overlap], tdy[~overlap]
+    ux, uy = _normalize(tdx, tdy)
+    _steer(c, idx, ux, uy, 0.2)
+    _steer(c, idx, ux, uy, 0.15)
+    speed[idx] = np.minimum(a['max_speed'][rows][idx], speed[idx] * 1.08)
+    stamina[idx] = np.maximum(stamina[idx] - 0.4, 0)
+    energy[idx] = np.maximum(energy[idx] - 0.05, 0)
+    c['is_chasing'][idx] = True
+    tired = hunting & (stamina <= params['chase_stamina_threshold'])
+    c['is_chasing'][tired] = False
+    # 游荡
+    idle = ((moving & ~hunting) | tired) & ~c['is_chasing']
+    turn = idle & (rturn < 0.02)
+    dx[turn], dy[turn] = _normalize(rdir[turn, 2], rdir[turn, 3])
+    low = idle & (energy <= params['max_energy'] * 0.3)
+    calm = idle & ~low
+    speed[low] = np.minimum(2.5, speed[low] + 0.01)
+    speed[calm] = np.maximum(1.5, speed[calm] - 0.02)
+    stamina[idle] = np.minimum(stamina[idle] + 1, 100)
+    # 繁殖中原地停留
+    resting = ~moving
+    c['reproduce_duration'][resting] -= 1
+    c['is_reproducing'][resting & (c['reproduce_duration'] <= 0)] = False
+    # 与猎物的接触点对
+    reach = params['reach']
+    cidx = _targets(a['tx'], x, reach + 1, bounds)
+    qi, tj = grid_pairs(x, y, a['tx'][cidx], a['ty'][cidx], reach)
+    for name, value in c.items():
+        out[name][rows] = value
+    return {'pairs': pairs, 'contacts': (rows[qi], cidx[tj])}
+
+
+def prey_intents(a, out, params, bounds=None, sense=None):
+    """被捕食者意图：感知捕食者并逃跑、饥饿时觅食、游荡与移动、繁殖计时（第一段）与代谢
+
+    a 中 tx/ty 为捕食者位置，fx/fy 为植物位置，grass 为植被能量网格（未启用时没有），alive 为本tick未被捕杀，
+    rdir/rangle/rrep 为预先抽取的随机方向、两次游荡转角与繁殖概率。
+    返回感知点对数、触发繁殖的个体与植物-被捕食者接触点对（进食由主进程结算）。
+    """
+    rows = strip_indices(a['x'], bounds)
+    c = {name: a[name][rows] for name in PREY_OUTPUTS}
+    x, y, dx, dy, speed, stamina, energy = (c[name] for name in ('x', 'y', 'dx', 'dy', 'speed', 'stamina', 'energy'))
+    alive, max_speed = c['alive'], a['max_speed'][rows]
+    rdir, rangle = a['rdir'][rows], a['rangle'][rows]
+    # 感知：视野或听觉范围内的第一个捕食者
+    sensory, hearing = a['sensory_distance'][rows], a['hearing_radius'][rows]
+    tidx = _targets(a['tx'], x, float(np.maximum(sensory, hearing).max(initial=0)) + 1, bounds)
+    tx, ty = a['tx'][tidx], a['ty'][tidx]
+    threat, pairs = (sense or sense_exact)({
+        'qx': x, 'qy': y, 'qdx': dx, 'qdy': dy, 'tx': tx, 'ty': ty,
+        'qsensory': sensory, 'qfov': a['fov_angle'][rows], 'qhearing': hearing,
+    }, (True,))
+    fleeing = alive & (threat >= 0) & (stamina > 0)
+    # 逃跑
+    idx = np.flatnonzero(fleeing)
+    c['is_fleeing'][idx] = True
+    fdx, fdy = x[idx] - tx[threat[idx]], y[idx] - ty[threat[idx]]
+    overlap = (fdx == 0) & (fdy == 0)
+    stuck = idx[overlap]
+    dx[stuck], dy[stuck] = _normalize(rdir[stuck, 0], rdir[stuck, 1])
+    idx = idx[~overlap]
+    dx[idx], dy[idx] = _normalize(fdx[~overlap], fdy[~overlap])
+    speed[idx] = np.minimum(max_speed[idx], speed[idx] + 0.05)
+    stamina[idx] = np.maximum(stamina[idx] - 2.3, 0)
+    energy[idx] = np.maximum(energy[idx] - 0.04, 0)
+    # 饥饿时寻找最近可食用植物
+    hungry = alive & ~fleeing & (energy < a['hunger_threshold'][rows])
+    foraging = np.zeros(len(rows), dtype=bool)
+    grass = a.get('grass')
+    if hungry.any() and (grass is not None or len(a['fx'])):
+        idx = np.flatnonzero(hungry)
+        if grass is not None:
+            # 半径内能量最高的格子（窗口取最大值）
+            gx, gy, found = forage_cells(grass, x[idx], y[idx], *params['forage'])
+            idx = idx[found]
+            tdx, tdy = gx[found] - x[idx], gy[found] - y[idx]
+        else:
+            fidx = _targets(a['fx'], x[idx], FORAGE_RADIUS + 1, bounds)
+            nearest, found = run_kernel(nearest_target, {
+                'qx': x, 'qy': y, 'qmask': hungry, 'tx': a['fx'][fidx], 'ty': a['fy'][fidx],
+            }, (FORAGE_RADIUS,))
+            pairs += found
+            idx = np.flatnonzero(nearest >= 0)
+            plant = fidx[nearest[idx]]
+            tdx, tdy = a['fx'][plant] - x[idx], a['fy'][plant] - y[idx]
+        moved = (tdx != 0) | (tdy != 0)
+        # 已在目标上：朝向不变，只加速（与 Prey.move 相同，不游荡）
+        still = idx[~moved]
+        speed[still] = np.minimum(speed[still] * 1.05, max_speed[still])
+        idx, tdx, tdy = idx[moved], tdx[moved], tdy[moved]
+        ux, uy = _normalize(tdx, tdy)
+        _steer(c, idx, ux, uy, 0.2)
+        speed[idx] = np.minimum(speed[idx] * 1.07, max_speed[idx])
+        foraging[idx] = True
+    turn = params['turn']
+    _prey_wander(c, (alive & ~fleeing & ~hungry) | foraging, rangle[:, 0] if turn else None)
+    # 通用移动逻辑（对应 Prey.update 中的 super().update([])）
+    _edge_bounce(c, params['half_size'], params['width'], params['height'], alive)
+    moving = alive & ~c['is_reproducing']
+    _move(c, moving)
+    _prey_wander(c, moving, rangle[:, 1] if turn else None)
+    resting = alive & c['is_reproducing']
+    c['reproduce_duration'][resting] -= 1
+    c['is_reproducing'][resting & (c['reproduce_duration'] <= 0)] = False
+    c['hunt_cooldown'][:] = np.maximum(0, c['hunt_cooldown'] - 1)
+    born = reproduce_block(
+        c, a['reproduce_threshold_ratio'][rows], params['max_energy'], alive, ~c['is_reproducing'], 2,
+        (~c['is_chasing']).astype(float), a['rrep'][rows], 0.4, 10800,
+    )
+    c['is_reproducing'][born] = True
+    c['reproduce_duration'][born] = 60
+    c['reproduce_cooldown'][:] = np.maximum(0, c['reproduce_cooldown'] - 1)
+    energy[alive] = np.maximum(energy[alive] - 0.01, 0)
+    alive &= energy > 0
+    # 与植物的接触点对（矩形重叠）
+    eats = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+    if grass is None and len(a['fx']):
+        overlap = params['overlap']
+        eaters = np.flatnonzero(alive)
+        fidx = _targets(a['fx'], x[eaters], overlap * 2 ** 0.5 + 1, bounds)
+        pi, ej = grid_pairs(a['fx'][fidx], a['fy'][fidx], x[eaters], y[eaters], overlap * 2 ** 0.5)
+        plant, eater = fidx[pi], eaters[ej]
+        touching = (np.abs(a['fx'][plant] - x[eater]) < overlap) & (np.abs(a['fy'][plant] - y[eater]) < overlap)
+        eats = (plant[touching], rows[eater[touching]])
+    for name, value in c.items():
+        out[name][rows] = value
+    return {'pairs': pairs, 'births': rows[born], 'eats': eats}
+
+
+class ArrayWorld:
+    """NumPy 结构化数组模拟引擎
+
+    与 creature_def 中 Predator/Prey 的规则一一对应（追逐/逃跑/游荡/觅食/攻击/繁殖/能量衰减），
+    区别在于同一tick内所有个体同步更新：先捕食者、后被捕食者，
+    每个阶段按 快照 → 分块意图 → 合并 执行（见上方“分块意图”），出生与死亡在tick末批量写入。
+    """
+
+    def __init__(self, width=1500, height=1000, seed=None, rng=None, workers=0, genome_rng=None, mutation=MUTATION):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        # 子代突变使用独立的随机流（mutation 为 0 时不消耗），不改变行为随机数的消耗顺序
+        self.genome_rng = genome_rng if genome_rng is not None else np.random.default_rng(None if seed is None else [seed, 1])
+        self.mutation = mutation
+        self.tick = 0
+        self.profiler = None # 分阶段计时（见 profiler.Profiler）
+        self.perception = None # 感知缓存（见 perception_cache.PerceptionCache）
+        self.events = None # 累计事件数（见 metrics.EVENTS），由画布设置
+        self._kills = 0 # 本tick被捕杀的被捕食者数
+        # 多进程条带并行（各阶段的分块意图），结果与串行逐位一致
+        self.executor = None
+        if workers and workers > 1:
+            from parallel import TileExecutor, available_cpus
+            workers = min(workers, available_cpus()) # 进程数超过可用核数没有收益
+            if workers > 1:
+                self.executor = TileExecutor(workers)
+        predator_params = species_params(Predator)
+        prey_params = species_params(Prey)
+        self.predators = SpeciesArrays(predator_params, TRAITS['predator'])
+        self.prey = SpeciesArrays(prey_params, TRAITS['prey'])
+        self.plants = PlantArrays()
+        self.biomass = None # 植被网格（见 biomass.BiomassGrid），设置后被捕食者在网格上觅食/进食
+        plant_images = get_atlas().plants # 植物外观序号即图集序号
+        self.views = (
+            ArrayGroupView(self.predators, [predator_params['image']], predator_params['half_size']),
+            ArrayGroupView(self.prey, [prey_params['image']], prey_params['half_size']),
+            ArrayGroupView(self.plants, plant_images, plant_images[0].get_width() / 2),
+        )
+
+    # ---------- 种群写入 ----------
+    def add_predators(self, x, y):
+        self.predators.add(x, y, self.rng)
+
+    def add_prey(self, x, y):
+        self.prey.add(x, y, self.rng)
+
+    def add_plants(self, x, y, cluster_id):
+        count = len(np.atleast_1d(x))
+        self.plants.add(x, y, cluster_id, self.rng.integers(0, len(self.views[2].images), count))
+
+    def close(self):
+        """关闭并行进程池"""
+        if self.executor is not None:
+            self.executor.close()
+            self.executor = None
+
+    # ---------- 公共行为 ----------
+    def _snapshot(self, s, columns, traits):
+        """本阶段的只读快照：物种列与逐个体性状（视图，阶段内不修改）"""
+        arrays = {name: getattr(s, name) for name in columns}
+        arrays.update((name, s.trait(name)) for name in traits)
+        return arrays
+
+    def _intents(self, fn, s, species, arrays, outputs, params):
+        """执行一个阶段的分块意图，把输出列写回物种数组，返回 (输出列, 合并后的附加结果)
+
+        挂有感知缓存时整阶段在主进程串行执行（缓存是跨tick的主进程状态）；
+        否则个体数达到 executor.min_agents 时交给多进程执行器，结果相同。
+        """
+        out = {name: arrays[name].copy() for name in outputs}
+        executor = self.executor
+        if self.perception is not None:
+            extras = fn(arrays, out, params, None, self._cached_sense(species))
+        elif executor is not None and s.n >= executor.min_agents:
+            extras = executor.run(fn, arrays, out, params)
+        else:
+            extras = fn(arrays, out, params)
+        cols = s._cols
+        for name, value in out.items():
+            if name in cols:
+                cols[name][:s.n] = value
+        return out, extras
+
+    def _cached_sense(self, species):
+        """经感知缓存的感知函数：只对过期个体重新感知（见 perception_cache）"""
+        cache = self.perception
+
+        def sense(query, params):
+            s = SimpleNamespace(x=query['qx'], y=query['qy'], dx=query['qdx'], dy=query['qdy'], n=len(query['qx']))
+            t = SimpleNamespace(x=query['tx'], y=query['ty'])
+            return cache.sense_array(species, s, t, lambda mask: sense_exact(
+                query if mask is None else dict(query, qmask=mask), params))
+        return sense
+
+    def _random_directions(self, count):
+        vx, vy = _normalize(self.rng.uniform(-1, 1, count), self.rng.uniform(-1, 1, count))
+        return vx, vy
+
+    def _reproduce_block(self, s, eligible, extra_condition, step_down, wander_bonus, chance, cooldown):
+        """主进程中的繁殖计时与触发（返回触发繁殖的个体下标）"""
+        cols = {name: getattr(s, name) for name in (
+            'energy', 'reproduce_cooldown', 'reproduce_timer', 'wander_duration', 'is_chasing')}
+        return reproduce_block(
+            cols, s.trait('reproduce_threshold_ratio'), s.params['max_energy'], eligible, extra_condition,
+            step_down, wander_bonus, self.rng.random(s.n), chance, cooldown,
+        )
+
+    def _spawn_children(self, s, idx, hunt_cooldown):
+        """记录子代出生位置、能量与突变后的基因组（tick末批量加入）"""
+        offset = self.rng.uniform(2, 5, len(idx)) # 防止重叠
+        energy = s.params['max_energy'] * s.trait('reproduce_threshold_ratio')[idx]
+        genome = mutate(s.genome[idx], s.traits, self.genome_rng, self.mutation)
+        return (s.x[idx] + offset, s.y[idx] + offset, energy, hunt_cooldown, genome)
+
+    # ---------- 捕食者 ----------
+    def _step_predators(self):
+        s, q = self.predators, self.prey
+        n = s.n
+        arrays = self._snapshot(s, PREDATOR_OUTPUTS + ('hunt_cooldown',), ('sensory_distance', 'fov_angle', 'max_speed'))
+        arrays.update(tx=q.x, ty=q.y, rturn=self.rng.random(n), rdir=self.rng.uniform(-1, 1, (n, 4)))
+        _, extras = self._intents(predator_intents, s, 'predator', arrays, PREDATOR_OUTPUTS, {
+            'half_size': s.params['half_size'], 'width': self.width, 'height': self.height,
+            'chase_stamina_threshold': s.params['chase_stamina_threshold'], 'max_energy': s.params['max_energy'],
+            'reach': s.params['radius'] + q.params['radius'],
+        })
+        if self.profiler is not None:
+            self.profiler.count('perception', extras['pairs'])
+        # 攻击
+        if self.profiler is not None:
+            start = time.perf_counter()
+        self._attack(*extras['contacts'])
+        if self.profiler is not None:
+            self.profiler.add('attack', time.perf_counter() - start)
+        s.hunt_cooldown[:] = np.maximum(0, s.hunt_cooldown - 1)
+        # 繁殖
+        idx = self._reproduce_block(s, np.ones(n, dtype=bool), ~s.is_reproducing, 2, (~s.is_chasing).astype(float), 0.4, 10800)
+        s.is_reproducing[idx] = True
+        s.reproduce_duration[idx] = 60
+        births = self._spawn_children(s, idx, s.params['HUNT_COOLDOWN'])
+        s.reproduce_cooldown[:] = np.maximum(0, s.reproduce_cooldown - 1)
+        s.energy[:] = np.maximum(s.energy - 0.01, 0)
+        return births, s.energy <= 0
+
+    def _attack(self, qi, tj):
+        """攻击：所有接触点对（按捕食者、猎物下标排序）同时结算击退、伤害与能量转移"""
+        s, q = self.predators, self.prey
+        order = np.lexsort((tj, qi))
+        qi, tj = qi[order], tj[order]
+        alive = self._prey_alive[tj]
+        qi, tj = qi[alive], tj[alive]
+        if not len(qi):
+            return
+        if self.profiler is not None:
+            self.profiler.count('collisions', len(qi))
+        ddx, ddy = q.x[tj] - s.x[qi], q.y[tj] - s.y[qi]
+        overlap = (ddx == 0) & (ddy == 0)
+        ddx[overlap], ddy[overlap] = self._random_directions(int(overlap.sum()))
+        ux, uy = _normalize(ddx, ddy)
+        repel_distance = 2 # 击退距离
+        np.subtract.at(s.x, qi, ux * repel_distance)
+        np.subtract.at(s.y, qi, uy * repel_distance)
+        np.add.at(q.x, tj, ux * repel_distance)
+        np.add.at(q.y, tj, uy * repel_distance)
+        for arrays in (s, q):
+            arrays.x[:] = np.rint(arrays.x)
+            arrays.y[:] = np.rint(arrays.y)
+        hits = np.bincount(qi, minlength=s.n)
+        bitten = np.bincount(tj, minlength=q.n)
+        hitters = hits > 0
+        s.speed[hitters] = np.maximum(1.5, s.speed[hitters] - 0.3 * hits[hitters])
+        s.energy[hitters] = np.minimum(s.energy[hitters] + 7 * hits[hitters], 100)
+        q.energy[:] = q.energy - 15 * bitten
+        killed = (bitten > 0) & (q.energy <= 0)
+        self._kills = int(np.count_nonzero(killed))
+        killers = np.unique(qi[killed[tj]])
+        s.hunt_cooldown[killers] = s.params['HUNT_COOLDOWN']
+        s.is_chasing[killers] = False
+        s.speed[killers] = np.maximum(1.5, s.speed[killers] - 0.1)
+        self._prey_alive &= ~killed
+
+    # ---------- 被捕食者 ----------
+    def _wander_turn(self):
+        """被捕食者转向时机（与 Prey.wander 相同的tick判定）"""
+        return self.tick % WANDER_TURN_PERIOD < WANDER_TURN_WINDOW
+
+    def _step_prey(self):
+        s, p, f = self.prey, self.predators, self.plants
+        n = s.n
+        arrays = self._snapshot(s, PREY_COLUMNS, (
+            'sensory_distance', 'fov_angle', 'hearing_radius', 'max_speed', 'hunger_threshold', 'reproduce_threshold_ratio',
+        ))
+        arrays.update(
+            alive=self._prey_alive, tx=p.x, ty=p.y, fx=f.x, fy=f.y, rdir=self.rng.uniform(-1, 1, (n, 2)),
+            rangle=self.rng.uniform(-45, 45, (n, 2)), rrep=self.rng.random(n),
+        )
+        params = {
+            'half_size': s.params['half_size'], 'width': self.width, 'height': self.height,
+            'max_energy': s.params['max_energy'], 'turn': self._wander_turn(),
+            'overlap': s.params['half_size'] + 6, # 16px 与 12px 矩形中心距阈值
+        }
+        if self.biomass is not None:
+            arrays['grass'] = self.biomass.energy
+            params['forage'] = self.biomass.forage_params(FORAGE_RADIUS)
+        out, extras = self._intents(prey_intents, s, 'prey', arrays, PREY_OUTPUTS, params)
+        alive = out['alive']
+        if self.profiler is not None:
+            self.profiler.count('perception', extras['pairs'])
+        # 进食
+        if self.profiler is not None:
+            start = time.perf_counter()
+        self._eat_plants(alive, *extras['eats'])
+        if self.profiler is not None:
+            self.profiler.add('eat', time.perf_counter() - start)
+        # 被捕食者自身的繁殖逻辑
+        idx_b = self._reproduce_block(s, alive, ~s.is_fleeing, 1, None, 0.6, 90)
+        s.reproduce_cooldown[:] = np.maximum(0, s.reproduce_cooldown - 1)
+        s.is_fleeing[:] = False
+        s.energy[alive] = np.maximum(s.energy[alive] - 0.004, 0)
+        alive &= s.energy > 0
+        births = self._spawn_children(s, np.concatenate([np.sort(extras['births']), idx_b]), 0)
+        return births, ~alive
+
+    def _eat_plants(self, alive, plant_ids, eater):
+        """进食：矩形重叠的植物被按顺序第一个接触的被捕食者吃掉（plant_ids/eater 为接触点对）"""
+        s, f = self.prey, self.plants
+        self._plant_eaten = np.zeros(f.n, dtype=bool)
+        if self.biomass is not None:
+            # 植被网格：进食所在格子，同一格子只有顺序最靠前的个体吃到
+            idx = np.flatnonzero(alive)
+            gain = self.biomass.graze_many(s.x[idx], s.y[idx])
+            ate = gain > 0
+            idx, gain = idx[ate], gain[ate]
+            if self.profiler is not None:
+                self.profiler.count('collisions', len(idx))
+            s.energy[idx] = np.minimum(s.energy[idx] + gain, s.params['max_energy'])
+            s.stamina[idx] = np.minimum(s.stamina[idx] + 15, 100)
+            return
+        if not len(plant_ids):
+            return
+        # 每株植物归顺序最靠前的接触者
+        order = np.lexsort((eater, plant_ids))
+        plant_ids, first = np.unique(plant_ids[order], return_index=True)
+        eater = eater[order][first]
+        self._plant_eaten[plant_ids] = True
+        if self.profiler is not None:
+            self.profiler.count('collisions', len(plant_ids))
+        count = np.bincount(eater, minlength=s.n)
+        # 每个个体吃到的第一株植物（按植物顺序）决定能量
+        order = np.lexsort((plant_ids, eater))
+        idx, first = np.unique(eater[order], return_index=True)
+        gain = f.energy[plant_ids[order][first]]
+        s.energy[idx] = np.minimum(s.energy[idx] + gain, s.params['max_energy'])
+        s.stamina[idx] = np.minimum(s.stamina[idx] + 15 * count[idx], 100)
+
+    # ---------- tick ----------
+    def step(self):
+        """推进一个tick"""
+        self.tick += 1
+        profiler = self.profiler
+        self._prey_alive = np.ones(self.prey.n, dtype=bool)
+        self._kills = 0
+        predator_births, predator_dead = self._step_predators()
+        if profiler is not None:
+            profiler.lap('predators')
+        prey_births, prey_dead = self._step_prey()
+        if profiler is not None:
+            profiler.lap('prey')
+            profiler.count('births', len(predator_births[0]) + len(prey_births[0]))
+        events = self.events
+        if events is not None:
+            events['predator_births'] += len(predator_births[0])
+            events['predator_deaths'] += int(np.count_nonzero(predator_dead))
+            events['prey_births'] += len(prey_births[0])
+            events['prey_deaths'] += int(np.count_nonzero(prey_dead))
+            events['plant_deaths'] += int(np.count_nonzero(self._plant_eaten))
+            events['kills'] += self._kills
+        # 批量移除死亡个体与被吃掉的植物，再批量加入新生个体
+        if self.perception is not None:
+            self.perception.compact('predator', predator_dead, prey_dead)
+            self.perception.compact('prey', prey_dead, predator_dead)
+        self.predators.remove(predator_dead)
+        self.prey.remove(prey_dead)
+        self.plants.remove(self._plant_eaten)
+        for arrays, (x, y, energy, hunt_cooldown, genome) in ((self.predators, predator_births), (self.prey, prey_births)):
+            arrays.add(x, y, self.rng, energy=energy, hunt_cooldown=hunt_cooldown, genome=genome)
@@ -0,0 +1,224 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: spatial_index
+Propose: Uniform-grid spatial index for neighbour queries (perception / collision)
+'''
+
+# import modules
+import math
+
+import numpy as np
+
+
+class SpatialGrid:
+    """均匀网格空间索引
+
+    每个tick按精灵组重建一次，挂在组对象上（group.spatial_grid），
+    生物通过 query 取得候选邻居后仍用原有的精确判定过滤。
+    候选结果按插入顺序排序，与直接遍历精灵组的顺序一致，
+    因此 visible_prey[0] 等依赖顺序的逻辑结果不变。
+    查询剔除 dead 为 True 的精灵：死亡个体在更新阶段末才移出精灵组（见 pooling.SpawnQueue）。
+    重建后精灵仍会移动，查询范围按 drift（重建后可能的最大位移）放宽，候选集合始终包含全部真实邻居。
+    """
+    def __init__(self, cell_size=64, margin=2, bounds=None):
+        self.cell_size = cell_size
+        self.margin = margin # 坐标取整的余量（像素）
+        self.bounds = bounds # 世界矩形：越界的精灵下次移动前被夹回，夹回距离计入位移上界
+        self.group = None
+        self.cells = {}
+        self.order = {}
+        self.max_radius = 0 # 已插入精灵的最大碰撞半径
+        self.max_half_diag = 0 # 已插入精灵矩形的最大半对角线
+        self.max_step = 0 # 已插入精灵单次移动的最大位移（精灵的 max_step）
+        self.max_excess = 0 # 已插入精灵超出世界矩形的最大距离
+        self.knockback = 0 # 重建后的最大击退位移（见 collision.resolve_attacks）
+        self._next_order = 0
+
+    @property
+    def drift(self):
+        """重建后单个精灵的最大位移：击退、夹回世界矩形与一次移动之和"""
+        return self.margin + self.max_excess + self.max_step + self.knockback
+
+    def attach(self, group):
+        """绑定精灵组（组对象上记录本网格）"""
+        self.group = group
+        group.spatial_grid = self
+        return self
+
+    def _cell(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def rebuild(self, sprites=None):
+        """按当前位置重建网格"""
+        self.cells = {}
+        self.order = {}
+        self.max_radius = 0
+        self.max_half_diag = 0
+        self.max_step = 0
+        self.max_excess = 0
+        self.knockback = 0
+        self._next_order = 0
+        for sprite in (self.group if sprites is None else sprites):
+            self.insert(sprite)
+
+    def insert(self, sprite):
+        """插入单个精灵（新生个体在tick内插入，排在末尾）"""
+        rect = sprite.rect
+        self.cells.setdefault(self._cell(*rect.center), []).append(sprite)
+        self.order[sprite] = self._next_order
+        self._next_order += 1
+        radius = getattr(sprite, 'radius', 0)
+        if radius > self.max_radius:
+            self.max_radius = radius
+        half_diag = math.hypot(rect.width, rect.height) / 2
+        if half_diag > self.max_half_diag:
+            self.max_half_diag = half_diag
+        step = getattr(sprite, 'max_step', 0)
+        if step > self.max_step:
+            self.max_step = step
+        bounds = self.bounds
+        if bounds is not None:
+            excess = math.hypot(
+                max(bounds.left - rect.left, rect.right - bounds.right, 0),
+                max(bounds.top - rect.top, rect.bottom - bounds.bottom, 0)
+            )
+            if excess > self.max_excess:
+                self.max_excess = excess
+
+    def query(self, pos, radius):
+        """返回半径内的候选精灵（按组内顺序，未做精确距离过滤）"""
+        r = radius + self.drift
+        x0, y0 = self._cell(pos[0] - r, pos[1] - r)
+        x1, y1 = self._cell(pos[0] + r, pos[1] + r)
+        cells = self.cells
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+        found = [s for s in found if not s.dead] # 剔除本tick已死亡的个体（死亡在阶段末才移出精灵组）
+        found.sort(key=self.order.__getitem__)
+        return found
+
+    def query_rect(self, rect):
+        """中心落在矩形附近格子中的精灵（用于绘制裁剪：不排序、不做精确过滤）
+
+        矩形覆盖的格子比已占用的格子还多时（视口缩得很小）改为遍历已占用格子，
+        开销始终不超过两者中的较小者。
+        """
+        r = self.drift + self.max_half_diag
+        x0, y0 = self._cell(rect.left - r, rect.top - r)
+        x1, y1 = self._cell(rect.right + r, rect.bottom + r)
+        cells = self.cells
+        if (x1 - x0 + 1) * (y1 - y0 + 1) >= len(cells):
+            buckets = [b for (cx, cy), b in cells.items() if x0 <= cx <= x1 and y0 <= cy <= y1]
+        else:
+            buckets = [cells[key] for key in (
+                (cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)
+            ) if key in cells]
+        return [s for bucket in buckets for s in bucket if not s.dead] # 剔除本tick已死亡的个体
+
+    def density(self):
+        """各已占用格子的中心坐标与个体数（热力图用；不剔除本tick已死亡的个体）"""
+        if not self.cells:
+            empty = np.zeros(0)
+            return empty, empty, empty
+        keys = np.array(list(self.cells), dtype=float)
+        counts = np.fromiter((len(bucket) for bucket in self.cells.values()), dtype=float, count=len(self.cells))
+        return (keys[:, 0] + 0.5) * self.cell_size, (keys[:, 1] + 0.5) * self.cell_size, counts
+
+
+def grid_candidates(group, pos, radius):
+    """取得候选邻居：组上挂有网格则走网格，否则退化为全量遍历"""
+    grid = getattr(group, 'spatial_grid', None)
+    if grid is None:
+        return group
+    return grid.query(pos, radius)
+
+
+def grid_insert(group, sprite):
+    """新生个体同步插入网格"""
+    grid = getattr(group, 'spatial_grid', None)
+    if grid is not None:
+        grid.insert(sprite)
+
+
+def grid_knockback(group, distance):
+    """精灵在重建后被击退：击退距离计入网格的位移上界"""
+    grid = getattr(group, 'spatial_grid', None)
+    if grid is not None and distance > grid.knockback:
+        grid.knockback = distance
+
+
+def grid_colliders(group, sprite):
+    """碰撞候选：查询范围取碰撞半径之和与矩形半对角线之和的较大者"""
+    grid = getattr(group, 'spatial_grid', None)
+    if grid is None:
+        return group
+    rect = sprite.rect
+    reach = max(
+        getattr(sprite, 'radius', 0) + grid.max_radius,
+        math.hypot(rect.width, rect.height) / 2 + grid.max_half_diag
+    )
+    return grid.query(rect.center, reach)
+
+
+def grid_pairs(qx, qy, tx, ty, radius):
+    """批量近邻查询（NumPy 版网格）
+
+    对查询点 (qx, qy) 与目标点 (tx, ty) 求出所有距离不超过 radius 的点对，
+    返回按 (查询下标, 目标下标) 排序的两个下标数组，
+    因此“每个查询点的第一个目标”与按组顺序遍历时一致。
+    radius 也可以是每个查询点各自的半径（数组）：格子按最大半径划分，点对按各自半径过滤。
+    """
+    empty = np.empty(0, dtype=np.int64)
+    nq, nt = len(qx), len(tx)
+    radii = radius if np.ndim(radius) else None
+    radius = float(np.max(radius)) if nq and radii is not None else radius
+    if nq == 0 or nt == 0 or radius <= 0:
+        return empty, empty
+    qx, qy, tx, ty = (np.asarray(a, dtype=float) for a in (qx, qy, tx, ty))
+    # 格子边长不小于查询半径（3x3 邻域即可覆盖），且格子总数与目标数同量级
+    area = (max(qx.max(), tx.max()) - min(qx.min(), tx.min()) + 1) * \
+        (max(qy.max(), ty.max()) - min(qy.min(), ty.min()) + 1)
+    cell = max(float(radius), (area / nt) ** 0.5)
+    qcx = np.floor(qx / cell).astype(np.int64)
+    qcy = np.floor(qy / cell).astype(np.int64)
+    tcx = np.floor(tx / cell).astype(np.int64)
+    tcy = np.floor(ty / cell).astype(np.int64)
+    min_x = min(qcx.min(), tcx.min()) - 1
+    min_y = min(qcy.min(), tcy.min()) - 1
+    span_x = max(qcx.max(), tcx.max()) - min_x + 2
+    span_y = max(qcy.max(), tcy.max()) - min_y + 2
+    keys = (tcx - min_x) * span_y + (tcy - min_y)
+    order = np.argsort(keys, kind='stable')
+    counts_table = np.bincount(keys, minlength=span_x * span_y)
+    starts_table = np.cumsum(counts_table) - counts_table
+    base = (qcx - min_x) * span_y + (qcy - min_y)
+    qi_parts, tj_parts = [], []
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            k = base + ox * span_y + oy
+            counts = counts_table[k]
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            qi = np.repeat(np.arange(nq), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            qi_parts.append(qi)
+            tj_parts.append(order[np.repeat(starts_table[k], counts) + offsets])
+    if not qi_parts:
+        return empty, empty
+    qi = np.concatenate(qi_parts)
+    tj = np.concatenate(tj_parts)
+    ddx = tx[tj] - qx[qi]
+    ddy = ty[tj] - qy[qi]
+    near = ddx * ddx + ddy * ddy <= (radius * radius if radii is None else np.square(radii)[qi])
+    qi, tj = qi[near], tj[near]
+    sort = np.lexsort((tj, qi))
+    return qi[sort], tj[sort]
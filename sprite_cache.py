@@ -0,0 +1,94 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: sprite_cache
+Propose: Shared pre-rendered sprite atlas for creatures and plants
+'''
+
+# import modules
+import math
+
+import numpy as np
+import pygame
+
+PLANT_COLORS = [(169, 211, 173), (146, 185, 190), (210, 214, 153)]
+PLANT_SIDES = (3, 4, 5, 6)
+PLANT_RADII = (3, 4, 5)
+ANGLE_BUCKETS = 6 # 每个旋转对称周期内的角度分档数（总外观数需 ≤256，轨迹日志用 1 字节保存）
+PLANT_SIZE = 12
+# 生物外观：(颜色, 半径)，图像尺寸 16x16
+CREATURE_STYLES = {
+    'predator': ((205, 82, 87), 3),
+    'prey': ((239, 197, 127), 2),
+}
+CREATURE_SIZE = 16
+
+
+def plant_variant(sides, radius, angle_offset, color_index):
+    """植物外观参数 -> 图集中的外观序号（起始角度按多边形的旋转对称周期归档）"""
+    period = 360 / sides
+    bucket = int(round((angle_offset % period) / period * ANGLE_BUCKETS)) % ANGLE_BUCKETS
+    return (((PLANT_SIDES.index(sides) * len(PLANT_RADII) + PLANT_RADII.index(radius))
+             * ANGLE_BUCKETS + bucket) * len(PLANT_COLORS) + color_index)
+
+
+def plant_variants(sides, radius, angle_offset, color_index):
+    """plant_variant 的向量化版本（参数为等长数组，返回外观序号数组）"""
+    period = 360 / sides
+    bucket = np.round(np.mod(angle_offset, period) / period * ANGLE_BUCKETS).astype(np.int64) % ANGLE_BUCKETS
+    return (((np.searchsorted(PLANT_SIDES, sides) * len(PLANT_RADII) + np.searchsorted(PLANT_RADII, radius))
+             * ANGLE_BUCKETS + bucket) * len(PLANT_COLORS) + color_index)
+
+
+class SpriteAtlas:
+    """所有外观预先绘制在一张图集上，个体只引用其中的子图像（不再各自创建 Surface）"""
+    def __init__(self):
+        shapes = [
+            (sides, radius, bucket * 360 / sides / ANGLE_BUCKETS, color_index)
+            for sides in PLANT_SIDES for radius in PLANT_RADII
+            for bucket in range(ANGLE_BUCKETS) for color_index in range(len(PLANT_COLORS))
+        ]
+        columns = 32
+        rows = -(-(len(CREATURE_STYLES) + len(shapes)) // columns)
+        self.surface = pygame.Surface((columns * CREATURE_SIZE, rows * CREATURE_SIZE), pygame.SRCALPHA)
+        slots = (
+            pygame.Rect((i % columns) * CREATURE_SIZE, (i // columns) * CREATURE_SIZE, CREATURE_SIZE, CREATURE_SIZE)
+            for i in range(len(CREATURE_STYLES) + len(shapes))
+        )
+        self.creatures = {}
+        for (kind, (color, radius)), slot in zip(CREATURE_STYLES.items(), slots):
+            image = self.surface.subsurface(slot)
+            pygame.draw.circle(image, color, (CREATURE_SIZE // 2, CREATURE_SIZE // 2), radius)
+            self.creatures[kind] = image
+        self.plants = [] # 按 plant_variant 序号排列
+        center = PLANT_SIZE / 2
+        for (sides, radius, angle_offset, color_index), slot in zip(shapes, slots):
+            image = self.surface.subsurface((slot.x, slot.y, PLANT_SIZE, PLANT_SIZE))
+            points = [
+                (
+                    center + radius * math.cos(math.radians(angle_offset + i * 360 / sides)),
+                    center + radius * math.sin(math.radians(angle_offset + i * 360 / sides))
+                ) for i in range(sides)
+            ]
+            pygame.draw.polygon(image, PLANT_COLORS[color_index], points)
+            self.plants.append(image)
+
+    def creature(self, kind):
+        return self.creatures[kind]
+
+    def plant(self, sides, radius, angle_offset, color_index):
+        return self.plants[plant_variant(sides, radius, angle_offset, color_index)]
+
+
+_atlas = None
+
+
+def get_atlas():
+    """全局图集（首次调用时构建，之后共享）"""
+    global _atlas
+    if _atlas is None:
+        _atlas = SpriteAtlas()
+    return _atlas
@@ -11,4 +11,13 @@ from UI_design import startUp
 if __name__ == "__main__":
     PREDATOR_COUNT = 10
     PREY_COUNT = 50
-    startUp(PREDATOR_COUNT, PREY_COUNT)
\ No newline at end of file
+    ENGINE = 'sprite' # 'sprite' 逐对象精灵 / 'numpy' 结构化数组批量引擎
+    PROFILE = None # True 开启分阶段计时浮层（F3 切换），或填写 'profile.csv' 同时导出
+    WORLD_SIZE = (1500, 1000) # 世界尺寸，大于窗口时可平移/缩放视口
+    MUTATION = 0.0 # 子代性状突变系数：0 为不突变（默认），如 1.0 开启演化
+    SPEED = 1 # 初始倍速 1/10/100/None（不限速），运行中按数字键 1~4 切换
+    TELEMETRY = None # 遥测端口（如 8765）：localhost 上推送实时统计并接受控制命令，telemetry.watch(8765) 查看
+    AUTOSAVE = None # 自动存档路径（如 'autosave.npz'），checkpoint.load_checkpoint 读取后续跑
+    AUTOSAVE_INTERVAL = 36000 # 自动存档间隔（tick，1倍速下约10分钟）
+    startUp(PREDATOR_COUNT, PREY_COUNT, engine=ENGINE, profile=PROFILE, world_size=WORLD_SIZE, mutation=MUTATION,
+            speed=SPEED, telemetry=TELEMETRY, autosave=AUTOSAVE, autosave_interval=AUTOSAVE_INTERVAL)
\ No newline at end of file
@@ -0,0 +1,233 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: sweep
+Propose: Run headless parameter sweeps across all cores and aggregate the results
+'''
+
+# import modules
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+
+import numpy as np
+
+# 扫描参数：启动参数直接作用于画布，其余以 "物种.属性" 覆盖生物参数
+CANVAS_PARAMS = ('PREDATOR_COUNT', 'PREY_COUNT', 'MAX_PLANTS')
+PARAM_ALIASES = {
+    'HUNT_COOLDOWN': 'predator.HUNT_COOLDOWN',
+    'PREDATOR_REPRODUCE_THRESHOLD': 'predator.reproduce_threshold_ratio',
+    'PREY_REPRODUCE_THRESHOLD': 'prey.reproduce_threshold_ratio',
+}
+DEFAULTS = {'PREDATOR_COUNT': 10, 'PREY_COUNT': 50, 'MAX_PLANTS': 200}
+
+
+def grid(space):
+    """网格采样：space 为 {参数名: 取值列表}"""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_sample(space, count, seed=0):
+    """随机采样：取值为列表时随机选择，为 (low, high) 元组时均匀采样（两端均为整数则取整数）"""
+    rnd = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        config = {}
+        for name in sorted(space):
+            values = space[name]
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rnd.randint(low, high)
+                else:
+                    config[name] = rnd.uniform(low, high)
+            else:
+                config[name] = rnd.choice(list(values))
+        configs.append(config)
+    return configs
+
+
+def run_id(params, seed, ticks, engine):
+    """运行的唯一标识（用于断点续跑）"""
+    key = json.dumps({'params': params, 'seed': seed, 'ticks': ticks, 'engine': engine}, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def summarize(series):
+    """种群序列统计：灭绝tick、振荡周期（tick）与平均种群
+
+    series 为逐次采样的全分辨率序列（见 GameCanvas.population_series），灭绝判定与频谱都基于原始采样。
+    """
+    ticks = np.asarray(series['tick'])
+    summary = {}
+    for species in ('predator', 'prey', 'plant'):
+        counts = np.asarray(series[species], dtype=float)
+        extinct = np.flatnonzero(counts == 0) if species != 'plant' else []
+        summary[f'{species}_extinction_tick'] = int(ticks[extinct[0]]) if len(extinct) else None
+        summary[f'{species}_mean'] = float(counts.mean()) if len(counts) else 0.0
+        summary[f'{species}_period'] = _dominant_period(ticks, counts)
+    return summary
+
+
+def _dominant_period(ticks, counts):
+    """去均值后频谱峰值对应的周期（tick），数据不足或无振荡时为 None"""
+    if len(counts) < 8 or counts.std() == 0:
+        return None
+    spectrum = np.abs(np.fft.rfft(counts - counts.mean()))
+    spectrum[0] = 0
+    k = int(spectrum.argmax())
+    if k == 0:
+        return None
+    interval = (ticks[-1] - ticks[0]) / (len(ticks) - 1)
+    return float(len(counts) * interval / k)
+
+
+def build_simulation(params, seed, engine='sprite'):
+    """按一组扫描参数构建无界面画布（初始种群已生成、参数已覆盖）"""
+    from UI_design import GameCanvas, populate
+
+    canvas = GameCanvas(engine=engine, headless=True, seed=seed)
+    canvas.MAX_PLANTS = params.get('MAX_PLANTS', DEFAULTS['MAX_PLANTS'])
+    populate(
+        canvas,
+        params.get('PREDATOR_COUNT', DEFAULTS['PREDATOR_COUNT']),
+        params.get('PREY_COUNT', DEFAULTS['PREY_COUNT'])
+    )
+    overrides = {}
+    for name, value in params.items():
+        if name in CANVAS_PARAMS:
+            continue
+        species, attr = PARAM_ALIASES.get(name, name).split('.', 1)
+        overrides.setdefault(species, {})[attr] = value
+    canvas.apply_overrides(overrides)
+    return canvas
+
+
+def run_simulation(params, seed, ticks, engine='sprite'):
+    """在当前进程中无界面运行一次模拟，返回种群序列"""
+    # 超出图表环形缓冲的长运行由 run 自动记录到临时指标日志
+    return build_simulation(params, seed, engine).run(ticks)
+
+
+def _worker(job):
+    """进程池任务：运行并打包一条结果记录"""
+    series = run_simulation(job['params'], job['seed'], job['ticks'], job['engine'])
+    return dict(job, summary=summarize(series), series=series)
+
+
+def load_results(path):
+    """读取结果文件（跳过中断时写了一半的末行）"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _trim_partial_line(path, chunk=1 << 16):
+    """把结果文件截断到最后一个换行符之后（去掉中断时写了一半的末行），保证后续追加从新的一行开始"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(pos - chunk, 0)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b'\n')
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+
+
+def run_sweep(configs, seeds, ticks, out_path, engine='sprite', workers=None):
+    """并行运行参数扫描，每完成一次运行即追加写入一行 JSON
+
+    结果文件中已存在的运行会被跳过，因此中断后重新执行同一命令即可续跑；
+    中断时写了一半的末行在续跑前截掉，否则下一条记录会接在它后面而一并无法解析。
+    """
+    _trim_partial_line(out_path)
+    done = {record['run_id'] for record in load_results(out_path)}
+    jobs = []
+    for params in configs:
+        for seed in seeds:
+            rid = run_id(params, seed, ticks, engine)
+            if rid not in done:
+                jobs.append({'run_id': rid, 'params': params, 'seed': seed, 'ticks': ticks, 'engine': engine})
+                done.add(rid)
+    print(f"Sweep: {len(jobs)} runs pending ({len(configs) * len(seeds) - len(jobs)} already done)")
+    if not jobs:
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor, \
+            open(out_path, 'a', encoding='utf-8') as out:
+        futures = [executor.submit(_worker, job) for job in jobs]
+        for finished, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            out.flush() # 每条结果立即落盘，保证可续跑
+            print(f"[{finished}/{len(jobs)}] {record['run_id']} {record['summary']}")
+
+
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_space(items):
+    """解析命令行参数：NAME=v1,v2,... 为取值列表，NAME=low:high 为采样区间"""
+    space = {}
+    for item in items:
+        name, spec = item.split('=', 1)
+        if ':' in spec:
+            low, high = spec.split(':', 1)
+            space[name] = (_parse_value(low), _parse_value(high))
+        else:
+            space[name] = [_parse_value(v) for v in spec.split(',')]
+    return space
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Survival & Evolution parameter sweep')
+    parser.add_argument('--param', action='append', default=[],
+                        help='NAME=v1,v2 (grid values) or NAME=low:high (random range); '
+                             'NAME is PREDATOR_COUNT, PREY_COUNT, MAX_PLANTS, HUNT_COOLDOWN, '
+                             'PREDATOR_REPRODUCE_THRESHOLD, PREY_REPRODUCE_THRESHOLD or species.attribute')
+    parser.add_argument('--samples', type=int, help='random sample count (default: full grid)')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--ticks', type=int, default=20000)
+    parser.add_argument('--engine', choices=('sprite', 'numpy'), default='sprite')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--out', default='sweep_results.jsonl')
+    args = parser.parse_args()
+    space = _parse_space(args.param)
+    if args.samples:
+        configs = random_sample(space, args.samples)
+    else:
+        if any(isinstance(values, tuple) for values in space.values()):
+            parser.error('low:high ranges require --samples')
+        configs = grid(space)
+    run_sweep(configs, args.seeds, args.ticks, args.out, args.engine, args.workers)
+
+
+if __name__ == "__main__":
+    main()
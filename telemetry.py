@@ -0,0 +1,361 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: telemetry
+Propose: Local telemetry server: live JSON-lines stats stream and control commands for running simulations
+'''
+
+# import modules
+import asyncio
+import json
+import math
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from profiler import PHASES
+from timestep import SPEEDS, TICK_RATE
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+DEFAULT_PORT = 8765
+# 统计块的字段（一行 float64）：seq 为发布序号，写入过程中为 -1
+FIELDS = (
+    'seq', 'tick', 'ticks_per_sec', 'predator', 'prey', 'plant', 'memory_mb', 'paused', 'speed',
+    *(f'{phase}_ms' for phase in PHASES),
+)
+COMMANDS = ('pause', 'resume', 'snapshot', 'speed', 'stats')
+
+
+def _memory_mb():
+    """本进程当前常驻内存（MB）；无 /proc 时取峰值，平台都不支持时为 nan"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return math.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def _number(value):
+    """JSON 数值（nan 输出为 null，整数值输出为整数）"""
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 4)
+
+
+def parse_speed(text):
+    """'1' / '10' / '100' / 'max' -> 倍速档位（见 timestep.SPEEDS）"""
+    speed = None if text in ('max', 'none', 'None') else float(text)
+    if speed is not None and speed.is_integer():
+        speed = int(speed)
+    if speed not in SPEEDS:
+        raise ValueError(f"speed must be one of {', '.join('max' if s is None else str(s) for s in SPEEDS)}")
+    return speed
+
+
+def snapshot_name(name, tick):
+    """客户端给出的存档文件名：只允许 snapshot_dir 中的文件名（不含路径分隔符与 ..），默认按tick命名"""
+    if name is None:
+        return f'snapshot_{tick}.npz'
+    if name in ('.', '..') or any(sep in name for sep in ('/', '\\', os.sep)) or os.path.basename(name) != name:
+        raise ValueError("snapshot takes a file name inside the server's snapshot directory, not a path")
+    return name if name.endswith('.npz') else name + '.npz'
+
+
+class TelemetryServer:
+    """本地遥测服务
+
+    挂到画布上后（canvas.telemetry）在后台线程中运行 asyncio TCP 服务（只绑定 localhost），
+    每个连接每 interval 秒收到一行 JSON 统计（tick速率、种群数、各阶段耗时、内存），并可逐行发送命令：
+    pause | resume | snapshot [文件名] | speed 1/10/100/max | stats，每条命令回复一行 JSON。
+    存档只写入 snapshot_dir（客户端只能给出其中的文件名，不能指定路径）。
+
+    模拟线程每tick（窗口模式为每帧）调用 service：执行排队的命令，到期时把统计写入双缓冲统计块。
+    统计块是两行预分配数组，模拟线程只写后台行，写完后切换前台下标；服务线程只读前台行并按发布序号校验，
+    读写双方都不加锁，观察者再慢也不会阻塞模拟。命令只在模拟线程的tick之间执行（暂停、存档不会与状态更新交错）。
+    各阶段耗时取自 canvas.profiler（未启用时为 null）。
+    """
+    def __init__(self, canvas, host='127.0.0.1', port=DEFAULT_PORT, interval=0.5, snapshot_dir='.'):
+        self.canvas = canvas
+        self.host = host
+        self.port = port # 0 为由系统分配（启动后更新为实际端口）
+        self.interval = interval # 发布/推送间隔（秒）
+        self.snapshot_dir = snapshot_dir
+        self.tick_rate = None # 无界面运行的tick速率上限（speed 命令设置，None 为不限速）
+        self.clients = 0
+        self._blocks = np.full((2, len(FIELDS)), math.nan)
+        self._blocks[:, 0] = -1
+        self._front = 0 # 前台行下标（只由模拟线程切换）
+        self._seq = 0
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._next_publish = 0.0
+        self._last_tick, self._last_time = canvas.current_tick, time.perf_counter()
+        self._profiler_rows = 0
+        self._pace = None # 限速起点 (tick, 时刻)
+        self._loop = self._stop = None
+        self._ready = threading.Event()
+        self._error = None
+        self.thread = threading.Thread(target=self._serve, name='telemetry', daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        canvas.telemetry = self
+        self.publish()
+
+    # ---------- 模拟线程 ----------
+    def service(self, block=False):
+        """执行排队的命令，到期时发布统计；block=True 时按 tick_rate 限速，暂停期间等待恢复（照常发布与响应命令）"""
+        while True:
+            while not self._commands.empty():
+                self._apply(*self._commands.get_nowait())
+            now = time.perf_counter()
+            if now >= self._next_publish:
+                self.publish(now)
+            if not (block and self.canvas.paused):
+                break
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._pace = None
+        if block and self.tick_rate is not None:
+            self._throttle()
+
+    def _throttle(self):
+        tick, now = self.canvas.current_tick, time.perf_counter()
+        if self._pace is None:
+            self._pace = (tick, now)
+            return
+        start_tick, start = self._pace
+        wait = start + (tick - start_tick) / self.tick_rate - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def publish(self, now=None):
+        """把当前统计写入后台行并切换为前台"""
+        canvas = self.canvas
+        now = time.perf_counter() if now is None else now
+        self._next_publish = now + self.interval
+        elapsed = now - self._last_time
+        rate = (canvas.current_tick - self._last_tick) / elapsed if elapsed > 0 else 0.0
+        self._last_tick, self._last_time = canvas.current_tick, now
+        if canvas.timestep is not None:
+            speed = canvas.timestep.speed
+        else:
+            speed = None if self.tick_rate is None else self.tick_rate / TICK_RATE
+        back = 1 - self._front
+        block = self._blocks[back]
+        block[0] = -1 # 写入中
+        block[1:9] = (
+            canvas.current_tick, rate, len(canvas.predators), len(canvas.prey), canvas.current_plants,
+            _memory_mb(), canvas.paused, math.nan if speed is None else speed,
+        )
+        block[9:] = self._phase_means()
+        self._seq += 1
+        block[0] = self._seq
+        self._front = back
+
+    def _phase_means(self):
+        """自上次发布以来各阶段的平均耗时（毫秒）"""
+        profiler = self.canvas.profiler
+        if profiler is None or profiler.rows == self._profiler_rows:
+            if profiler is not None:
+                return self._blocks[self._front, 9:] # 期间没有新tick（如暂停）：沿用上次的值
+            return math.nan
+        count = min(profiler.rows - self._profiler_rows, profiler.window)
+        order = np.arange(profiler.rows - count, profiler.rows) % profiler.window
+        self._profiler_rows = profiler.rows
+        return profiler.times[order].mean(axis=0) * 1000
+
+    def _apply(self, command, args, reply):
+        """在模拟线程中执行一条命令"""
+        canvas = self.canvas
+        try:
+            if command == 'pause':
+                canvas.paused = True
+            elif command == 'resume':
+                canvas.paused = False
+            elif command == 'speed':
+                speed = parse_speed(args[0] if args else '')
+                if canvas.timestep is not None:
+                    canvas.timestep.set_speed(SPEEDS.index(speed))
+                else:
+                    self.tick_rate = None if speed is None else TICK_RATE * speed
+                    self._pace = None
+            elif command == 'snapshot':
+                from checkpoint import save_checkpoint
+
+                path = os.path.join(self.snapshot_dir, snapshot_name(args[0] if args else None, canvas.current_tick))
+                save_checkpoint(canvas, path)
+                reply({'type': 'reply', 'command': command, 'ok': True, 'tick': canvas.current_tick, 'path': path})
+                return
+            self.publish()
+            reply({'type': 'reply', 'command': command, 'ok': True, **self.read()})
+        except Exception as exc: # 回复错误，不中断模拟
+            reply({'type': 'reply', 'command': command, 'ok': False, 'error': str(exc)})
+
+    # ---------- 统计块读取（任意线程） ----------
+    def read(self):
+        """前台统计块的一份一致拷贝（dict）：拷贝后序号未变才返回，否则重读"""
+        while True:
+            front = self._front
+            row = self._blocks[front].copy()
+            if row[0] >= 0 and self._blocks[front, 0] == row[0]:
+                break
+        values = {name: _number(value) for name, value in zip(FIELDS, row.tolist())}
+        return {
+            'seq': values['seq'], 'tick': values['tick'], 'ticks_per_sec': values['ticks_per_sec'],
+            'population': {name: values[name] for name in ('predator', 'prey', 'plant')},
+            'memory_mb': values['memory_mb'], 'paused': bool(values['paused']),
+            'speed': 'max' if values['speed'] is None else values['speed'],
+            'phases_ms': None if values['total_ms'] is None else {phase: values[f'{phase}_ms'] for phase in PHASES},
+        }
+
+    # ---------- 服务线程 ----------
+    def _serve(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as exc:
+            if not self._ready.is_set():
+                self._error = exc
+                self._ready.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stop.wait()
+
+    async def _client(self, reader, writer):
+        """一个连接：按间隔推送统计，同时逐行接收命令"""
+        self.clients += 1
+        push = asyncio.create_task(self._push(writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._receive(line.decode('utf-8', 'replace').split(), writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            push.cancel()
+            self.clients -= 1
+            writer.close()
+
+    async def _push(self, writer):
+        seq = None
+        try:
+            while True:
+                stats = self.read()
+                if stats['seq'] != seq: # 模拟未发布新统计（如窗口被拖动阻塞）时不重复推送
+                    seq = stats['seq']
+                    self._send(writer, {'type': 'stats', **stats})
+                    await writer.drain()
+                await asyncio.sleep(self.interval)
+        except ConnectionError:
+            pass
+
+    def _receive(self, words, writer):
+        if not words:
+            return
+        command, args = words[0].lower(), words[1:]
+        if command not in COMMANDS:
+            self._send(writer, {'type': 'reply', 'command': command, 'ok': False,
+                                'error': f"unknown command, expected one of {', '.join(COMMANDS)}"})
+            return
+        if command == 'stats':
+            self._send(writer, {'type': 'reply', 'command': command, 'ok': True, **self.read()})
+            return
+        loop = self._loop
+        self._commands.put((command, args, lambda message: loop.call_soon_threadsafe(self._send, writer, message)))
+        self._wake.set()
+
+    @staticmethod
+    def _send(writer, message):
+        if not writer.is_closing():
+            writer.write((json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8'))
+
+    def close(self):
+        """停止服务线程并断开全部连接"""
+        if self._loop is not None and self.thread.is_alive():
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self.thread.join(timeout=5)
+        if self.canvas.telemetry is self:
+            self.canvas.telemetry = None
+
+
+class TelemetryClient:
+    """遥测客户端（阻塞式，供脚本/测试使用）：逐行读取 JSON 消息，发送命令并等待其回复"""
+    def __init__(self, port=DEFAULT_PORT, host='127.0.0.1', timeout=10.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile('rwb')
+        self.stats = [] # 等待回复期间收到的统计
+
+    def receive(self):
+        """下一条消息（dict）；连接关闭时为 None"""
+        line = self.file.readline()
+        return json.loads(line) if line else None
+
+    def next_stats(self):
+        if self.stats:
+            return self.stats.pop(0)
+        while True:
+            message = self.receive()
+            if message is None or message['type'] == 'stats':
+                return message
+
+    def command(self, text):
+        """发送一条命令并返回其回复（期间收到的统计留给 next_stats）"""
+        self.file.write((text + '\n').encode('utf-8'))
+        self.file.flush()
+        while True:
+            message = self.receive()
+            if message is None or message['type'] == 'reply':
+                return message
+            self.stats.append(message)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def watch(port=DEFAULT_PORT, commands=()):
+    """连接到运行中的模拟：依次发送命令并打印回复，然后持续打印统计流"""
+    client = TelemetryClient(port)
+    try:
+        for text in commands:
+            print(json.dumps(client.command(text)))
+        while True:
+            stats = client.next_stats()
+            if stats is None:
+                break
+            phases = stats['phases_ms']
+            total = f"{phases['total']:.2f} ms/tick" if phases and phases['total'] is not None else ''
+            population = stats['population']
+            print(f"tick {stats['tick']:>8}  {stats['ticks_per_sec'] or 0:8.1f} ticks/s  "
+                  f"predator/prey/plant {population['predator']}/{population['prey']}/{population['plant']}  "
+                  f"{stats['memory_mb'] or 0:7.1f} MB  {total}{'  [paused]' if stats['paused'] else ''}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
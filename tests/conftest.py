@@ -0,0 +1,10 @@
+import os
+import sys
+
+# 模块位于仓库根目录（无安装包），测试直接从根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    # 较慢的端到端比对（完整运行模拟后逐位比较两种执行方式）；python -m pytest -m "not slow" 可跳过
+    config.addinivalue_line('markers', 'slow: end-to-end comparisons that run a full simulation')
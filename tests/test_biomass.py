@@ -0,0 +1,44 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_biomass
+Propose: Batched biomass foraging/grazing equals the per-agent calls; regrowth stays within capacity
+'''
+
+import numpy as np
+import pytest
+
+from biomass import CAPACITY, BiomassGrid
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_batched_foraging_matches_single_calls(seed):
+    """整批觅食目标与进食（同一格子只有顺序最靠前的个体吃到）与逐个体调用相同"""
+    rng = np.random.default_rng(seed)
+    grid = BiomassGrid(400, 300)
+    grid.energy[...] = rng.choice([0, grid.residue, grid.edible, 20, grid.capacity], grid.energy.shape)
+    x = rng.integers(-20, 420, 5000).astype(float) # 含地图外的位置
+    y = rng.integers(-20, 320, 5000).astype(float)
+    tx, ty, found = grid.forage_targets(x, y)
+    assert found.any()
+    assert [grid.forage_target(*p) for p in zip(x, y)] == [(a, b) if f else None for a, b, f in zip(tx, ty, found)]
+    serial = BiomassGrid(400, 300)
+    serial.energy[...] = grid.energy
+    gain = grid.graze_many(x, y)
+    assert [serial.graze(*p) for p in zip(x, y)] == gain.tolist()
+    assert np.array_equal(serial.energy, grid.energy)
+
+
+def test_regrowth_is_logistic_and_bounded():
+    grid = BiomassGrid(320, 160)
+    grid.energy[...] = 0
+    grid.energy[0, :] = CAPACITY / 2
+    before = grid.energy.copy()
+    for _ in range(500):
+        grid.grow()
+    assert (grid.energy[1:] == 0).all() # 空格子不会自行长出植被
+    assert (grid.energy[0] > before[0]).all() and (grid.energy <= CAPACITY).all()
+    assert np.all(np.diff(grid.energy[0]) == 0)
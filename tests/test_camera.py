@@ -0,0 +1,90 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_camera
+Propose: Viewport transforms, pan/zoom clamping and view culling keep every visible agent
+'''
+
+import numpy as np
+import pygame
+import pytest
+
+from camera import ZOOM_LEVELS, Camera
+
+
+@pytest.fixture
+def camera():
+    return Camera(800, 600, 20000, 20000)
+
+
+def _image(size=8):
+    return pygame.Surface((size, size), pygame.SRCALPHA)
+
+
+def test_identity_at_origin_and_round_trip(camera):
+    assert camera.to_screen(123, 456) == (123, 456)
+    camera.pan(5000, 3000)
+    camera.zoom_to(ZOOM_LEVELS.index(1) - 3, anchor=(100, 50))
+    sx, sy = camera.to_screen(7000.5, 4321.25)
+    assert camera.to_world(sx, sy) == pytest.approx((7000.5, 4321.25))
+
+
+def test_zoom_keeps_anchor_fixed(camera):
+    camera.pan(8000, 8000)
+    anchor = (200, 150)
+    before = camera.to_world(*anchor)
+    for step in (1, -3, 2):
+        camera.zoom_to(camera.zoom_index + step, anchor)
+        assert camera.to_world(*anchor) == pytest.approx(before)
+
+
+def test_clamp_and_fit(camera):
+    camera.pan(-10 ** 6, -10 ** 6)
+    assert (camera.x, camera.y) == (0, 0)
+    camera.pan(10 ** 7, 10 ** 7)
+    assert camera.view_rect().right <= camera.world_width + 1 and camera.view_rect().bottom <= camera.world_height + 1
+    camera.fit()
+    world = camera.world_on_screen()
+    assert world.width <= camera.view_width and world.height <= camera.view_height
+    assert pygame.Rect(0, 0, camera.view_width, camera.view_height).contains(world)
+    small = Camera(800, 600, 400, 300)
+    assert (small.x, small.y) == (-200, -150) # 世界比视口小时居中
+
+
+@pytest.mark.parametrize('zoom_step', [0, -4, 2])
+def test_point_culling_keeps_everything_visible(camera, zoom_step):
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 20000, (2, 50000))
+    camera.pan(6000, 9000)
+    camera.zoom_to(camera.zoom_index + zoom_step)
+    image = _image()
+    blits = camera.point_blits(x, y, [image])
+    screen = pygame.Rect(0, 0, camera.view_width, camera.view_height)
+    size = camera.image(image).get_size()
+    sx, sy = camera.to_screen(x, y)
+    left = np.floor(sx).astype(int) - size[0] // 2
+    top = np.floor(sy).astype(int) - size[1] // 2
+    visible = {(l, t) for l, t in zip(left.tolist(), top.tolist()) if screen.colliderect(pygame.Rect(l, t, *size))}
+    drawn = {pos for _, pos in blits}
+    assert visible <= drawn
+    assert len(drawn) < len(x) # 视口外的个体不生成绘制项
+
+
+def test_sprite_and_point_blits_agree(camera):
+    camera.pan(300, 200)
+    camera.zoom_to(camera.zoom_index + 1)
+
+    class Dot(pygame.sprite.Sprite):
+        def __init__(self, x, y, image):
+            super().__init__()
+            self.image = image
+            self.rect = image.get_rect(center=(x, y))
+
+    image = _image()
+    points = [tuple(round(v) for v in camera.to_world(sx, sy)) for sx, sy in ((100, 80), (401, 377), (650, 333))]
+    sprites = [Dot(x, y, image) for x, y in points]
+    x, y = (np.array(c, dtype=float) for c in zip(*points))
+    assert [pos for _, pos in camera.sprite_blits(sprites)] == [pos for _, pos in camera.point_blits(x, y, [image])]
@@ -0,0 +1,95 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_chart_buffer
+Propose: History buffers stay bounded; long full-resolution series come from the metrics log
+'''
+
+import numpy as np
+import pytest
+
+from chart_buffer import HistoryBuffer
+from metrics import MetricsLog, MetricsRecorder
+from UI_design import GameCanvas, populate
+
+
+def test_ring_is_bounded_and_keeps_recent_samples():
+    buffer = HistoryBuffer(raw_capacity=64, level_capacity=16)
+    values = np.random.default_rng(0).integers(1, 100, 1000)
+    values[500] = 0 # 灭绝尖峰
+    for value in values:
+        buffer.append(int(value))
+    assert len(buffer.raw) == 64 and len(buffer) == 1000 and not buffer.complete
+    assert buffer.series() == values[-64:].tolist()
+    lo, hi = buffer.envelope(16)
+    assert len(lo) <= 16
+    assert lo.min() == 0 and hi.max() == values.max()
+    assert (buffer.min, buffer.max, buffer.last) == (0, values.max(), values[-1])
+
+
+def test_short_history_is_complete():
+    buffer = HistoryBuffer(raw_capacity=64)
+    for value in range(10):
+        buffer.append(value)
+    assert buffer.complete
+    assert buffer.series() == list(range(10))
+    lo, hi = buffer.envelope()
+    assert lo.tolist() == hi.tolist() == list(range(10))
+
+
+def test_population_series_falls_back_to_metrics_log(tmp_path):
+    """超出图表环形缓冲后从指标日志读取全程序列"""
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    canvas.history = {name: HistoryBuffer(raw_capacity=16, level_capacity=8) for name in canvas.history}
+    recorder = MetricsRecorder(canvas, str(tmp_path), canvas.chart_update_interval, chunk_rows=7)
+    canvas.run(canvas.chart_update_interval * 40)
+    series = canvas.population_series()
+    ring = {name: history.series() for name, history in canvas.history.items()}
+    recorder.close()
+    logged = MetricsLog(str(tmp_path)).read()
+    assert len(series['tick']) == 40 > len(ring['tick'])
+    for name in ('tick', 'predator', 'prey', 'plant'):
+        assert series[name] == logged[name].tolist()
+    assert series['total'] == (logged['predator'] + logged['prey'] + logged['plant']).tolist()
+    # 图表与指标日志在tick末同一时刻采样：环形缓冲保留的最近采样与日志末尾逐项相同
+    for name in ring:
+        assert series[name][-len(ring[name]):] == ring[name]
+
+
+@pytest.mark.parametrize('late, interval', [(True, 30), (False, 10)])
+def test_log_that_does_not_cover_the_chart_is_refused(tmp_path, late, interval):
+    """指标日志中途才挂上或采样间隔与图表不同时，超出环形缓冲后报错而不返回截断/不同间隔的序列"""
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    canvas.history = {name: HistoryBuffer(raw_capacity=16, level_capacity=8) for name in canvas.history}
+    if late:
+        canvas.run(canvas.chart_update_interval * 5)
+    recorder = MetricsRecorder(canvas, str(tmp_path), interval)
+    try:
+        with pytest.raises(RuntimeError):
+            canvas.run(canvas.chart_update_interval * 40)
+        with pytest.raises(RuntimeError):
+            canvas.population_series()
+    finally:
+        recorder.close()
+
+
+def test_run_attaches_a_log_when_the_ring_would_overflow():
+    """未挂指标记录时，超出环形缓冲的 run 临时记录指标日志，返回与缓冲足够大时相同的全程序列"""
+    def canvas_with_ring(capacity):
+        canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+        canvas.history = {name: HistoryBuffer(raw_capacity=capacity, level_capacity=8) for name in canvas.history}
+        return canvas
+
+    interval = GameCanvas(headless=True).chart_update_interval
+    expected = canvas_with_ring(64).run(interval * 40)
+    canvas = canvas_with_ring(16)
+    canvas.run(interval * 5)
+    series = canvas.run(interval * 35) # 前5条来自环形缓冲，其余来自临时指标日志
+    assert len(series['tick']) == 40
+    assert series == expected
+    assert canvas.metrics is None
+    with pytest.raises(RuntimeError): # 缓冲已溢出且没有指标日志，不返回截断的序列
+        canvas.population_series()
@@ -0,0 +1,84 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_checkpoint
+Propose: Resuming from a (auto)save matches the uninterrupted run; fork autosave only in single-threaded processes
+'''
+
+import os
+import threading
+
+import pytest
+
+from checkpoint import Autosaver, load_checkpoint, save_checkpoint
+from sim_random import fingerprint
+from UI_design import GameCanvas, populate
+
+fork_modes = [False] + ([None] if hasattr(os, 'fork') else [])
+
+
+def _canvas(engine):
+    return populate(GameCanvas(engine=engine, headless=True, seed=5), 8, 60)
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_resume_matches_uninterrupted_run(tmp_path, engine):
+    path = tmp_path / 'world.npz'
+    canvas = _canvas(engine)
+    canvas.run(500)
+    save_checkpoint(canvas, path)
+    canvas.run(500)
+    restored = load_checkpoint(path)
+    assert restored.current_tick == 500
+    restored.run(500)
+    assert fingerprint(restored) == fingerprint(canvas)
+    assert restored.events == canvas.events
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+@pytest.mark.parametrize('fork', fork_modes)
+def test_autosave_resume(tmp_path, engine, fork):
+    path = tmp_path / 'autosave.npz'
+    canvas = _canvas(engine)
+    saver = Autosaver(canvas, path, 400, fork=fork)
+    canvas.run(500)
+    saver.close()
+    canvas.autosaver = None
+    canvas.run(500)
+    assert saver.failures == 0
+    restored = load_checkpoint(path)
+    assert restored.current_tick == 400
+    restored.run(600)
+    assert fingerprint(restored) == fingerprint(canvas)
+
+
+def test_autosave_failure_is_counted(tmp_path):
+    canvas = _canvas('sprite')
+    saver = Autosaver(canvas, tmp_path / 'missing' / 'autosave.npz', 10)
+    canvas.run(10)
+    saver.close()
+    assert saver.failures == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_autosave_does_not_fork_with_other_threads(tmp_path):
+    """有其他线程运行时改用后台线程写盘；fork=True 时报错"""
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        canvas = _canvas('sprite')
+        saver = Autosaver(canvas, tmp_path / 'autosave.npz', 10)
+        canvas.run(10)
+        assert saver.executor is not None and not isinstance(saver.pending, int)
+        saver.close()
+        assert os.path.exists(tmp_path / 'autosave.npz')
+        strict = Autosaver(_canvas('sprite'), tmp_path / 'strict.npz', 10, fork=True)
+        with pytest.raises(RuntimeError):
+            strict.canvas.run(10)
+    finally:
+        stop.set()
+        thread.join()
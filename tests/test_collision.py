@@ -0,0 +1,95 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_collision
+Propose: Batched contact pairs match per-sprite tests; simultaneous resolution semantics are pinned
+'''
+
+import numpy as np
+import pygame
+import pytest
+
+from collision import BITE_DAMAGE, BITE_GAIN, _centers, _rects, circle_contacts, rect_contacts, resolve_attacks, resolve_grazing
+from spatial_index import grid_colliders
+from UI_design import GameCanvas, populate
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_contact_pairs_match_per_sprite_collision(seed):
+    """批量点对与逐个体判定（spritecollide + collide_circle / colliderect）完全一致，且按下标排序"""
+    canvas = populate(GameCanvas(headless=True, seed=seed), 200, 2000)
+    canvas._rebuild_grids()
+    predators, prey, plants = canvas.predators.sprites(), canvas.prey.sprites(), canvas.plants.sprites()
+    prey_index = {q: j for j, q in enumerate(prey)}
+    plant_index = {f: j for j, f in enumerate(plants)}
+    attack = sorted(
+        (i, prey_index[q]) for i, p in enumerate(predators)
+        for q in pygame.sprite.spritecollide(p, grid_colliders(canvas.prey, p), False, pygame.sprite.collide_circle)
+    )
+    eat = sorted(
+        (i, plant_index[f]) for i, q in enumerate(prey)
+        for f in grid_colliders(canvas.plants, q) if q.rect.colliderect(f.rect)
+    )
+    px, py = _centers(predators)
+    qx, qy = _centers(prey)
+    qi, tj = circle_contacts(px, py, np.array([p.radius for p in predators], dtype=float),
+                             qx, qy, np.array([q.radius for q in prey], dtype=float))
+    ei, ej = rect_contacts(_rects(prey), _rects(plants))
+    assert attack and eat
+    assert list(zip(qi.tolist(), tj.tolist())) == attack
+    assert list(zip(ei.tolist(), ej.tolist())) == eat
+
+
+def _duel(prey_energy):
+    """两个捕食者同时接触一个猎物（左右各一）"""
+    canvas = populate(GameCanvas(headless=True, seed=0), 2, 1)
+    left, right = canvas.predators.sprites()
+    victim = canvas.prey.sprites()[0]
+    left.rect.center, right.rect.center, victim.rect.center = (100, 100), (104, 100), (102, 100)
+    left.energy = right.energy = 50
+    victim.energy = prey_energy
+    return canvas, left, right, victim
+
+
+def test_bites_on_one_prey_accumulate():
+    canvas, left, right, victim = _duel(40)
+    assert resolve_attacks(canvas) == 2
+    assert victim.energy == 40 - 2 * BITE_DAMAGE
+    assert left.energy == right.energy == 50 + BITE_GAIN
+    assert left.hunt_cooldown == right.hunt_cooldown == 0
+    assert canvas.events['kills'] == 0
+
+
+def test_kill_puts_every_contact_on_cooldown():
+    """单个捕食者的伤害不足以捕杀，两者累加后捕杀：全部接触者进入冷却"""
+    canvas, left, right, victim = _duel(BITE_DAMAGE + 1)
+    resolve_attacks(canvas)
+    canvas.spawn_queue.flush()
+    assert victim.dead and victim not in canvas.prey
+    assert canvas.events['kills'] == 1
+    assert left.hunt_cooldown == left.HUNT_COOLDOWN and right.hunt_cooldown == right.HUNT_COOLDOWN
+
+
+def test_plant_is_eaten_by_first_contact_only():
+    canvas = populate(GameCanvas(headless=True, seed=0), 0, 2)
+    first, second = canvas.prey.sprites()
+    plant = canvas.plants.sprites()[0]
+    for animal in (first, second):
+        animal.rect.center = plant.rect.center
+        animal.energy, animal.stamina = 10, 10
+    assert resolve_grazing(canvas, canvas.plants) == 1
+    canvas.spawn_queue.flush()
+    assert plant.dead and plant not in canvas.plants
+    assert first.energy == min(10 + plant.energy, first.max_energy) and first.stamina == 25
+    assert second.energy == 10 and second.stamina == 10
+
+
+def test_batched_run_totals_are_pinned():
+    """批量结算后的精灵引擎结果（种子0）：改变接触结算规则时此处的数值需随之更新并在 README 说明"""
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    canvas.run(1500)
+    assert (canvas.events['kills'], canvas.events['plant_deaths']) == (10, 199)
+    assert (len(canvas.predators), len(canvas.prey), canvas.current_plants) == (19, 148, 47)
@@ -0,0 +1,60 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_determinism
+Propose: Seeded runs are bit-identical; different seeds diverge (both engines)
+'''
+
+import functools
+
+import pytest
+
+from sim_random import fingerprint
+from UI_design import GameCanvas, populate
+
+TICKS = 1000
+
+
+@functools.lru_cache(maxsize=None)
+def _run(engine, seed, repeat):
+    """无界面运行一次，返回 (种群序列, 事件计数, 指纹)；repeat 只用于区分缓存"""
+    canvas = GameCanvas(engine=engine, headless=True, seed=seed, mutation=1.0)
+    populate(canvas, 10, 50)
+    canvas.run(TICKS)
+    return canvas.population_series(), dict(canvas.events), fingerprint(canvas)
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_same_seed_is_identical(engine):
+    series, events, state = _run(engine, 0, 0)
+    assert len(series['tick']) > 1
+    assert sum(events.values()) > 0
+    again = _run(engine, 0, 1)
+    assert series == again[0]
+    assert events == again[1]
+    assert state == again[2]
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_different_seeds_diverge(engine):
+    series, events, _ = _run(engine, 0, 0)
+    other_series, other_events, _ = _run(engine, 1, 0)
+    assert series['tick'] == other_series['tick']
+    assert (series, events) != (other_series, other_events)
+    assert any(series[name] != other_series[name] for name in ('predator', 'prey', 'plant'))
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_initial_population_spans_the_world(engine):
+    """初始生物在整个世界范围内生成（x 取自宽度、y 取自高度）"""
+    canvas = populate(GameCanvas(1500, 1000, engine=engine, headless=True, seed=0), 200, 2000)
+    for group in (canvas.predators, canvas.prey):
+        if canvas.world is not None:
+            store = canvas.world.predators if group is canvas.predators else canvas.world.prey
+            x, y = store.x, store.y
+        else:
+            x, y = zip(*(c.rect.center for c in group))
+        assert 1000 < max(x) <= 1500 + 50 and max(y) <= 1000 + 50
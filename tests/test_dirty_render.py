@@ -0,0 +1,53 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_dirty_render
+Propose: Dirty-rectangle frames are pixel-identical to full redraws
+'''
+
+import numpy as np
+import pygame
+import pytest
+
+import dirty_render
+from dirty_render import _full_frame
+from UI_design import GameCanvas, populate
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('engine, vegetation', [('sprite', 'sprites'), ('numpy', 'sprites'), ('sprite', 'grid')])
+def test_dirty_frames_match_full_redraw(engine, vegetation, monkeypatch):
+    monkeypatch.setattr(dirty_render, 'MAX_DIRTY_RECTS', 10 ** 6) # 比对的是脏矩形路径本身，不按个体数退回整屏
+    canvas = populate(GameCanvas(engine=engine, seed=0, dirty=True, vegetation=vegetation), 20, 200)
+    reference = canvas.screen.copy()
+    try:
+        for frame in range(60):
+            canvas.step()
+            canvas.dirty.render()
+            if frame % 10 == 0:
+                _full_frame(canvas, reference)
+                assert np.array_equal(pygame.surfarray.array2d(canvas.screen), pygame.surfarray.array2d(reference)), frame
+    finally:
+        if canvas.world is not None:
+            canvas.world.close()
+    # 摄像机不动：除第一帧与植被层重新着色外都走脏矩形路径
+    assert canvas.dirty.full_frames + canvas.dirty.dirty_frames == 60
+    assert canvas.dirty.dirty_frames > canvas.dirty.full_frames >= 1
+
+
+@pytest.mark.slow
+def test_crowded_frames_fall_back_to_full_redraw(monkeypatch):
+    """可见个体的数量或总面积超过阈值时整屏重绘"""
+    canvas = populate(GameCanvas(seed=0, dirty=True), 20, 200)
+    for limit, area, full in ((10 ** 6, 1.0, 0), (0, 1.0, 1), (10 ** 6, 0.0, 1)):
+        monkeypatch.setattr(dirty_render, 'MAX_DIRTY_RECTS', limit)
+        monkeypatch.setattr(dirty_render, 'MAX_DIRTY_AREA', area)
+        canvas.step()
+        canvas.dirty.render() # 第一帧或上一组阈值下的一帧
+        frames = canvas.dirty.full_frames
+        canvas.step()
+        canvas.dirty.render()
+        assert canvas.dirty.full_frames - frames == full
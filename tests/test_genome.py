@@ -0,0 +1,39 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_genome
+Propose: Vectorized mutation statistics and bounds
+'''
+
+import numpy as np
+
+from genome import PREY_TRAITS, mutate, trait_bounds, trait_stats
+
+
+def test_mutation_statistics():
+    """有突变时均值近似不变、方差按代增长、取值不越界，直方图覆盖全部基因组"""
+    population, generations = 5000, 10
+    low, high, sigma = trait_bounds(PREY_TRAITS)
+    defaults = (low + high) / 2
+    values = np.tile(defaults, (population, 1))
+    rng = np.random.default_rng(0)
+    for _ in range(generations):
+        values = mutate(values, PREY_TRAITS, rng, 1.0)
+    stats = trait_stats(values, PREY_TRAITS)
+    assert ((values >= low) & (values <= high)).all()
+    assert (stats['hist'].sum(axis=1) == population).all()
+    assert np.allclose(stats['mean'], values.mean(axis=0)) and np.allclose(stats['var'], values.var(axis=0))
+    assert (np.abs(stats['mean'] / defaults - 1) < 0.05).all()
+    assert (np.sqrt(stats['var']) / defaults > sigma).all() # 10 代后的离散程度超过单代的突变幅度
+
+
+def test_zero_mutation_copies_and_consumes_no_randomness():
+    low, high, _ = trait_bounds(PREY_TRAITS)
+    values = np.tile((low + high) / 2, (100, 1))
+    rng = np.random.default_rng(0)
+    state = rng.bit_generator.state
+    assert np.array_equal(mutate(values, PREY_TRAITS, rng, 0), values)
+    assert rng.bit_generator.state == state
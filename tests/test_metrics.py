@@ -0,0 +1,111 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_metrics
+Propose: Metrics log round-trips: event totals add up, range/streaming reads, appending after resume
+'''
+
+import numpy as np
+import pytest
+
+from checkpoint import load_checkpoint, save_checkpoint
+from metrics import FORMATS, MetricsLog, MetricsRecorder, pq
+from UI_design import GameCanvas, populate
+
+formats = [fmt for fmt in FORMATS if fmt == 'npy' or pq is not None]
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_event_counts_add_up(tmp_path, engine):
+    """相邻采样的种群变化等于区间内的出生减死亡，捕杀数不超过被捕食者死亡数"""
+    canvas = populate(GameCanvas(engine=engine, headless=True, seed=0), 20, 200)
+    recorder = MetricsRecorder(canvas, str(tmp_path), interval=10, chunk_rows=16)
+    canvas.run(1200)
+    recorder.close()
+    log = MetricsLog(str(tmp_path))
+    data = log.read()
+    assert len(log) == 120 == len(data['tick'])
+    for species in ('predator', 'prey'):
+        assert np.array_equal(np.diff(data[species]), (data[species + '_births'] - data[species + '_deaths'])[1:])
+    assert data['prey_births'].sum() > 0 and data['kills'].sum() > 0
+    assert (data['kills'] <= data['prey_deaths']).all()
+    part = log.read(('prey', 'kills'), 400, 800) # 只读取覆盖该范围的分块
+    window = (data['tick'] >= 400) & (data['tick'] < 800)
+    assert np.array_equal(part['prey'], data['prey'][window]) and np.array_equal(part['kills'], data['kills'][window])
+
+
+@pytest.mark.parametrize('fmt', formats)
+def test_log_round_trip_and_append(tmp_path, fmt):
+    directory = str(tmp_path)
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    recorder = MetricsRecorder(canvas, directory, interval=10, chunk_rows=8, fmt=fmt)
+    canvas.run(205)
+    buffered = recorder.series(('tick', 'prey'))
+    recorder.close()
+    log = MetricsLog(directory)
+    data = log.read()
+    assert data['tick'].tolist() == list(range(10, 210, 10))
+    assert np.array_equal(buffered['prey'], data['prey']) # 读取时包含缓冲中未落盘的行
+    streamed = np.concatenate([chunk['prey'] for chunk in log.chunks(['prey'], 50, 120)])
+    assert np.array_equal(streamed, data['prey'][(data['tick'] >= 50) & (data['tick'] < 120)])
+    # 同一目录再次记录时接着追加
+    recorder = MetricsRecorder(canvas, directory, interval=10, chunk_rows=8, fmt=fmt)
+    canvas.run(100)
+    recorder.close()
+    log.refresh()
+    assert log.read(['tick'])['tick'].tolist() == list(range(10, 310, 10))
+
+
+@pytest.mark.parametrize('fmt', formats)
+def test_resume_truncates_at_the_resume_tick(tmp_path, fmt):
+    """从存档续跑：截掉存档tick之后的采样（含跨越该tick的分块中的行），续写结果与不中断时相同"""
+    directory, whole = str(tmp_path / 'log'), str(tmp_path / 'whole')
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    recorder = MetricsRecorder(canvas, directory, interval=10, chunk_rows=8, fmt=fmt)
+    canvas.run(155)
+    recorder.flush()
+    save_checkpoint(canvas, str(tmp_path / 'world.npz'))
+    canvas.run(145)
+    recorder.close()
+    resumed = load_checkpoint(str(tmp_path / 'world.npz'))
+    recorder = MetricsRecorder(resumed, directory, interval=10, chunk_rows=8, fmt=fmt)
+    assert MetricsLog(directory).read(['tick'])['tick'].tolist() == list(range(10, 160, 10))
+    resumed.run(145)
+    recorder.close()
+    reference = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    recorder = MetricsRecorder(reference, whole, interval=10, chunk_rows=8, fmt=fmt)
+    reference.run(300)
+    recorder.close()
+    data, expected = MetricsLog(directory).read(), MetricsLog(whole).read()
+    assert data['tick'].tolist() == list(range(10, 310, 10))
+    assert all(np.array_equal(data[name], expected[name], equal_nan=True) for name in expected)
+    # 新的运行（tick 0）复用目录：旧运行的采样全部截掉
+    MetricsRecorder(populate(GameCanvas(headless=True, seed=1), 10, 50), directory, interval=10, fmt=fmt).close()
+    assert len(MetricsLog(directory)) == 0
+
+
+def test_interval_change_and_gaps_are_refused(tmp_path):
+    directory = str(tmp_path)
+    canvas = populate(GameCanvas(headless=True, seed=0), 10, 50)
+    recorder = MetricsRecorder(canvas, directory, interval=10)
+    canvas.run(90)
+    recorder.close()
+    with pytest.raises(ValueError):
+        MetricsRecorder(canvas, directory, interval=30)
+    canvas.run(20) # 日志停在 tick 90，下一次采样在 tick 110
+    with pytest.raises(ValueError):
+        MetricsRecorder(canvas, directory, interval=10)
+    assert MetricsLog(directory).read(['tick'])['tick'].tolist() == list(range(10, 100, 10))
+
+
+def test_layout_mismatch_is_refused(tmp_path):
+    canvas = populate(GameCanvas(headless=True, seed=0), 1, 1)
+    MetricsRecorder(canvas, str(tmp_path), fmt='npy').close()
+    if pq is not None:
+        with pytest.raises(ValueError):
+            MetricsRecorder(canvas, str(tmp_path), fmt='parquet')
+    with pytest.raises(KeyError):
+        list(MetricsLog(str(tmp_path)).chunks(['no_such_column']))
@@ -0,0 +1,111 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_parallel
+Propose: Tick phases split into x strips (snapshot → per-tile intents → merge) are bit-identical to serial execution
+'''
+
+import numpy as np
+import pytest
+
+import soa_engine
+from benchmark import build_canvas
+from parallel import PROBE_BUDGET, TileExecutor, tile_bounds
+from sim_random import fingerprint
+from UI_design import GameCanvas, populate
+
+
+class InlineTiles:
+    """进程内按条带依次执行意图函数（与 TileExecutor 相同的快照/输出约定，不启动进程）"""
+    min_agents = 0
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+
+    def run(self, fn, arrays, out, params):
+        return soa_engine.merge_intents([fn(arrays, out, params, bounds) for bounds in tile_bounds(arrays['x'], self.tiles)])
+
+
+def _final(tiles, vegetation, ticks=300):
+    canvas = populate(GameCanvas(engine='numpy', headless=True, seed=0, vegetation=vegetation), 40, 400)
+    if tiles:
+        canvas.world.executor = InlineTiles(tiles)
+    canvas.run(ticks)
+    world = canvas.world
+    return fingerprint(canvas), [getattr(store, name).copy() for store in (world.predators, world.prey, world.plants) for name in store._cols]
+
+
+@pytest.mark.parametrize('vegetation', ['sprites', 'grid'])
+@pytest.mark.parametrize('tiles', [1, 3, 7])
+def test_tiled_tick_matches_serial(tiles, vegetation):
+    serial_print, serial = _final(0, vegetation)
+    tiled_print, tiled = _final(tiles, vegetation)
+    assert tiled_print == serial_print
+    assert all(a.shape == b.shape and np.array_equal(a, b) for a, b in zip(serial, tiled))
+
+
+@pytest.mark.parametrize('vegetation, expected', [('sprites', (42, 426, 29)), ('grid', (43, 506, 108))])
+def test_seeded_array_run_is_pinned(vegetation, expected):
+    """分块意图（每阶段为每个个体预先抽取随机数）下的数组引擎结果（种子0）：改变随机数消耗时此处的数值需随之更新并在 README 说明"""
+    canvas = populate(GameCanvas(engine='numpy', headless=True, seed=0, vegetation=vegetation), 20, 200)
+    canvas.run(1500)
+    assert (len(canvas.predators), len(canvas.prey), canvas.current_plants) == expected
+
+
+def test_tile_bounds_cover_every_agent_once():
+    x = np.random.default_rng(0).uniform(0, 1500, 1000)
+    x[:50] = 700.0 # 大量重复坐标
+    bounds = tile_bounds(x, 8)
+    assert sum(np.count_nonzero((x >= lo) & (x < hi)) for lo, hi in bounds) == len(x)
+    assert tile_bounds(np.zeros(0), 4) == [(-np.inf, np.inf)]
+
+
+def test_merge_keeps_tile_order():
+    merged = soa_engine.merge_intents([
+        {'pairs': 2, 'births': np.array([5]), 'contacts': (np.array([1]), np.array([9]))},
+        {'pairs': 3, 'births': np.array([0, 2]), 'contacts': (np.array([0, 4]), np.array([8, 7]))},
+    ])
+    assert merged['pairs'] == 5
+    assert merged['births'].tolist() == [5, 0, 2]
+    assert [part.tolist() for part in merged['contacts']] == [[1, 0, 4], [9, 8, 7]]
+
+
+@pytest.mark.parametrize('slowdown', [3.0, 11.0])
+def test_adaptive_probes_stay_within_budget(slowdown):
+    """自适应：可用核数不足时始终串行；重测较慢一方的额外耗时不超过较快一方累计耗时的 PROBE_BUDGET"""
+    executor = TileExecutor(2, adaptive=True)
+    try:
+        executor.cpus = 1
+        assert not any(executor._mode('prey_intents') for _ in range(200))
+        executor.cpus, executor.ready = 2, []
+        executor.cost['prey_intents'] = [1.0, slowdown] # 并行比串行慢
+        modes = [executor._mode('prey_intents') for _ in range(10_000)]
+        assert 0 < sum(modes)
+        assert sum(modes) * (slowdown - 1.0) <= PROBE_BUDGET * len(modes)
+    finally:
+        executor.close()
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('adaptive', [False, True])
+def test_worker_processes_match_serial(adaptive):
+    """强制多进程与自适应选择（单核机器上退回串行）都与串行逐位一致"""
+    finals = []
+    for workers in (0, 2):
+        canvas = build_canvas(200, 2000, 'numpy', seed=0)
+        world = canvas.world
+        if workers:
+            world.executor = TileExecutor(workers, min_agents=0, adaptive=adaptive)
+        try:
+            canvas.run(60)
+            finals.append((fingerprint(canvas), [
+                getattr(store, name).copy() for store in (world.predators, world.prey, world.plants) for name in store._cols
+            ]))
+        finally:
+            world.close()
+    (serial_print, serial), (parallel_print, parallel) = finals
+    assert parallel_print == serial_print
+    assert all(a.shape == b.shape and np.array_equal(a, b) for a, b in zip(serial, parallel))
@@ -0,0 +1,168 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_perception
+Propose: Trig-free vision/hearing tests agree with the original angle/sqrt formulas
+'''
+
+import math
+
+from hypothesis import given, settings, strategies as st
+import numpy as np
+import pytest
+
+import perception
+from perception import (
+    BOUNDARY_BAND, cone_mask, cone_reference, cone_reference_mask, hears, in_cone, senses, senses_array,
+    take_senses, within, within_mask
+)
+
+# 原实现的常用视野角度 + 退化情形（0°、180°、360°）
+FOVS = (220, 85, 180, 0, 360, 90, 359, 1, 133.7)
+# 视野边界与 0°/360° 回绕附近的朝向
+SPECIAL_HEADINGS = (0, 90, 180, 270, 359.9999, 0.0001, 110, 250, 42.5, 317.5)
+
+headings = st.one_of(st.sampled_from(SPECIAL_HEADINGS), st.floats(0, 360, allow_nan=False))
+fovs = st.one_of(st.sampled_from(FOVS), st.floats(-10, 370, allow_nan=False))
+offsets = st.integers(-120, 120) # 精灵中心为整数坐标
+radii = st.one_of(st.sampled_from((100, 60, 56, 45, 87.5, 56.25, 1, 0.5, 0)), st.floats(0, 200, allow_nan=False))
+
+
+def heading(angle):
+    return math.cos(math.radians(angle)), math.sin(math.radians(angle))
+
+
+def within_reference(dx, dy, radius):
+    """原 _is_within_distance/_is_within_hearing：开方后比较"""
+    return (dx ** 2 + dy ** 2) ** 0.5 <= radius
+
+
+# ---------- 单个目标 ----------
+@given(headings, offsets, offsets, fovs)
+@settings(max_examples=2000)
+def test_in_cone_matches_reference(angle, dx, dy, fov):
+    hx, hy = heading(angle)
+    assert in_cone(senses(fov, 100), hx, hy, dx, dy, dx * dx + dy * dy) == cone_reference(hx, hy, dx, dy, fov)
+
+
+@given(offsets, offsets, radii)
+@settings(max_examples=2000)
+def test_within_and_hears_match_reference(dx, dy, radius):
+    s = senses(90, radius, radius)
+    expected = within_reference(dx, dy, radius)
+    assert within(dx * dx + dy * dy, radius, s.sensory2) == expected
+    assert hears(s, dx, dy) == expected
+
+
+@given(offsets, offsets)
+def test_within_on_exact_radius(dx, dy):
+    """半径恰为距离（及其上下一个浮点数）时按原实现开方比较"""
+    distance = (dx * dx + dy * dy) ** 0.5
+    for radius in (distance, np.nextafter(distance, 0), np.nextafter(distance, math.inf)):
+        assert within(dx * dx + dy * dy, radius, radius * radius) == within_reference(dx, dy, radius)
+
+
+@pytest.mark.parametrize('angle, dx, dy, fov, expected', [
+    # 0°/360° 回绕：朝向略低于 360°，目标在 +x 轴两侧
+    (359.9999, 10, -1, 85, True),
+    (359.9999, 10, 1, 85, True),
+    (0.0001, 10, 1, 85, True),
+    (0.0001, 10, -1, 85, True),
+    (0, -10, 0, 220, False), # 正后方不在 220° 视野内
+    (0, -10, -5, 220, False),
+    (0, -5, -10, 220, False), # 夹角约 116.6° > 110°
+    (0, -3, -10, 220, True), # 夹角约 106.7° < 110°
+    (180, 10, 0, 359, False),
+    (180, 10, 0, 360, True),
+    (0, 0, 0, 1, True), # 与自身重合时按 +x 方向判定（atan2(0, 0)=0）
+    (90, 0, 0, 1, False),
+    (0, 5, 0, 0, True), # 零视野只看正前方
+    (0, 5, 1, 0, False),
+    (0, 5, 1, -10, False), # 负角度处处不可见
+])
+def test_in_cone_wraparound(angle, dx, dy, fov, expected):
+    hx, hy = heading(angle)
+    assert cone_reference(hx, hy, dx, dy, fov) == expected
+    assert in_cone(senses(fov, 100), hx, hy, dx, dy, dx * dx + dy * dy) == expected
+
+
+@pytest.mark.parametrize('dx, dy, fov', [
+    (1, 1, 90), (1, -1, 90), # 恰在 ±45° 视野边界上
+    (0, 7, 180), (0, -7, 180), # 180° 视野的侧向边界
+    (-3, 3, 270), (-3, -3, 270), # 钝角视野的后方边界
+])
+def test_in_cone_boundary_band_falls_back(monkeypatch, dx, dy, fov):
+    """判定值落在 BOUNDARY_BAND 内时改用原角度公式"""
+    calls = []
+
+    def reference(*args):
+        calls.append(args)
+        return cone_reference(*args)
+
+    monkeypatch.setattr(perception, 'cone_reference', reference)
+    s = senses(fov, 100)
+    norm = dx * dx + dy * dy
+    assert abs((dx * dx) - s.cos2 * norm) <= BOUNDARY_BAND * norm
+    assert in_cone(s, 1.0, 0.0, dx, dy, norm) == cone_reference(1.0, 0.0, dx, dy, fov)
+    assert calls
+
+
+@pytest.mark.parametrize('d2, radius, expected', [
+    (25, 5, True),
+    (25, 5 - 1e-12, False), # 差值在 BOUNDARY_BAND 内：开方比较
+    (25, 5 + 1e-12, True),
+    (0, 0, True), # 听觉半径为 0 时仍听得到重合的目标
+    (1, 0, False),
+])
+def test_within_boundary_band(d2, radius, expected):
+    assert within(d2, radius, radius * radius) == expected
+    assert within_mask(np.array([d2], dtype=float), radius, radius * radius)[0] == expected
+
+
+# ---------- 整批点对 ----------
+pair_batches = st.lists(st.tuples(headings, offsets, offsets, fovs, radii), min_size=1, max_size=64)
+
+
+def _columns(batch):
+    angle, dx, dy, fov, radius = (np.array(column, dtype=float) for column in zip(*batch))
+    return np.cos(np.radians(angle)), np.sin(np.radians(angle)), dx, dy, fov, radius
+
+
+@given(pair_batches, fovs)
+@settings(max_examples=500)
+def test_cone_mask_shared_senses(batch, fov):
+    hx, hy, dx, dy, _, _ = _columns(batch)
+    d2 = dx * dx + dy * dy
+    mask = cone_mask(senses(fov, 100), hx, hy, dx, dy, d2)
+    assert mask.tolist() == [cone_reference(*args, fov) for args in zip(hx, hy, dx, dy)]
+    assert mask.tolist() == cone_reference_mask(hx, hy, dx, dy, fov).tolist()
+
+
+@given(pair_batches)
+@settings(max_examples=500)
+def test_cone_mask_per_pair_senses(batch):
+    """逐个体性状：每个点对各自的视野角度与半径（含经 take_senses 展开的情形）"""
+    hx, hy, dx, dy, fov, radius = _columns(batch)
+    d2 = dx * dx + dy * dy
+    expected = [cone_reference(*args) for args in zip(hx, hy, dx, dy, fov)]
+    s = senses_array(fov, radius, radius)
+    assert cone_mask(s, hx, hy, dx, dy, d2).tolist() == expected
+    assert cone_mask(take_senses(s, np.arange(len(fov))), hx, hy, dx, dy, d2).tolist() == expected
+    reference = np.sqrt(d2) <= radius
+    assert within_mask(d2, s.sensory, s.sensory2).tolist() == reference.tolist()
+    assert within_mask(d2, s.hearing, s.hearing2).tolist() == reference.tolist()
+
+
+def test_cone_mask_wraparound_and_boundary():
+    """逐个判定中的回绕与边界情形在批量版中结果相同"""
+    cases = [
+        (359.9999, 10, -1, 85), (0.0001, 10, 1, 85), (0, -10, 0, 220), (0, -5, -10, 220),
+        (0, 1, 1, 90), (0, 1, -1, 90), (0, 0, 7, 180), (0, -3, 3, 270), (90, 0, 0, 1), (0, 5, 1, 0),
+    ]
+    angle, dx, dy, fov = (np.array(column, dtype=float) for column in zip(*cases))
+    hx, hy = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    expected = [cone_reference(*args) for args in zip(hx, hy, dx, dy, fov)]
+    assert cone_mask(senses_array(fov, 100), hx, hy, dx, dy, dx * dx + dy * dy).tolist() == expected
@@ -0,0 +1,76 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_pooling
+Propose: Deferred spawn/despawn queue semantics; the object-pool experiment (benchmark) leaves results unchanged
+'''
+
+import pygame
+import pytest
+
+from benchmark import SpritePool, measure_pool
+from creature_def import Predator
+from pooling import SpawnQueue
+from UI_design import GameCanvas, populate
+from vegetation import Plant
+
+
+class Dot(pygame.sprite.Sprite):
+    SPECIES = 'prey'
+
+    def __init__(self):
+        super().__init__()
+        self.rect = pygame.Rect(0, 0, 4, 4)
+        self.dead = False
+
+
+def test_queue_applies_births_and_deaths_at_flush():
+    group = pygame.sprite.Group()
+    old = [Dot() for _ in range(3)]
+    group.add(*old)
+    events = {'prey_births': 0, 'prey_deaths': 0}
+    queue = SpawnQueue(events)
+    queue.despawn(old[1])
+    newborn = Dot()
+    queue.spawn(group, newborn)
+    assert old[1].dead and old[1] in group and newborn not in group # 阶段内只登记
+    queue.flush()
+    assert group.sprites() == [old[0], old[2], newborn]
+    assert events == {'prey_births': 1, 'prey_deaths': 1}
+    assert not queue.births and not queue.deaths
+
+
+def test_pool_reuses_instances_only_after_recycle():
+    """不安装到类上（安装无法还原），直接调用取实例的钩子"""
+    pool = SpritePool()
+    first = pool._new(Plant)
+    Plant.__init__(first, 10, 10, 0)
+    pool.retired.append(first)
+    assert pool._new(Plant) is not first # 回收前不复用
+    pool.recycle()
+    again = pool._new(Plant)
+    Plant.__init__(again, 30, 30, 1)
+    assert again is first and again.rect.center == (30, 30) and again.cluster_id == 1 and not again.dead
+    assert (pool.created, pool.reused) == (2, 1)
+    assert pool._new(Predator) is not first
+
+
+def test_install_refuses_outside_the_measure_process():
+    canvas = populate(GameCanvas(headless=True, seed=3), 5, 50)
+    flush, rebuild = canvas.spawn_queue.flush, canvas._rebuild_grids
+    with pytest.raises(RuntimeError):
+        SpritePool().install(canvas)
+    assert '__new__' not in vars(Predator) and '__new__' not in vars(Plant)
+    assert canvas.spawn_queue.flush == flush and canvas._rebuild_grids == rebuild
+
+
+@pytest.mark.slow
+def test_pooled_measurement_matches_unpooled():
+    unpooled = measure_pool(20, 200, ticks=300, seed=3, pooled=False)
+    pooled = measure_pool(20, 200, ticks=300, seed=3, pooled=True)
+    assert pooled['population'] == unpooled['population']
+    assert pooled['reused'] > 0
+    assert pooled['created'] + pooled['reused'] >= pooled['instances_per_tick'] * 300
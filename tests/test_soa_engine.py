@@ -0,0 +1,42 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_soa_engine
+Propose: The NumPy engine follows the sprite rules on branches that are easy to miss
+'''
+
+import numpy as np
+
+from creature_def import Prey
+from UI_design import GameCanvas
+from vegetation import Plant
+
+
+def _sprite_prey_on_plant(x, y, energy, speed):
+    canvas = GameCanvas(headless=True, seed=0)
+    prey = Prey.found_many(canvas, np.array([x]), np.array([y]), canvas.rng['prey'])[0]
+    prey.energy, prey.speed = energy, speed
+    canvas.prey.add(prey)
+    canvas.plants.add(*Plant.spawn_many(np.array([x]), np.array([y]), np.array([0]), canvas.rng['plant']))
+    canvas.step()
+    return prey.speed
+
+
+def _array_prey_on_plant(x, y, energy, speed):
+    canvas = GameCanvas(engine='numpy', headless=True, seed=0)
+    world = canvas.world
+    world.add_prey(np.array([x]), np.array([y]))
+    world.add_plants(np.array([x]), np.array([y]), np.array([0]))
+    world.prey.energy[:], world.prey.speed[:] = energy, speed
+    canvas.step()
+    return float(world.prey.speed[0])
+
+
+def test_hungry_prey_on_its_plant_speeds_up_in_both_engines():
+    """饥饿的被捕食者已在目标植物上：朝向不变、速度乘 1.05（不游荡），之后照常移动减速"""
+    expected = max(1.5, min(2.0 * 1.05, Prey(0, 0).max_speed) - 0.05)
+    assert _sprite_prey_on_plant(400, 300, 10, 2.0) == expected
+    assert _array_prey_on_plant(400, 300, 10, 2.0) == expected
@@ -0,0 +1,120 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_spatial_index
+Propose: Grid queries return every true neighbour in group order; batched pairs equal brute force
+'''
+
+import numpy as np
+import pygame
+import pytest
+
+from sim_random import fingerprint
+from spatial_index import SpatialGrid, grid_candidates, grid_pairs
+from UI_design import GameCanvas, populate
+
+
+class Dot:
+    """最小的精灵替身：只有 rect / radius / dead"""
+    def __init__(self, x, y, size=8, radius=3):
+        self.rect = pygame.Rect(0, 0, size, size)
+        self.rect.center = (x, y)
+        self.radius = radius
+        self.dead = False
+
+
+@pytest.fixture
+def dots():
+    rng = np.random.default_rng(0)
+    return [Dot(int(x), int(y)) for x, y in rng.integers(-50, 650, (600, 2))]
+
+
+def _near(dots, pos, radius):
+    return [d for d in dots if np.hypot(d.rect.centerx - pos[0], d.rect.centery - pos[1]) <= radius]
+
+
+@pytest.mark.parametrize('cell_size', [16, 64, 200])
+def test_query_covers_neighbours_in_group_order(dots, cell_size):
+    grid = SpatialGrid(cell_size)
+    grid.rebuild(dots)
+    order = {d: i for i, d in enumerate(dots)}
+    for pos, radius in (((300, 300), 45), ((0, 0), 100), ((640, 10), 60), ((-40, 600), 1)):
+        found = grid.query(pos, radius)
+        assert [order[d] for d in found] == sorted(order[d] for d in found)
+        assert set(_near(dots, pos, radius)) <= set(found)
+        exact = [d for d in found if d in set(_near(dots, pos, radius))]
+        assert exact == _near(dots, pos, radius) # 精确过滤后与全量遍历顺序相同
+
+
+def test_query_skips_dead_and_includes_inserted(dots):
+    grid = SpatialGrid()
+    grid.rebuild(dots)
+    dots[0].dead = True
+    newborn = Dot(*dots[0].rect.center)
+    grid.insert(newborn)
+    found = grid.query(dots[0].rect.center, 10)
+    assert dots[0] not in found and found[-1] is newborn
+
+
+def test_query_rect_covers_visible(dots):
+    grid = SpatialGrid()
+    grid.rebuild(dots)
+    view = pygame.Rect(100, 120, 200, 150)
+    found = set(grid.query_rect(view))
+    assert {d for d in dots if d.rect.colliderect(view)} <= found
+
+
+def test_candidates_without_grid_fall_back_to_group(dots):
+    class Group(list):
+        pass
+
+    group = Group(dots)
+    assert grid_candidates(group, (0, 0), 10) is group
+    SpatialGrid().attach(group).rebuild()
+    assert set(_near(dots, (0, 0), 10)) <= set(grid_candidates(group, (0, 0), 10))
+
+
+class BruteForceGrid(SpatialGrid):
+    """查询返回组内全部存活精灵（按组内顺序），作为网格查询的对照"""
+    def query(self, pos, radius):
+        return [s for s in self.group if not s.dead]
+
+
+def _fast_run(brute_force, ticks=300):
+    canvas = GameCanvas(engine='sprite', headless=True, seed=0)
+    if brute_force:
+        canvas.predator_grid = BruteForceGrid().attach(canvas.predators)
+        canvas.prey_grid = BruteForceGrid().attach(canvas.prey)
+        canvas.plant_grid = BruteForceGrid().attach(canvas.plants)
+    populate(canvas, 10, 50)
+    canvas.apply_overrides({'predator': {'max_speed': 40}, 'prey': {'max_speed': 40}})
+    canvas.run(ticks)
+    return fingerprint(canvas)
+
+
+def test_fast_creatures_match_brute_force():
+    """最大速度远超旧的固定余量（16像素）时，网格查询的模拟结果仍与全量遍历完全相同"""
+    assert _fast_run(False) == _fast_run(True)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_grid_pairs_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    qx, qy = rng.uniform(0, 500, (2, 300))
+    tx, ty = rng.uniform(-20, 520, (2, 400))
+    dist2 = (tx[None, :] - qx[:, None]) ** 2 + (ty[None, :] - qy[:, None]) ** 2
+    for radius in (30.0, rng.uniform(0, 60, 300)):
+        qi, tj = grid_pairs(qx, qy, tx, ty, radius)
+        limit = np.square(radius)[:, None] if np.ndim(radius) else radius * radius
+        expected = np.argwhere(dist2 <= limit)
+        assert np.array_equal(np.stack([qi, tj], axis=1), expected) # argwhere 按 (查询, 目标) 排序
+
+
+def test_grid_pairs_empty_inputs():
+    qi, tj = grid_pairs(np.zeros(0), np.zeros(0), np.ones(3), np.ones(3), 10)
+    assert len(qi) == len(tj) == 0
+    qi, tj = grid_pairs(np.ones(3), np.ones(3), np.zeros(0), np.zeros(0), 10)
+    assert len(qi) == len(tj) == 0
@@ -0,0 +1,93 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_sweep
+Propose: Sweep sampling, summaries and resuming an interrupted results file
+'''
+
+import json
+
+import numpy as np
+import pytest
+
+import sweep
+from sweep import (
+    _parse_space, _trim_partial_line, build_simulation, grid, load_results, random_sample, run_id, run_simulation, run_sweep,
+    summarize
+)
+
+
+def test_grid_and_random_sample():
+    space = {'B': [1, 2], 'A': ['x', 'y', 'z']}
+    configs = grid(space)
+    assert len(configs) == 6 and configs[0] == {'A': 'x', 'B': 1}
+    sampled = random_sample({'N': (30, 120), 'r': (40.0, 80.0), 'k': [1, 2]}, 50, seed=3)
+    assert sampled == random_sample({'N': (30, 120), 'r': (40.0, 80.0), 'k': [1, 2]}, 50, seed=3)
+    assert all(isinstance(c['N'], int) and 30 <= c['N'] <= 120 and 40 <= c['r'] <= 80 for c in sampled)
+    assert _parse_space(['A=1,2.5,x', 'B=3:7']) == {'A': [1, 2.5, 'x'], 'B': (3, 7)}
+
+
+def test_summarize_extinction_and_period():
+    ticks = np.arange(1, 201) * 30
+    prey = (100 + 50 * np.sin(2 * np.pi * ticks / 1500)).round()
+    predator = np.maximum(20 - np.arange(200) // 5, 0)
+    summary = summarize({'tick': ticks.tolist(), 'predator': predator.tolist(), 'prey': prey.tolist(),
+                         'plant': [5] * 200})
+    assert summary['predator_extinction_tick'] == int(ticks[np.flatnonzero(predator == 0)[0]])
+    assert summary['prey_extinction_tick'] is None
+    assert summary['prey_period'] == pytest.approx(1500, rel=0.01)
+    assert summary['plant_period'] is None and summary['plant_mean'] == 5
+
+
+@pytest.mark.parametrize('tail', [b'', b'{"run_id": "half', b'x' * 70000])
+def test_trim_partial_line(tmp_path, tail):
+    path = tmp_path / 'results.jsonl'
+    lines = b'{"run_id": "a"}\n{"run_id": "b"}\n'
+    path.write_bytes(lines + tail)
+    _trim_partial_line(str(path), chunk=16)
+    assert path.read_bytes() == lines
+    assert [r['run_id'] for r in load_results(str(path))] == ['a', 'b']
+
+
+def test_run_id_depends_on_every_input():
+    base = run_id({'A': 1}, 0, 100, 'sprite')
+    assert base == run_id({'A': 1}, 0, 100, 'sprite')
+    assert len({base, run_id({'A': 2}, 0, 100, 'sprite'), run_id({'A': 1}, 1, 100, 'sprite'),
+                run_id({'A': 1}, 0, 200, 'sprite'), run_id({'A': 1}, 0, 100, 'numpy')}) == 5
+
+
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_run_simulation_applies_overrides(engine):
+    params = {'PREDATOR_COUNT': 3, 'PREY_COUNT': 7, 'prey.hearing_radius': 70}
+    canvas = build_simulation(params, 0, engine)
+    series = canvas.run(60)
+    assert series['tick'] == [30, 60]
+    assert (series['predator'][0], series['prey'][0]) == (3, 7)
+    # 覆盖的性状写入个体的基因组（精灵引擎同时写入属性），存活个体全部取覆盖值
+    if engine == 'sprite':
+        hearing = canvas.genome_values('prey')[:, canvas.genomes['prey'].index['hearing_radius']]
+        assert all(prey.hearing_radius == 70 for prey in canvas.prey)
+    else:
+        hearing = canvas.world.prey.trait('hearing_radius')
+    assert len(hearing) == len(canvas.prey) > 0 and (hearing == 70).all()
+    assert series == run_simulation(params, 0, 60, engine)
+
+
+@pytest.mark.slow
+def test_interrupted_sweep_resumes(tmp_path):
+    """中断（末行写了一半）后重新执行同一扫描：只补跑缺少的运行，结果文件每行都可解析"""
+    out = str(tmp_path / 'results.jsonl')
+    configs = grid({'PREDATOR_COUNT': [3, 5]})
+    run_sweep(configs[:1], [0], 300, out, workers=1)
+    with open(out, 'a', encoding='utf-8') as f:
+        f.write('{"run_id": "interrupted')
+    run_sweep(configs, [0, 1], 300, out, workers=1)
+    with open(out, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 4 == len({r['run_id'] for r in records})
+    first = records[0]
+    assert first['series'] == sweep.run_simulation(first['params'], first['seed'], 300)
+    assert first['summary'] == summarize(first['series'])
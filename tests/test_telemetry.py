@@ -0,0 +1,118 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_telemetry
+Propose: Telemetry server round-trips with the local client: stats stream, pause/resume, snapshot, speed
+'''
+
+import os
+import threading
+import time
+
+import pytest
+
+from checkpoint import load_checkpoint
+from profiler import Profiler
+from telemetry import TICK_RATE, TelemetryClient, TelemetryServer, parse_speed, snapshot_name
+from UI_design import GameCanvas, populate
+
+
+@pytest.fixture(params=['sprite', 'numpy'])
+def served(request, tmp_path):
+    """无界面模拟在后台线程中运行，测试线程作为客户端连接（端口由系统分配）"""
+    canvas = populate(GameCanvas(engine=request.param, headless=True, seed=0), 20, 200)
+    Profiler(canvas)
+    server = TelemetryServer(canvas, port=0, interval=0.05, snapshot_dir=str(tmp_path))
+    stop = threading.Event()
+
+    def simulate():
+        while not stop.is_set():
+            canvas.run(1)
+
+    thread = threading.Thread(target=simulate)
+    thread.start()
+    client = TelemetryClient(server.port)
+    try:
+        yield canvas, client, tmp_path
+    finally:
+        client.close()
+        stop.set()
+        canvas.paused = False
+        server._wake.set()
+        thread.join()
+        server.close()
+        if canvas.world is not None:
+            canvas.world.close()
+
+
+def test_stats_stream(served):
+    canvas, client, _ = served
+    first = client.next_stats()
+    assert first['type'] == 'stats'
+    assert first['population']['prey'] is not None and first['memory_mb'] is not None
+    later = client.next_stats()
+    assert later['seq'] > first['seq'] and later['tick'] >= first['tick']
+    assert later['phases_ms'] is not None
+
+
+def test_pause_and_resume(served):
+    canvas, client, _ = served
+    paused = client.command('pause')
+    assert paused['ok'] and paused['paused']
+    time.sleep(0.3)
+    assert client.command('stats')['tick'] == paused['tick'] == canvas.current_tick
+    resumed = client.command('resume')
+    assert resumed['ok'] and not resumed['paused']
+    time.sleep(0.3)
+    assert client.command('stats')['tick'] > paused['tick']
+
+
+def test_snapshot_is_written_between_ticks(served):
+    canvas, client, directory = served
+    paused = client.command('pause')
+    reply = client.command('snapshot run')
+    assert reply['ok'] and reply['tick'] == paused['tick']
+    assert reply['path'] == os.path.join(str(directory), 'run.npz')
+    assert load_checkpoint(reply['path']).current_tick == paused['tick']
+    default = client.command('snapshot')
+    assert default['ok'] and os.path.exists(os.path.join(str(directory), f"snapshot_{paused['tick']}.npz"))
+
+
+@pytest.mark.parametrize('name', ['..', '../escape.npz', '/tmp/escape.npz', 'sub/run.npz'])
+def test_snapshot_refuses_paths(served, name):
+    _, client, directory = served
+    reply = client.command(f'snapshot {name}')
+    assert not reply['ok']
+    assert os.listdir(str(directory)) == []
+
+
+def test_speed_limits_tick_rate(served):
+    _, client, _ = served
+    slow = client.command('speed 1')
+    assert slow['ok'] and slow['speed'] == 1
+    start = client.command('stats')['tick']
+    time.sleep(0.5)
+    assert (client.command('stats')['tick'] - start) / 0.5 < TICK_RATE * 1.5
+    fast = client.command('speed max')
+    assert fast['ok'] and fast['speed'] == 'max'
+
+
+def test_invalid_commands_reply_with_errors(served):
+    _, client, _ = served
+    assert not client.command('speed 3')['ok']
+    unknown = client.command('jump')
+    assert not unknown['ok'] and 'unknown command' in unknown['error']
+    assert client.command('stats')['ok'] # 出错后连接仍可用
+
+
+def test_parse_helpers():
+    assert parse_speed('max') is None and parse_speed('10') == 10 and parse_speed('1.0') == 1
+    with pytest.raises(ValueError):
+        parse_speed('2')
+    assert snapshot_name(None, 42) == 'snapshot_42.npz'
+    assert snapshot_name('run', 0) == 'run.npz'
+    with pytest.raises(ValueError):
+        snapshot_name('../run', 0)
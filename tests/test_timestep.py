@@ -0,0 +1,73 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: tests.test_timestep
+Propose: Fixed-timestep loop matches per-tick stepping; tick budget, backlog dropping and render decimation
+'''
+
+import pygame
+import pytest
+
+from sim_random import fingerprint
+from timestep import SPEEDS, FixedTimestep
+from UI_design import GameCanvas, populate
+
+
+@pytest.fixture
+def loop():
+    canvas = populate(GameCanvas(headless=True, seed=0), 1, 1)
+    return FixedTimestep(canvas, speed=1)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('engine', ['sprite', 'numpy'])
+def test_fixed_timestep_matches_run(engine):
+    """不限速、降频绘制的固定步长循环与逐tick绘制的 run 结果逐位一致"""
+    reference = populate(GameCanvas(engine=engine, seed=0), 10, 50)
+    reference.run(300)
+    canvas = populate(GameCanvas(engine=engine, seed=0), 10, 50)
+    loop = FixedTimestep(canvas, speed=None)
+    while canvas.current_tick < 300:
+        loop.frame(limit=300 - canvas.current_tick)
+        pygame.event.pump()
+    try:
+        assert canvas.current_tick == reference.current_tick == 300
+        assert fingerprint(canvas) == fingerprint(reference)
+    finally:
+        for c in (canvas, reference):
+            if c.world is not None:
+                c.world.close()
+
+
+def test_speed_sets_ticks_per_frame(loop):
+    loop.step_time = 1e-5
+    assert loop._planned_ticks(loop.frame_time) == 1
+    loop.set_speed(SPEEDS.index(100))
+    assert loop._planned_ticks(loop.frame_time) == 100
+
+
+def test_budget_limits_ticks_and_drops_backlog(loop):
+    loop.set_speed(SPEEDS.index(100))
+    loop.step_time = loop.frame_time / 10 # 预算（80% 帧时间）内只够 8 个tick
+    assert loop._planned_ticks(10.0) == 8
+    assert loop.accumulator <= loop.tick_rate * 100 * loop.frame_time # 最多保留一帧的积压
+    loop.set_speed(SPEEDS.index(None))
+    assert loop._planned_ticks(0.0) == 8
+
+
+def test_paused_canvas_does_not_advance(loop):
+    loop.canvas.paused = True
+    loop.step_time = 1e-5
+    assert loop._planned_ticks(1.0) == 0 and loop.accumulator == 0
+
+
+def test_slow_rendering_is_decimated(loop):
+    allowed = (1 - loop.budget) * loop.frame_time
+    loop._track_render(allowed * 3)
+    assert loop.render_every == 3
+    loop.render_time = 0.0
+    loop._track_render(allowed * 100)
+    assert loop.render_every == loop.max_skip
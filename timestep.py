@@ -0,0 +1,137 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: timestep
+Propose: Fixed-timestep main loop: several simulation ticks per displayed frame, speed multiplier, render decimation
+'''
+
+# import modules
+import math
+import time
+
+import pygame
+
+TICK_RATE = 60 # 1倍速时每秒的模拟tick数（全部计时器以tick为单位，与绘制帧率无关）
+FRAME_RATE = 60 # 目标显示帧率
+SPEEDS = (1, 10, 100, None) # 倍速档位（None 为不限速，按时间预算尽量多跑）
+SPEED_KEYS = {pygame.K_1: 0, pygame.K_2: 1, pygame.K_3: 2, pygame.K_4: 3} # 数字键 1~4 选择倍速
+CHART_REFRESH = 6 # 快进时图表最多每隔几个绘制帧重绘一次（约10次/秒）
+
+
+class FixedTimestep:
+    """固定步长主循环
+
+    每个显示帧按墙钟时间 × 倍速累积应推进的tick数，在 budget（帧时间的占比）内尽量全部推进；
+    跟不上时丢弃积压（实际速率下降而不是越积越多）。绘制较慢时每 render_every 帧才绘制一次，
+    使绘制开销不超过帧时间的 1 - budget；快进时图表降频重绘。
+    模拟只由 GameCanvas.step 推进，绘制不消耗随机数、不改变状态，因此结果与绘制多少帧无关。
+    画布暂停时（canvas.paused，见 telemetry）只绘制不推进。
+    """
+    def __init__(self, canvas, speed=1, tick_rate=TICK_RATE, frame_rate=FRAME_RATE, budget=0.8, max_skip=8):
+        self.canvas = canvas
+        self.tick_rate = tick_rate
+        self.frame_time = 1 / frame_rate
+        self.budget = budget # 每帧用于模拟的时间占比
+        self.max_skip = max_skip # 最多每隔几帧绘制一次
+        self.speed_index = SPEEDS.index(speed)
+        self.accumulator = 0.0 # 尚未推进的tick数（可为小数）
+        self.render_every = 1 # 每隔几帧绘制一次
+        self.step_time = 0.0 # 单个tick耗时（指数滑动平均，秒）
+        self.render_time = 0.0 # 单次绘制耗时（指数滑动平均，秒）
+        self.frames = 0 # 已执行的循环帧数
+        self.rate = 0.0 # 实测tick速率（每秒）
+        self._rate_ticks = 0
+        self._rate_start = self._last = time.perf_counter()
+        canvas.frame_limit = 0 # 节奏由本循环控制，clock 只用于计量绘制帧率
+        canvas.timestep = self # 遥测的 speed 命令经此切换倍速
+        self._apply_speed()
+
+    @property
+    def speed(self):
+        return SPEEDS[self.speed_index]
+
+    def set_speed(self, index):
+        self.speed_index = index
+        self.accumulator = 0.0
+        self._apply_speed()
+
+    def _apply_speed(self):
+        self.canvas.chart_refresh = 1 if self.speed == 1 else CHART_REFRESH
+
+    def handle(self, event):
+        """数字键 1~4 切换倍速（1x/10x/100x/不限速）"""
+        if event.type == pygame.KEYDOWN and event.key in SPEED_KEYS:
+            self.set_speed(SPEED_KEYS[event.key])
+
+    def _planned_ticks(self, elapsed):
+        """本帧要推进的tick数：应推进数与时间预算允许数中的较小者（暂停时为0）"""
+        if self.canvas.paused:
+            self.accumulator = 0.0
+            return 0
+        fit = max(1, int(self.budget * self.frame_time / self.step_time)) if self.step_time > 0 else 1
+        if self.speed is None:
+            return fit
+        per_frame = self.tick_rate * self.speed * self.frame_time
+        self.accumulator += elapsed * self.tick_rate * self.speed
+        ticks = min(int(self.accumulator), fit)
+        self.accumulator = min(self.accumulator - ticks, per_frame) # 跟不上时丢弃积压，最多留一帧的量
+        return ticks
+
+    def frame(self, limit=None):
+        """执行一个显示帧：推进若干tick（至多 limit 个），并按降频决定是否绘制；返回推进的tick数"""
+        canvas = self.canvas
+        if canvas.telemetry is not None:
+            canvas.telemetry.service()
+        start = time.perf_counter()
+        elapsed, self._last = start - self._last, start
+        ticks = self._planned_ticks(elapsed)
+        if limit is not None:
+            ticks = min(ticks, limit)
+        draw = self.frames % self.render_every == 0
+        if ticks:
+            for _ in range(ticks - 1):
+                canvas.update(render=False)
+            middle = time.perf_counter()
+            canvas.update(render=draw) # 只在本帧最后一个tick后绘制
+            last = time.perf_counter() - middle
+            if ticks > 1:
+                self._track_step((middle - start) / (ticks - 1))
+            elif not draw or not self.step_time:
+                self._track_step(last)
+            if draw:
+                self._track_render(max(last - self.step_time, 0.0)) # 最后一个tick的耗时减去平均tick耗时
+        elif draw:
+            # 本帧无tick可推进（如刚切换倍速）：只绘制，摄像机平移仍即时可见
+            canvas.render()
+            self._track_render(time.perf_counter() - start)
+        self.frames += 1
+        self._count(ticks)
+        # 限速档位：提前完成时等到下一帧
+        if self.speed is not None:
+            remaining = self.frame_time - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+        return ticks
+
+    def _track_step(self, seconds):
+        self.step_time = seconds if not self.step_time else 0.9 * self.step_time + 0.1 * seconds
+
+    def _track_render(self, seconds):
+        self.render_time = seconds if not self.render_time else 0.9 * self.render_time + 0.1 * seconds
+        allowed = (1 - self.budget) * self.frame_time
+        self.render_every = min(max(math.ceil(self.render_time / allowed), 1), self.max_skip)
+
+    def _count(self, ticks):
+        """每秒更新一次实测tick速率与状态文字"""
+        self._rate_ticks += ticks
+        now = time.perf_counter()
+        if now - self._rate_start >= 1.0:
+            self.rate = self._rate_ticks / (now - self._rate_start)
+            self._rate_ticks, self._rate_start = 0, now
+            speed = 'max' if self.speed is None else f'{self.speed}x'
+            skip = f'  draw 1/{self.render_every}' if self.render_every > 1 else ''
+            self.canvas.loop_status = f'Speed: {speed}  {self.rate:.0f} ticks/s{skip}'
+
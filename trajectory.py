@@ -0,0 +1,238 @@
+'''
+Author: TiiJeiJ8
+Project: Survival & Evolution
+Info: A simulation of biological evolution
+Project Start Date: 2025-02-28
+
+Module: trajectory
+Propose: Append-only chunked trajectory log (recorder + memory-mapped reader)
+'''
+
+# import modules
+import json
+import os
+
+import numpy as np
+
+LOG_VERSION = 2 # 2: 植物 variant 为 sprite_cache 图集序号
+# 每个个体一条记录（16字节）
+RECORD_DTYPE = np.dtype([
+    ('kind', 'u1'), ('flags', 'u1'), ('variant', 'u1'), ('pad', 'u1'),
+    ('x', '<f4'), ('y', '<f4'), ('energy', '<f4'),
+])
+# 每个记录帧一条索引（定长，按帧号直接定位）
+INDEX_DTYPE = np.dtype([('tick', '<i8'), ('chunk', '<i4'), ('count', '<i4'), ('offset', '<i8')])
+KIND_PREDATOR, KIND_PREY, KIND_PLANT = 0, 1, 2
+FLAG_CHASING, FLAG_REPRODUCING, FLAG_FLEEING = 1, 2, 4
+
+
+def _chunk_name(chunk):
+    return f'chunk_{chunk:05d}.bin'
+
+
+class TrajectoryRecorder:
+    """逐帧记录个体位置与状态
+
+    数据按帧追加写入分块文件（单块超过 chunk_bytes 后换新块），
+    每帧在 index.bin 追加一条定长索引；数据先落盘（flush）再写索引，中途崩溃也不会出现悬空索引。
+    目录中已有日志时接着追加（与 MetricsRecorder 相同）：晚于画布当前tick的帧（如从较早的存档续跑）
+    以及崩溃时写了一半的索引/数据先被截掉，新帧必须紧接已有的最后一帧。
+    """
+    def __init__(self, canvas, directory, stride=1, chunk_bytes=256 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.canvas = canvas
+        self.directory = directory
+        self.stride = stride # 每隔多少tick记录一帧
+        self.chunk_bytes = chunk_bytes
+        self.chunk = 0
+        self.offset = 0
+        self.first_tick = None
+        self.last_tick = None
+        self._meta_path = os.path.join(directory, 'meta.json')
+        self._open_log()
+        canvas.recorder = self
+
+    def _open_log(self):
+        """打开索引与当前数据块（追加）；已有日志先截断到与画布当前tick一致"""
+        index_path = os.path.join(self.directory, 'index.bin')
+        entries = np.zeros(0, dtype=INDEX_DTYPE)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['version'] != LOG_VERSION or meta['stride'] != self.stride:
+                raise ValueError(f"Existing trajectory log in {self.directory} has a different version or stride")
+            if os.path.exists(index_path):
+                entries = np.fromfile(index_path, dtype=INDEX_DTYPE,
+                                      count=os.path.getsize(index_path) // INDEX_DTYPE.itemsize)
+            entries = entries[:_valid_entries(self.directory, entries)]
+            entries = entries[entries['tick'] <= self.canvas.current_tick]
+            if len(entries):
+                self.first_tick = meta['first_tick']
+                self.last_tick = int(entries['tick'][-1])
+                if self.canvas.current_tick // self.stride * self.stride > self.last_tick: # 下一帧须紧接最后一帧
+                    raise ValueError(
+                        f"Trajectory log in {self.directory} ends at tick {self.last_tick}; "
+                        f"recording from tick {self.canvas.current_tick} would leave a gap"
+                    )
+                last = entries[-1]
+                self.chunk = int(last['chunk'])
+                self.offset = int(last['offset']) + int(last['count']) * RECORD_DTYPE.itemsize
+        with open(index_path, 'ab') as f:
+            f.truncate(len(entries) * INDEX_DTYPE.itemsize)
+        chunk = self.chunk
+        while os.path.exists(os.path.join(self.directory, _chunk_name(chunk + 1))):
+            chunk += 1
+        for stale in range(chunk, self.chunk, -1): # 截掉的帧所在的后续数据块
+            os.remove(os.path.join(self.directory, _chunk_name(stale)))
+        self._data = open(os.path.join(self.directory, _chunk_name(self.chunk)), 'ab')
+        self._data.truncate(self.offset)
+        self._index = open(index_path, 'ab')
+
+    def _frame(self):
+        """当前tick的全部记录"""
+        canvas = self.canvas
+        if canvas.world is not None:
+            world = canvas.world
+            parts = []
+            for kind, store in ((KIND_PREDATOR, world.predators), (KIND_PREY, world.prey)):
+                part = np.zeros(store.n, dtype=RECORD_DTYPE)
+                part['kind'] = kind
+                part['flags'] = (
+                    store.is_chasing * FLAG_CHASING + store.is_reproducing * FLAG_REPRODUCING
+                    + store.is_fleeing * FLAG_FLEEING
+                )
+                part['x'], part['y'], part['energy'] = store.x, store.y, store.energy
+                parts.append(part)
+            plants = world.plants
+            part = np.zeros(plants.n, dtype=RECORD_DTYPE)
+            part['kind'] = KIND_PLANT
+            part['variant'] = plants.variant
+            part['x'], part['y'], part['energy'] = plants.x, plants.y, plants.energy
+            parts.append(part)
+            return np.concatenate(parts)
+        rows = [
+            (KIND_PREDATOR, c.is_chasing + 2 * c.is_reproducing, 0, 0, *c.rect.center, c.energy)
+            for c in canvas.predators
+        ]
+        rows += [
+            (KIND_PREY, c.is_chasing + 2 * c.is_reproducing + 4 * c.is_fleeing, 0, 0, *c.rect.center, c.energy)
+            for c in canvas.prey
+        ]
+        rows += [
+            (KIND_PLANT, 0, p.variant, 0, *p.rect.center, p.energy)
+            for p in canvas.plants
+        ]
+        return np.array(rows, dtype=RECORD_DTYPE)
+
+    def record(self):
+        """记录当前tick（由 GameCanvas.step 调用）"""
+        tick = self.canvas.current_tick
+        if tick % self.stride:
+            return
+        if self.first_tick is None:
+            self.first_tick = tick
+            self._write_meta()
+        frame = self._frame()
+        if self.offset and self.offset + frame.nbytes > self.chunk_bytes:
+            self._data.close()
+            self.chunk += 1
+            self.offset = 0
+            self._data = open(os.path.join(self.directory, _chunk_name(self.chunk)), 'wb')
+        self._data.write(frame.tobytes())
+        self._data.flush() # 索引只指向已交给操作系统的数据（读取端可能同时在读）
+        entry = np.array([(tick, self.chunk, len(frame), self.offset)], dtype=INDEX_DTYPE)
+        self._index.write(entry.tobytes())
+        self.offset += frame.nbytes
+        self.last_tick = tick
+
+    def _write_meta(self):
+        meta = {
+            'version': LOG_VERSION, 'stride': self.stride, 'first_tick': self.first_tick,
+            'width': self.canvas.width, 'height': self.canvas.height,
+        }
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def flush(self):
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+        if self.canvas.recorder is self:
+            self.canvas.recorder = None
+
+
+def _valid_entries(directory, index):
+    """索引中数据完整的前缀长度：末尾指向数据块中尚未写入（或崩溃时丢失）字节的帧不计入"""
+    sizes = {}
+    count = len(index)
+    while count:
+        entry = index[count - 1]
+        chunk = int(entry['chunk'])
+        if chunk not in sizes:
+            path = os.path.join(directory, _chunk_name(chunk))
+            sizes[chunk] = os.path.getsize(path) if os.path.exists(path) else 0
+        if int(entry['offset']) + int(entry['count']) * RECORD_DTYPE.itemsize <= sizes[chunk]:
+            break
+        count -= 1
+    return count
+
+
+class TrajectoryLog:
+    """轨迹日志读取器：索引与数据块均按需内存映射，任意帧定位为常数时间"""
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != LOG_VERSION:
+            raise ValueError(f"Unsupported trajectory log version: {self.meta['version']}")
+        self.width = self.meta['width']
+        self.height = self.meta['height']
+        self.stride = self.meta['stride']
+        self.first_tick = self.meta['first_tick']
+        self._chunks = {}
+        self.refresh()
+
+    def refresh(self):
+        """重新映射索引（记录仍在进行时可读取新追加的帧）"""
+        path = os.path.join(self.directory, 'index.bin')
+        count = os.path.getsize(path) // INDEX_DTYPE.itemsize
+        index = np.memmap(path, dtype=INDEX_DTYPE, mode='r', shape=(count,)) if count else \
+            np.zeros(0, dtype=INDEX_DTYPE)
+        self.index = index[:_valid_entries(self.directory, index)]
+        self._chunks.clear()
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def last_tick(self):
+        return self.first_tick + (len(self) - 1) * self.stride
+
+    def position(self, tick):
+        """tick 对应的帧序号（取不超过该tick的最近一帧）"""
+        return min(max((tick - self.first_tick) // self.stride, 0), len(self) - 1)
+
+    def _chunk(self, chunk):
+        data = self._chunks.get(chunk)
+        if data is None:
+            path = os.path.join(self.directory, _chunk_name(chunk))
+            data = np.memmap(path, dtype=np.uint8, mode='r')
+            self._chunks[chunk] = data
+        return data
+
+    def frame_at(self, position):
+        """第 position 帧的记录（只读视图，不复制）"""
+        entry = self.index[position]
+        if not entry['count']:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        start = int(entry['offset'])
+        end = start + int(entry['count']) * RECORD_DTYPE.itemsize
+        return self._chunk(int(entry['chunk']))[start:end].view(RECORD_DTYPE)
+
+    def frame(self, tick):
+        """tick 时刻的记录"""
+        return self.frame_at(self.position(tick))
+
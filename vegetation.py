@@ -9,25 +9,48 @@ Description: This module contains the Vegetation class, which represents the veg
 '''
 
 # import modules
-import numpy as np
 import pygame
-import random
+
+from sim_random import default_stream
+from sprite_cache import PLANT_COLORS, get_atlas, plant_variant, plant_variants
 
 class Plant(pygame.sprite.Sprite):
-    def __init__(self, x, y, cluster_id):
+    SPECIES = 'plant' # 事件计数名（见 metrics.EVENTS）
+
+    def __init__(self, x, y, cluster_id, rng=None, shape=None):
         super().__init__()
-        self.image = pygame.Surface((12, 12), pygame.SRCALPHA)
-        sides = random.choice([3, 4, 5, 6])
-        radius = random.randint(3, 5)
-        angle_offset = random.uniform(0, 360)
-        points = [
-            (
-                6 + radius * np.cos(np.radians(angle_offset + i * 360 / sides)),
-                6 + radius * np.sin(np.radians(angle_offset + i * 360 / sides))
-            ) for i in range(sides)
-        ]
-        color = random.choice([(169, 211, 173), (146, 185, 190), (210, 214, 153)])
-        pygame.draw.polygon(self.image, color, points)
+        if shape is None:
+            rng = rng if rng is not None else default_stream('plant')
+            shape = (int(rng.integers(3, 7)), int(rng.integers(3, 6)), rng.uniform(0, 360), int(rng.integers(len(PLANT_COLORS))))
+        self.shape = shape # 外观参数（边数, 半径, 起始角度, 颜色序号），存档恢复时直接复用
+        self.variant = plant_variant(*shape) # 图集中的外观序号
+        self.image = get_atlas().plants[self.variant] # 共享预渲染图像
         self.rect = self.image.get_rect(center=(x, y))
         self.energy = 30.0      # 可获取能量
-        self.cluster_id = cluster_id  # 所属簇ID
\ No newline at end of file
+        self.cluster_id = cluster_id  # 所属簇ID
+        self.dead = False # 是否已被吃（被吃后在本阶段末统一移出精灵组）
+
+    @classmethod
+    def spawn_many(cls, x, y, cluster_id, rng):
+        """批量新建植物（初始植物簇）：外观参数按列一次向量化抽取，x/y/cluster_id 为等长数组，返回植物列表"""
+        count = len(x)
+        sides, radius = rng.integers(3, 7, count), rng.integers(3, 6, count)
+        angle, color = rng.uniform(0, 360, count), rng.integers(len(PLANT_COLORS), size=count)
+        images = get_atlas().plants
+        init = pygame.sprite.Sprite.__init__
+        plants = []
+        for shape, variant, cx, cy, cluster in zip(
+            zip(sides.tolist(), radius.tolist(), angle.tolist(), color.tolist()),
+            plant_variants(sides, radius, angle, color).tolist(), x.tolist(), y.tolist(), cluster_id.tolist()
+        ):
+            plant = cls.__new__(cls)
+            init(plant)
+            plant.shape = shape
+            plant.variant = variant
+            plant.image = images[variant]
+            plant.rect = plant.image.get_rect(center=(cx, cy))
+            plant.energy = 30.0
+            plant.cluster_id = cluster
+            plant.dead = False
+            plants.append(plant)
+        return plants